@@ -0,0 +1,219 @@
+"""
+Rebuild the analytics rollups from the contact messages and testimonials
+
+The server keeps the rollups current on every write; run this once to
+backfill them for data written before they existed, or after restoring a
+backup. Writes made while it runs may be counted twice or not at all, so
+run it when the inbox is quiet.
+
+    python analytics.py
+    python analytics.py --sources contact_messages
+"""
+import asyncio
+import logging
+import argparse
+from datetime import datetime
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from pymongo import UpdateOne
+from pymongo.errors import PyMongoError
+
+from repository import get_db
+
+logger = logging.getLogger(__name__)
+
+# (dimension, key, counters) contributed by one document
+Bucket = Tuple[str, str, Dict[str, float]]
+
+
+def contact_buckets(document: dict) -> List[Bucket]:
+    created_at = document.get("created_at")
+    day = created_at.date().isoformat() if isinstance(created_at, datetime) else "unknown"
+    counters = {"count": 1, "unread": 0 if document.get("read") else 1}
+    return [
+        ("total", "", counters),
+        ("day", day, counters),
+        ("projectType", document.get("projectType") or "", counters),
+    ]
+
+
+def testimonial_buckets(document: dict) -> List[Bucket]:
+    rating = document.get("rating") or 0
+    return [
+        ("total", "", {"count": 1, "rating_total": rating}),
+        ("rating", str(rating), {"count": 1}),
+    ]
+
+
+# Source collection -> the buckets each of its documents counts towards
+ROLLUPS: Dict[str, Callable[[dict], List[Bucket]]] = {
+    "contact_messages": contact_buckets,
+    "testimonials": testimonial_buckets,
+}
+
+# Source collection -> the fields its buckets are derived from
+ROLLUP_FIELDS: Dict[str, Tuple[str, ...]] = {
+    "contact_messages": ("created_at", "projectType", "read"),
+    "testimonials": ("rating",),
+}
+
+
+def rollup_collection(source: str) -> str:
+    return f"{source}_rollups"
+
+
+def bucket_id(dimension: str, key: str) -> str:
+    return f"{dimension}:{key}" if key else dimension
+
+
+def bucket_range_query(since: Dict[str, str]) -> dict:
+    """Filter for every bucket, except keys of the `since` dimensions below their bound.
+
+    Bucket ids are "<dimension>:<key>", so each clause is a range on the _id index.
+    """
+    if not since:
+        return {}
+    clauses, lower = [], None
+    for dimension, key in sorted(since.items()):
+        before = {"$lt": f"{dimension}:"}
+        if lower is not None:
+            before["$gte"] = lower
+        clauses.append({"_id": before})
+        clauses.append({"_id": {"$gte": bucket_id(dimension, key), "$lt": f"{dimension};"}})
+        # ";" sorts right after ":", so this is the first id past the dimension
+        lower = f"{dimension};"
+    clauses.append({"_id": {"$gte": lower}})
+    return {"$or": clauses}
+
+
+class Rollups:
+    """Counters over the contact inbox and testimonials, kept current on write.
+
+    Each source has a `<source>_rollups` collection with one small document
+    per bucket (the total, a day, a project type, a rating). A write adds
+    its contribution with an upserting $inc, which is atomic and so safe
+    across workers, and reading the stats costs one scan of the buckets
+    whatever the size of the inbox.
+
+    Bulk and many-document writes report their documents too: the source
+    repositories capture before/after images of the fields the buckets
+    depend on, so every write applies a delta. Recounting (`rebuild`) is
+    only for backfill.
+    """
+
+    def __init__(self, rollups: Dict[str, Callable[[dict], List[Bucket]]] = ROLLUPS):
+        self.rollups = rollups
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.applied = 0
+        self.rebuilds = 0
+        self.failures = 0
+
+    def _collection(self, source: str):
+        return get_db()[rollup_collection(source)]
+
+    def _lock(self, source: str) -> asyncio.Lock:
+        lock = self._locks.get(source)
+        if lock is None:
+            lock = self._locks[source] = asyncio.Lock()
+        return lock
+
+    def _tally(self, source: str, documents: Iterable[dict], sign: int, into: Dict[str, list]):
+        for document in documents:
+            for dimension, key, counters in self.rollups[source](document):
+                bucket = into.setdefault(bucket_id(dimension, key), [dimension, key, {}])
+                for name, amount in counters.items():
+                    bucket[2][name] = bucket[2].get(name, 0) + sign * amount
+
+    async def apply(self, source: str, before: Sequence[dict] = (), after: Sequence[dict] = ()):
+        """Replace the contribution of `before` with that of `after`."""
+        delta: Dict[str, list] = {}
+        self._tally(source, before, -1, delta)
+        self._tally(source, after, 1, delta)
+        operations = []
+        for identifier, (dimension, key, counters) in delta.items():
+            counters = {name: amount for name, amount in counters.items() if amount}
+            if counters:
+                operations.append(UpdateOne(
+                    {"_id": identifier},
+                    {"$inc": counters, "$setOnInsert": {"dimension": dimension, "key": key}},
+                    upsert=True,
+                ))
+        if not operations:
+            return
+        async with self._lock(source):
+            await self._collection(source).bulk_write(operations, ordered=False)
+        self.applied += 1
+
+    async def rebuild(self, source: str):
+        """Recount `source` from scratch, for backfill."""
+        totals: Dict[str, list] = {}
+        async with self._lock(source):
+            async for document in get_db()[source].find({}):
+                self._tally(source, (document,), 1, totals)
+            collection = self._collection(source)
+            if totals:
+                await collection.bulk_write([
+                    UpdateOne(
+                        {"_id": identifier},
+                        {"$set": {"dimension": dimension, "key": key, **counters}},
+                        upsert=True,
+                    )
+                    for identifier, (dimension, key, counters) in totals.items()
+                ], ordered=False)
+            await collection.delete_many({"_id": {"$nin": list(totals)}})
+        self.rebuilds += 1
+
+    async def _on_write(self, repository, event):
+        try:
+            await self.apply(repository.name, event.before, event.after)
+        except PyMongoError as exc:
+            # The write itself succeeded; the counters are off until the next rebuild
+            self.failures += 1
+            logger.error("Updating %s rollups after %s failed: %s", repository.name, event.operation, exc)
+
+    async def _on_contact_flush(self, documents: List[dict]):
+        await self.apply("contact_messages", after=documents)
+
+    def attach(self, repositories: Dict[str, object], contact_writer=None):
+        """Keep the rollups current; called on boot."""
+        for source in self.rollups:
+            repositories[source].capture_images(ROLLUP_FIELDS[source])
+            repositories[source].add_write_hook(self._on_write)
+        if contact_writer is not None:
+            contact_writer.add_flush_hook(self._on_contact_flush)
+
+    async def read(self, source: str, since: Optional[Dict[str, str]] = None) -> Dict[str, Dict[str, dict]]:
+        """The buckets of `source`, as dimension -> key -> counters.
+
+        `since` maps a dimension to the smallest key to return from it, so
+        reading the recent days does not cost a document per day ever recorded.
+        """
+        buckets: Dict[str, Dict[str, dict]] = {}
+        async for document in self._collection(source).find(bucket_range_query(since or {})):
+            counters = {name: value for name, value in document.items() if name not in ("_id", "dimension", "key")}
+            buckets.setdefault(document["dimension"], {})[document["key"]] = counters
+        return buckets
+
+    def stats(self) -> dict:
+        return {"applied": self.applied, "rebuilds": self.rebuilds, "failures": self.failures}
+
+
+rollups = Rollups()
+
+
+async def rebuild_rollups(sources: Optional[Iterable[str]] = None):
+    from server import storage
+
+    for source in sources or ROLLUPS:
+        await rollups.rebuild(source)
+        print(f"✓ Rebuilt {rollup_collection(source)}")
+    storage.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sources", help=f"Comma-separated collections to recount (default {','.join(ROLLUPS)})")
+    args = parser.parse_args()
+    sources = [name.strip() for name in args.sources.split(",")] if args.sources else None
+    if sources and not set(sources) <= set(ROLLUPS):
+        parser.error(f"Unknown sources: {', '.join(sorted(set(sources) - set(ROLLUPS)))}")
+    asyncio.run(rebuild_rollups(sources))
@@ -1,5 +1,8 @@
 import os
 import jwt
+import time
+import hashlib
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from fastapi import HTTPException, Security
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
@@ -7,6 +10,7 @@ from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'your-secret-key-change-in-production')
 ADMIN_PASSWORD = os.getenv('ADMIN_PASSWORD', 'admin123')
 ALGORITHM = 'HS256'
+TOKEN_CACHE_SIZE = int(os.getenv('TOKEN_CACHE_SIZE', '256'))
 
 security = HTTPBearer()
 
@@ -17,10 +21,52 @@ def create_access_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
-def verify_token(credentials: HTTPAuthorizationCredentials = Security(security)):
+class VerifiedTokenCache:
+    """Bounded LRU of already verified tokens, keyed by a digest of the token."""
+
+    def __init__(self, max_size: int = TOKEN_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, token: str):
+        key = hashlib.sha256(token.encode()).digest()
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return key, None
+        payload, expires_at = entry
+        if expires_at is not None and expires_at <= time.time():
+            del self._entries[key]
+            raise jwt.ExpiredSignatureError("Signature has expired")
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return key, payload
+
+    def put(self, key: bytes, payload: dict):
+        self._entries[key] = (payload, payload.get("exp"))
+        if len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+token_cache = VerifiedTokenCache()
+
+async def verify_token(credentials: HTTPAuthorizationCredentials = Security(security)):
     try:
         token = credentials.credentials
-        payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+        key, payload = token_cache.get(token)
+        if payload is None:
+            payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+            token_cache.put(key, payload)
         return payload
     except jwt.ExpiredSignatureError:
         raise HTTPException(status_code=401, detail="Token has expired")
@@ -0,0 +1,204 @@
+import os
+import asyncio
+import logging
+from typing import Awaitable, Callable, List, Optional
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo.errors import BulkWriteError, PyMongoError
+
+logger = logging.getLogger(__name__)
+
+CONTACT_QUEUE_SIZE = int(os.getenv('CONTACT_QUEUE_SIZE', '10000'))
+CONTACT_BATCH_SIZE = int(os.getenv('CONTACT_BATCH_SIZE', '100'))
+CONTACT_FLUSH_INTERVAL_MS = int(os.getenv('CONTACT_FLUSH_INTERVAL_MS', '200'))
+
+# Attempts per batch before its documents are given up on
+MAX_FLUSH_ATTEMPTS = 3
+
+# Queued by stop() to tell the flush loop to drain and exit
+_STOP = object()
+
+# Called with the documents of each batch that made it into the collection,
+# or, as a drop hook, with the documents that were given up on
+FlushHook = Callable[[List[dict]], Awaitable[None]]
+
+
+class BatchWriter:
+    """Buffers documents in a bounded queue and inserts them with insert_many.
+
+    A batch is flushed once it reaches `batch_size` documents or
+    `flush_interval` seconds after its first document arrived, whichever
+    comes first. `submit` never waits: when the queue is full it returns
+    False so the caller can shed load.
+    """
+
+    def __init__(
+        self,
+        max_queue: int = CONTACT_QUEUE_SIZE,
+        batch_size: int = CONTACT_BATCH_SIZE,
+        flush_interval: float = CONTACT_FLUSH_INTERVAL_MS / 1000,
+    ):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue)
+        self._collection: Optional[AsyncIOMotorCollection] = None
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = False
+        self._flush_hooks: List[FlushHook] = []
+        self._drop_hooks: List[FlushHook] = []
+        self.accepted = 0
+        self.rejected = 0
+        self.written = 0
+        self.duplicates = 0
+        self.batches = 0
+        self.failed = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    def start(self, collection: AsyncIOMotorCollection):
+        if self._task is None:
+            self._collection = collection
+            self._stopping = False
+            self._task = asyncio.create_task(self._run())
+            self._task.add_done_callback(self._on_done)
+
+    def _on_done(self, task: asyncio.Task):
+        if task.cancelled() or task.exception() is None:
+            return
+        # Not running any more, so the route stores messages directly instead of queueing them
+        if self._task is task:
+            self._task = None
+        logger.error(
+            "Batch writer stopped unexpectedly with %d documents queued",
+            self._queue.qsize(), exc_info=task.exception(),
+        )
+
+    async def stop(self):
+        """Stop accepting documents and wait until everything queued is written."""
+        if self._task is None:
+            return
+        self._stopping = True
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    def add_flush_hook(self, hook: FlushHook):
+        self._flush_hooks.append(hook)
+
+    def add_drop_hook(self, hook: FlushHook):
+        """Run `hook(documents)` for documents that could not be stored."""
+        self._drop_hooks.append(hook)
+
+    async def _run_hooks(self, hooks: List[FlushHook], documents: List[dict]):
+        if not documents:
+            return
+        for hook in hooks:
+            try:
+                await hook(documents)
+            except Exception:
+                # A failing hook must not fail the batch
+                logger.exception("Hook %r failed for %d documents", hook, len(documents))
+
+    async def _dropped(self, documents: List[dict]):
+        self.failed += len(documents)
+        await self._run_hooks(self._drop_hooks, documents)
+
+    def submit(self, document: dict) -> bool:
+        if self._stopping:
+            self.rejected += 1
+            return False
+        try:
+            self._queue.put_nowait(document)
+        except asyncio.QueueFull:
+            self.rejected += 1
+            return False
+        self.accepted += 1
+        return True
+
+    def _take(self, limit: int) -> List[dict]:
+        batch = []
+        while len(batch) < limit and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.flush_interval
+            while len(batch) < self.batch_size and _STOP not in batch:
+                batch.extend(self._take(self.batch_size - len(batch)))
+                remaining = deadline - loop.time()
+                if len(batch) >= self.batch_size or _STOP in batch or remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            if _STOP in batch:
+                stopping = True
+                batch.remove(_STOP)
+            await self._flush_safely(batch)
+
+        # Drain whatever was submitted before stop() flipped the flag
+        while not self._queue.empty():
+            await self._flush_safely(self._take(self.batch_size))
+
+    async def _flush_safely(self, batch: List[dict]):
+        try:
+            await self._flush(batch)
+        except Exception:
+            # Anything unexpected loses this batch, not the loop that drains the queue
+            logger.exception("Flushing %d documents failed", len(batch))
+            await self._dropped(batch)
+
+    async def _flush(self, batch: List[dict]):
+        if not batch:
+            return
+        for attempt in range(1, MAX_FLUSH_ATTEMPTS + 1):
+            try:
+                await self._collection.insert_many(batch, ordered=False)
+                self.written += len(batch)
+                self.batches += 1
+                await self._run_hooks(self._flush_hooks, batch)
+                return
+            except BulkWriteError as exc:
+                # Unordered: everything except the reported errors was inserted
+                errors = exc.details.get("writeErrors", [])
+                # Duplicate keys are documents that are already stored, not failures
+                duplicates = sum(1 for error in errors if error.get("code") == 11000)
+                inserted = exc.details.get("nInserted", 0)
+                self.written += inserted
+                self.duplicates += duplicates
+                self.batches += 1
+                if duplicates < len(errors):
+                    logger.error("Batch insert partially failed: %s", errors)
+                failed = {error["index"] for error in errors}
+                lost = {error["index"] for error in errors if error.get("code") != 11000}
+                await self._run_hooks(self._flush_hooks, [doc for index, doc in enumerate(batch) if index not in failed])
+                await self._dropped([doc for index, doc in enumerate(batch) if index in lost])
+                return
+            except PyMongoError as exc:
+                logger.warning("Batch insert attempt %d/%d failed: %s", attempt, MAX_FLUSH_ATTEMPTS, exc)
+                if attempt < MAX_FLUSH_ATTEMPTS:
+                    await asyncio.sleep(0.1 * 2 ** attempt)
+        logger.error("Dropped %d documents after %d failed insert attempts", len(batch), MAX_FLUSH_ATTEMPTS)
+        await self._dropped(batch)
+
+    def stats(self) -> dict:
+        return {
+            "running": self.running,
+            "queued": self._queue.qsize(),
+            "capacity": self._queue.maxsize,
+            "accepted": self.accepted,
+            "rejected": self.rejected,
+            "written": self.written,
+            "duplicates": self.duplicates,
+            "batches": self.batches,
+            "failed": self.failed,
+        }
+
+
+contact_writer = BatchWriter()
@@ -0,0 +1,282 @@
+"""
+Load test the API with a mix of public reads, contact posts and admin writes
+
+By default the FastAPI app runs in-process through httpx's ASGI transport
+(MongoDB from .env is still used); pass --url to drive a running server
+instead. Results are printed per route and saved as JSON so that runs from
+before and after a change can be compared.
+
+    python benchmark.py --concurrency 50 --duration 15
+    python benchmark.py --mix read=80,contact=10,admin=10 --compare benchmark_results/baseline.json
+    python benchmark.py --url http://localhost:8001 --password admin123
+
+Contact posts insert real messages (named "Benchmark") and admin writes
+create and then delete a project, so point it at a scratch database, or
+run with STORAGE_BACKEND=memory to benchmark without MongoDB at all.
+"""
+import os
+import sys
+import json
+import math
+import time
+import random
+import asyncio
+import logging
+import argparse
+import subprocess
+from contextlib import AsyncExitStack
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+RESULTS_DIR = Path(__file__).parent / "benchmark_results"
+
+PUBLIC_READS = [
+    "/api/portfolio",
+    "/api/personal-info",
+    "/api/projects",
+    "/api/work-experience",
+    "/api/testimonials",
+    "/api/skills",
+    "/api/approach",
+    "/api/metrics",
+    "/api/certifications",
+]
+
+DEFAULT_MIX = "read=90,contact=5,admin=5"
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    mix = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Unknown scenario: {name}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def percentile(sorted_values: List[float], fraction: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    # Rounded first so float noise (0.07 * 100 == 7.000000000000001) does not push the rank up
+    rank = max(1, math.ceil(round(fraction * len(sorted_values), 9)))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+class Recorder:
+    def __init__(self):
+        self.samples: Dict[str, List[float]] = {}
+        self.statuses: Dict[str, Dict[int, int]] = {}
+        self.recording = False
+
+    async def request(self, client: httpx.AsyncClient, route: str, method: str, url: str, **kwargs) -> Optional[httpx.Response]:
+        """Send one request and, once warm-up is over, record it under `route`."""
+        started = time.perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            status = response.status_code
+        except httpx.HTTPError:
+            response, status = None, 0
+        elapsed = time.perf_counter() - started
+        if self.recording:
+            self.samples.setdefault(route, []).append(elapsed)
+            counts = self.statuses.setdefault(route, {})
+            counts[status] = counts.get(status, 0) + 1
+        return response
+
+    def report(self, duration: float) -> dict:
+        routes = {}
+        for route, samples in sorted(self.samples.items()):
+            samples.sort()
+            statuses = self.statuses[route]
+            routes[route] = {
+                "requests": len(samples),
+                "errors": sum(count for status, count in statuses.items() if status == 0 or status >= 400),
+                "statuses": {str(status): count for status, count in sorted(statuses.items())},
+                "rps": round(len(samples) / duration, 2),
+                "p50_ms": round(percentile(samples, 0.50) * 1000, 3),
+                "p95_ms": round(percentile(samples, 0.95) * 1000, 3),
+                "p99_ms": round(percentile(samples, 0.99) * 1000, 3),
+                "max_ms": round(samples[-1] * 1000, 3),
+            }
+        total = sum(route["requests"] for route in routes.values())
+        return {
+            "total_requests": total,
+            "total_errors": sum(route["errors"] for route in routes.values()),
+            "rps": round(total / duration, 2),
+            "routes": routes,
+        }
+
+
+# Scenarios: one unit of work for a virtual user
+
+async def scenario_read(client, recorder, rng, auth):
+    path = rng.choice(PUBLIC_READS)
+    await recorder.request(client, f"GET {path}", "GET", path)
+
+
+async def scenario_contact(client, recorder, rng, auth):
+    message = {
+        "name": "Benchmark",
+        "email": "benchmark@example.com",
+        "projectType": "benchmark",
+        "message": f"Load test message {rng.random():.8f}",
+    }
+    await recorder.request(client, "POST /api/contact", "POST", "/api/contact", json=message)
+
+
+async def scenario_admin(client, recorder, rng, auth):
+    project = {
+        "title": "Benchmark project",
+        "description": "Created and deleted by benchmark.py",
+        "technologies": ["Python"],
+        "github": "https://example.com",
+    }
+    response = await recorder.request(client, "POST /api/projects", "POST", "/api/projects", json=project, headers=auth)
+    if response is not None and response.status_code == 200:
+        project_id = response.json()["_id"]
+        await recorder.request(
+            client, "DELETE /api/projects/{project_id}", "DELETE", f"/api/projects/{project_id}", headers=auth
+        )
+
+
+SCENARIOS = {
+    "read": scenario_read,
+    "contact": scenario_contact,
+    "admin": scenario_admin,
+}
+
+
+async def virtual_user(client, recorder, mix, seed, auth, deadline):
+    rng = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    while time.perf_counter() < deadline:
+        await SCENARIOS[rng.choices(names, weights)[0]](client, recorder, rng, auth)
+
+
+async def admin_headers(client: httpx.AsyncClient, password: Optional[str]) -> Dict[str, str]:
+    if password is None:
+        # In-process: mint a token directly instead of going through the rate-limited login
+        from auth import create_access_token
+        token = create_access_token({"admin": True})
+    else:
+        response = await client.post("/api/auth/login", json={"password": password})
+        response.raise_for_status()
+        token = response.json()["token"]
+    return {"Authorization": f"Bearer {token}"}
+
+
+def git_revision() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args) -> dict:
+    async with AsyncExitStack() as stack:
+        if args.url:
+            client = httpx.AsyncClient(base_url=args.url, timeout=30)
+        else:
+            from server import app
+            # httpx does not run the lifespan, so start the background workers ourselves
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            client = httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://benchmark", timeout=30)
+        client = await stack.enter_async_context(client)
+
+        auth = await admin_headers(client, args.password if args.url else None)
+        recorder = Recorder()
+
+        async def phase(seconds: float):
+            deadline = time.perf_counter() + seconds
+            await asyncio.gather(*(
+                virtual_user(client, recorder, args.mix, args.seed + index, auth, deadline)
+                for index in range(args.concurrency)
+            ))
+
+        if args.warmup > 0:
+            print(f"🔥 Warming up for {args.warmup:g}s...")
+            await phase(args.warmup)
+
+        print(f"🚀 Running {args.concurrency} virtual users for {args.duration:g}s...")
+        recorder.recording = True
+        started = time.perf_counter()
+        await phase(args.duration)
+        elapsed = time.perf_counter() - started
+
+    return {
+        "created_at": datetime.utcnow().isoformat() + "Z",
+        "revision": git_revision(),
+        "target": args.url or "in-process",
+        "concurrency": args.concurrency,
+        "duration_seconds": round(elapsed, 3),
+        "mix": args.mix,
+        **recorder.report(elapsed),
+    }
+
+
+def print_report(result: dict, baseline: Optional[dict] = None):
+    print(f"\n📊 {result['total_requests']} requests, {result['rps']} req/s, {result['total_errors']} errors\n")
+    header = f"{'route':<42} {'reqs':>7} {'err':>5} {'rps':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for route, stats in result["routes"].items():
+        print(
+            f"{route:<42} {stats['requests']:>7} {stats['errors']:>5} {stats['rps']:>9} "
+            f"{stats['p50_ms']:>9} {stats['p95_ms']:>9} {stats['p99_ms']:>9}"
+        )
+        previous = (baseline or {}).get("routes", {}).get(route)
+        if previous:
+            print(f"{'  vs baseline':<42} {'':>7} {'':>5} " + " ".join(
+                f"{_change(stats[key], previous[key]):>9}" for key in ("rps", "p50_ms", "p95_ms", "p99_ms")
+            ))
+
+
+def _change(current: float, previous: float) -> str:
+    if not previous:
+        return "n/a"
+    return f"{(current - previous) / previous * 100:+.1f}%"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", help="Benchmark a running server instead of the in-process app")
+    parser.add_argument("--password", default=os.getenv('ADMIN_PASSWORD', 'admin123'), help="Admin password for --url")
+    parser.add_argument("--concurrency", type=int, default=20, help="Virtual users")
+    parser.add_argument("--duration", type=float, default=10, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=2, help="Unmeasured seconds before the run")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"Scenario weights (default {DEFAULT_MIX})")
+    parser.add_argument("--seed", type=int, default=1, help="Random seed for the request mix")
+    parser.add_argument("--keep-rate-limits", action="store_true", help="Keep the contact/login rate limits in-process")
+    parser.add_argument("--output", type=Path, help="Where to save results (default benchmark_results/<timestamp>.json)")
+    parser.add_argument("--compare", type=Path, help="Earlier results file to compare against")
+    args = parser.parse_args()
+
+    if not args.url and not args.keep_rate_limits:
+        # Every in-process request comes from one client address and would be throttled
+        os.environ.setdefault('RATE_LIMIT_CONTACT_PER_IP', '1000000/second')
+        os.environ.setdefault('RATE_LIMIT_CONTACT_GLOBAL', '1000000/second')
+    sys.path.insert(0, str(Path(__file__).parent))
+    # httpx logs every request at INFO, which would drown the report
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    result = asyncio.run(run(args))
+    baseline = json.loads(args.compare.read_text()) if args.compare else None
+    print_report(result, baseline)
+
+    output = args.output or RESULTS_DIR / f"{datetime.utcnow():%Y%m%dT%H%M%S}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2))
+    print(f"\n💾 Results saved to {output}")
+
+
+if __name__ == "__main__":
+    main()
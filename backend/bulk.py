@@ -0,0 +1,83 @@
+from datetime import datetime
+from typing import List
+from bson import ObjectId
+from pydantic import BaseModel
+from pymongo import DeleteOne, InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+
+async def run_bulk(collection, upserts: List[BaseModel], deletes: List[str]) -> dict:
+    """Apply upserts and deletes with one unordered bulk_write.
+
+    Upserts without an `id` are inserted; upserts with one replace that
+    document's fields, creating it if it does not exist (reported as an
+    insert). Deletes of documents that do not exist fail with "Not found".
+    Returns aggregate counts plus one result per requested item, in request
+    order.
+    """
+    now = datetime.utcnow()
+    operations = []
+    # Position in `operations` -> index into `results`
+    op_results = []
+    results = []
+
+    for item in upserts:
+        fields = item.dict(exclude={"id"})
+        fields["updated_at"] = now
+        result = {"index": len(results), "action": "update", "id": item.id, "ok": True, "error": None}
+        if item.id is None:
+            document_id = ObjectId()
+            operations.append(InsertOne({"_id": document_id, **fields, "created_at": now}))
+            result["action"] = "insert"
+            result["id"] = str(document_id)
+        elif ObjectId.is_valid(item.id):
+            operations.append(UpdateOne(
+                {"_id": ObjectId(item.id)},
+                {"$set": fields, "$setOnInsert": {"created_at": now}},
+                upsert=True
+            ))
+        else:
+            result.update(ok=False, error="Invalid ID")
+            results.append(result)
+            continue
+        op_results.append(result["index"])
+        results.append(result)
+
+    # The bulk result only counts removals, so check which deletes have a target
+    valid_deletes = [ObjectId(document_id) for document_id in deletes if ObjectId.is_valid(document_id)]
+    existing = set()
+    if valid_deletes:
+        async for document in collection.find({"_id": {"$in": valid_deletes}}, {"_id": 1}):
+            existing.add(str(document["_id"]))
+
+    for document_id in deletes:
+        result = {"index": len(results), "action": "delete", "id": document_id, "ok": True, "error": None}
+        if not ObjectId.is_valid(document_id):
+            result.update(ok=False, error="Invalid ID")
+        elif str(ObjectId(document_id)) not in existing:
+            result.update(ok=False, error="Not found")
+        else:
+            operations.append(DeleteOne({"_id": ObjectId(document_id)}))
+            op_results.append(result["index"])
+        results.append(result)
+
+    counts = {"inserted": 0, "updated": 0, "deleted": 0}
+    if not operations:
+        return {**counts, "results": results}
+
+    try:
+        outcome = await collection.bulk_write(operations, ordered=False)
+        details = outcome.bulk_api_result
+    except BulkWriteError as exc:
+        details = exc.details
+        for error in details.get("writeErrors", []):
+            failed = results[op_results[error["index"]]]
+            failed.update(ok=False, error=error.get("errmsg", "Write failed"))
+
+    for upserted in details.get("upserted", []):
+        results[op_results[upserted["index"]]]["action"] = "insert"
+
+    counts["inserted"] = details.get("nInserted", 0) + details.get("nUpserted", 0)
+    counts["updated"] = details.get("nModified", 0)
+    counts["deleted"] = details.get("nRemoved", 0)
+    return {**counts, "results": results}
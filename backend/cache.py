@@ -0,0 +1,189 @@
+import os
+import time
+import asyncio
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Tuple
+
+CACHE_TTL_SECONDS = float(os.getenv('CACHE_TTL_SECONDS', '300'))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.getenv('RESPONSE_CACHE_MAX_ENTRIES', '256'))
+
+
+class TTLCache:
+    """Read-through in-memory cache with per-key expiry and explicit invalidation.
+
+    Cached values are shared between requests, so callers must treat them as
+    read-only.
+    """
+
+    def __init__(self, ttl: float = CACHE_TTL_SECONDS):
+        self.ttl = ttl
+        self._entries: Dict[str, Tuple[float, Any]] = {}
+        self._pending: Dict[str, asyncio.Future] = {}
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def get(self, key: str) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return False, None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]
+            return False, None
+        return True, value
+
+    def set(self, key: str, value: Any):
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, *keys: str):
+        """Drop the given keys, or everything when called without arguments."""
+        if not keys:
+            keys = tuple(self._entries)
+        for key in keys:
+            self._entries.pop(key, None)
+            # A load that started before the write must not repopulate the cache
+            self._pending.pop(key, None)
+        self.invalidations += 1
+
+    async def get_or_load(self, key: str, loader: Callable[[], Awaitable[Any]]):
+        found, value = self.get(key)
+        if found:
+            self.hits += 1
+            return value
+
+        # Concurrent misses for the same key share a single load
+        pending = self._pending.get(key)
+        if pending is not None:
+            self.hits += 1
+            try:
+                return await asyncio.shield(pending)
+            except asyncio.CancelledError:
+                if not pending.cancelled():
+                    raise
+                # The caller running the load was cancelled, not us; load it ourselves
+                return await self.get_or_load(key, loader)
+
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self._pending[key] = future
+        try:
+            value = await loader()
+        except Exception as exc:
+            future.set_exception(exc)
+            # Waiters re-raise; mark retrieved so an unawaited failure is not logged
+            future.exception()
+            raise
+        except BaseException:
+            # Cancelled (client gone, shutdown): release the waiters to retry
+            future.cancel()
+            raise
+        else:
+            if self._pending.get(key) is future:
+                self.set(key, value)
+            future.set_result(value)
+            return value
+        finally:
+            if self._pending.get(key) is future:
+                del self._pending[key]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "ttl_seconds": self.ttl,
+        }
+
+
+class CachedResponse:
+    """A fully encoded JSON body together with its HTTP validators.
+
+    `encoded` holds compressed variants of `body` by content coding, as
+    futures so concurrent first requests share one compression; they are
+    filled in on first request and live exactly as long as the entry does.
+    """
+
+    __slots__ = ("body", "etag", "last_modified", "headers", "encoded", "versions", "expires_at")
+
+    def __init__(
+        self,
+        body: bytes,
+        etag: str,
+        last_modified: Optional[datetime],
+        headers: Optional[Dict[str, str]] = None,
+    ):
+        self.body = body
+        self.etag = etag
+        self.last_modified = last_modified
+        self.headers = headers
+        self.encoded: Dict[str, asyncio.Future] = {}
+        self.versions: Tuple[int, ...] = ()
+        self.expires_at = 0.0
+
+
+class ResponseCache:
+    """Encoded response bodies keyed by endpoint, tied to collection versions.
+
+    Every admin write bumps the version of the collections it touched; an
+    entry built against older versions is treated as a miss and rebuilt.
+    """
+
+    def __init__(self, ttl: float = CACHE_TTL_SECONDS, max_entries: int = RESPONSE_CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def versions_for(self, collections: Iterable[str]) -> Tuple[int, ...]:
+        return tuple(self._versions.get(name, 0) for name in collections)
+
+    def get(self, key: str, versions: Tuple[int, ...]) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None or entry.versions != versions or entry.expires_at < time.monotonic():
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, versions: Tuple[int, ...], entry: CachedResponse):
+        entry.versions = versions
+        entry.expires_at = time.monotonic() + self.ttl
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def bump(self, *collections: str):
+        for name in collections:
+            self._versions[name] = self._versions.get(name, 0) + 1
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "versions": dict(self._versions),
+        }
+
+
+# Singleton content documents (skills, approach, metrics, ...) keyed by collection name
+content_cache = TTLCache()
+
+# Encoded public GET responses
+response_cache = ResponseCache()
+
+
+def invalidate_local(*collections: str):
+    """Drop this process's cached state for the given collections."""
+    content_cache.invalidate(*collections)
+    response_cache.bump(*collections)
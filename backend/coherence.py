@@ -0,0 +1,133 @@
+import os
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+from pymongo.errors import PyMongoError
+
+from cache import invalidate_local
+
+logger = logging.getLogger(__name__)
+
+# "auto" follows a change stream when the deployment supports one and falls
+# back to polling; "poll" always polls; "off" keeps invalidation process-local.
+CACHE_SYNC_MODE = os.getenv('CACHE_SYNC_MODE', 'auto')
+CACHE_SYNC_INTERVAL_SECONDS = float(os.getenv('CACHE_SYNC_INTERVAL_SECONDS', '1'))
+
+
+class CacheCoherence:
+    """Keeps the in-process caches of every worker consistent after admin writes.
+
+    Each content collection has a version counter in the `cache_versions`
+    collection. Writers increment it; every worker watches or polls those
+    counters and drops its local cached state when one moves, so a stale read
+    lasts at most one poll interval.
+    """
+
+    def __init__(self, mode: str = CACHE_SYNC_MODE, interval: float = CACHE_SYNC_INTERVAL_SECONDS):
+        self.mode = mode
+        self.interval = interval
+        self._seen: Dict[str, int] = {}
+        self._task: Optional[asyncio.Task] = None
+        self._refresh_hooks: List[Callable[[str], Awaitable[None]]] = []
+        self.remote_invalidations = 0
+
+    def add_refresh_hook(self, hook: Callable[[str], Awaitable[None]]):
+        """Run `hook(collection)` when another worker changes a collection,
+        before this worker's caches for it are invalidated."""
+        self._refresh_hooks.append(hook)
+
+    async def publish(self, db: AsyncIOMotorDatabase, *collections: str):
+        if self.mode == "off":
+            return
+        for name in collections:
+            doc = await db.cache_versions.find_one_and_update(
+                {"_id": name},
+                {"$inc": {"version": 1}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+            # Our own write is already reflected locally, but only if it is the
+            # sole change since the version we last applied; a skipped version
+            # is another worker's write, which sync() still has to apply here
+            if doc["version"] == self._seen.get(name, 0) + 1:
+                self._seen[name] = doc["version"]
+
+    async def _apply(self, name: str, version: int, initial: bool = False):
+        if self._seen.get(name) == version:
+            return
+        # Nothing is cached yet while the startup sync records the baseline
+        if not initial:
+            for hook in self._refresh_hooks:
+                try:
+                    await hook(name)
+                except Exception:
+                    # A failed refresh must not keep the stale caches alive
+                    logger.exception("Refresh hook %r failed for %s", hook, name)
+            invalidate_local(name)
+            self.remote_invalidations += 1
+        # Only now, so a version whose invalidation did not happen is retried on the next sync
+        self._seen[name] = version
+
+    async def sync(self, db: AsyncIOMotorDatabase, initial: bool = False):
+        async for doc in db.cache_versions.find({}):
+            await self._apply(doc["_id"], doc["version"], initial)
+
+    async def start(self, db: AsyncIOMotorDatabase):
+        if self.mode == "off" or self._task is not None:
+            return
+        await self.sync(db, initial=True)
+        self._task = asyncio.create_task(self._run(db))
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self, db: AsyncIOMotorDatabase):
+        if self.mode == "auto":
+            try:
+                await self._watch(db)
+            except PyMongoError as exc:
+                logger.info("Change streams unavailable (%s); polling cache versions every %ss", exc, self.interval)
+        await self._poll(db)
+
+    async def _watch(self, db: AsyncIOMotorDatabase):
+        async with db.cache_versions.watch(full_document="updateLookup") as stream:
+            # Catch anything written between the initial sync and the stream opening
+            await self.sync(db)
+            async for change in stream:
+                doc = change.get("fullDocument")
+                if doc:
+                    await self._apply(doc["_id"], doc["version"])
+
+    async def _poll(self, db: AsyncIOMotorDatabase):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.sync(db)
+            except PyMongoError as exc:
+                logger.warning("Cache version poll failed: %s", exc)
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode,
+            "interval_seconds": self.interval,
+            "versions": dict(self._seen),
+            "remote_invalidations": self.remote_invalidations,
+        }
+
+
+coherence = CacheCoherence()
+
+
+async def invalidate_collections(db: AsyncIOMotorDatabase, *collections: str):
+    """Called after every admin write: drop local cached state and tell the other workers."""
+    invalidate_local(*collections)
+    await coherence.publish(db, *collections)
@@ -0,0 +1,77 @@
+import os
+import time
+import hashlib
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+
+# Identical contact messages within this many seconds are stored once
+CONTACT_DEDUP_WINDOW_SECONDS = int(os.getenv('CONTACT_DEDUP_WINDOW_SECONDS', '600'))
+# Upper bound on remembered fingerprints (8 bytes of hash each)
+CONTACT_DEDUP_MAX_ENTRIES = int(os.getenv('CONTACT_DEDUP_MAX_ENTRIES', '100000'))
+
+_EPOCH = datetime(1970, 1, 1)
+
+
+def contact_content(name: str, email: str, message: str) -> bytes:
+    """The parts of a contact message that make it a duplicate, normalized."""
+    parts = (" ".join(value.split()).lower() for value in (name, email, message))
+    return "\x00".join(parts).encode()
+
+
+def content_hash(content: bytes, at: datetime, window: int = CONTACT_DEDUP_WINDOW_SECONDS) -> str:
+    """Hash of `content` and the dedup window `at` falls in, for the unique index.
+
+    Two identical messages on either side of a window boundary hash
+    differently; the in-memory filter covers that case within one worker.
+    """
+    bucket = int((at - _EPOCH).total_seconds() // window)
+    return hashlib.blake2b(content + b"|%d" % bucket, digest_size=16).hexdigest()
+
+
+class RecentContent:
+    """64-bit fingerprints of recently submitted content, forgotten after `window` seconds.
+
+    Catches double-clicks and client retries without a database round trip.
+    It is per process; the unique `content_hash` index catches duplicates
+    that reach different workers.
+    """
+
+    def __init__(self, window: int = CONTACT_DEDUP_WINDOW_SECONDS, max_entries: int = CONTACT_DEDUP_MAX_ENTRIES):
+        self.window = window
+        self.max_entries = max_entries
+        # Fingerprint -> when first seen, oldest first
+        self._seen: "OrderedDict[int, float]" = OrderedDict()
+        self.duplicates = 0
+
+    @staticmethod
+    def _fingerprint(content: bytes) -> int:
+        return int.from_bytes(hashlib.blake2b(content, digest_size=8).digest(), "big")
+
+    def _expire(self, now: float):
+        while self._seen:
+            fingerprint, seen_at = next(iter(self._seen.items()))
+            if now - seen_at < self.window and len(self._seen) <= self.max_entries:
+                break
+            del self._seen[fingerprint]
+
+    def check_and_add(self, content: bytes, now: Optional[float] = None) -> bool:
+        """Remember `content`; returns True if it was already seen within the window."""
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+        fingerprint = self._fingerprint(content)
+        if fingerprint in self._seen:
+            self.duplicates += 1
+            return True
+        self._seen[fingerprint] = now
+        return False
+
+    def discard(self, content: bytes):
+        """Forget `content`, e.g. when it could not be stored after all."""
+        self._seen.pop(self._fingerprint(content), None)
+
+    def stats(self) -> dict:
+        return {"window_seconds": self.window, "tracked": len(self._seen), "duplicates": self.duplicates}
+
+
+recent_contacts = RecentContent()
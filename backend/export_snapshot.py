@@ -0,0 +1,290 @@
+"""
+Export every public GET endpoint to static JSON files for the CDN
+
+Each response is written as <name>.<content hash>.json so it can be cached
+forever, and manifest.json maps API paths to the current files. Run it once
+to produce a full export; the server can keep it current by setting
+SNAPSHOT_EXPORT_DIR, which re-exports the affected endpoints after admin writes.
+
+    python export_snapshot.py --out ../frontend/build/api
+    python export_snapshot.py --out ../frontend/build/api --collections projects,skills
+"""
+import os
+import json
+import fcntl
+import asyncio
+import hashlib
+import logging
+import argparse
+import tempfile
+from datetime import datetime
+from pathlib import Path
+from typing import IO, Dict, Iterable, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_EXPORT_DIR = os.getenv('SNAPSHOT_EXPORT_DIR', '')
+# Writes arriving within this window are exported together
+SNAPSHOT_DEBOUNCE_MS = int(os.getenv('SNAPSHOT_DEBOUNCE_MS', '500'))
+
+MANIFEST_NAME = "manifest.json"
+# Serializes exports into one directory across every process writing to it
+LOCK_NAME = ".export.lock"
+# Held for its lifetime by the one worker that runs the export on boot
+BOOT_LOCK_NAME = ".boot.lock"
+
+# API path -> collections its response is built from
+PUBLIC_ENDPOINTS: Dict[str, Tuple[str, ...]] = {
+    "/api/personal-info": ("personal_info",),
+    "/api/projects": ("projects",),
+    "/api/work-experience": ("work_experience",),
+    "/api/testimonials": ("testimonials",),
+    "/api/skills": ("skills",),
+    "/api/approach": ("approach",),
+    "/api/metrics": ("dashboard_metrics",),
+    "/api/certifications": ("certifications",),
+    "/api/portfolio": (
+        "personal_info", "projects", "work_experience", "testimonials",
+        "skills", "approach", "dashboard_metrics", "certifications",
+    ),
+}
+
+
+async def render(app, path: str) -> Tuple[int, Dict[str, str], bytes]:
+    """Run a GET for `path` through the ASGI app in-process."""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"host", b"snapshot"), (b"accept", b"application/json")],
+        "client": ("127.0.0.1", 0),
+        "server": ("snapshot", 80),
+    }
+    response = {"status": 500, "headers": {}, "body": b""}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            response["status"] = message["status"]
+            response["headers"] = {
+                name.decode("latin-1").lower(): value.decode("latin-1")
+                for name, value in message.get("headers", [])
+            }
+        elif message["type"] == "http.response.body":
+            response["body"] += message.get("body", b"")
+
+    await app(scope, receive, send)
+    return response["status"], response["headers"], response["body"]
+
+
+def file_name(path: str, body: bytes) -> str:
+    slug = path.removeprefix("/api/").strip("/").replace("/", "_")
+    return f"{slug}.{hashlib.sha256(body).hexdigest()[:12]}.json"
+
+
+def _write_atomic(target: Path, data: bytes):
+    # A name of its own, so two processes writing the same target never share a temp file
+    descriptor, temporary = tempfile.mkstemp(dir=target.parent, prefix=f".{target.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(descriptor, "wb") as handle:
+            handle.write(data)
+        os.replace(temporary, target)
+    except BaseException:
+        Path(temporary).unlink(missing_ok=True)
+        raise
+
+
+def _lock_file(path: Path, blocking: bool = True) -> Optional[IO]:
+    """Take an exclusive lock on `path`; None if `blocking` is False and another process holds it.
+
+    The lock lasts until the returned handle is closed or the process exits.
+    """
+    handle = open(path, "a")
+    try:
+        fcntl.flock(handle, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        handle.close()
+        return None
+    return handle
+
+
+def _read_manifest(out_dir: Path) -> dict:
+    try:
+        return json.loads((out_dir / MANIFEST_NAME).read_text())
+    except (OSError, ValueError):
+        return {"endpoints": {}}
+
+
+class SnapshotExporter:
+    """Renders public endpoints into an output directory.
+
+    Files are immutable: a changed response gets a new name and the manifest
+    is replaced last, so a reader never sees a manifest pointing at a file
+    that is not there yet. Files referenced by neither the new nor the
+    previous manifest are removed.
+
+    Every worker of the server may export into the same directory, so an
+    export holds a file lock on it from reading the manifest to pruning.
+    """
+
+    def __init__(self, out_dir: str, app=None):
+        self.out_dir = Path(out_dir)
+        self._app = app
+        self._pending: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        self._boot_lock: Optional[IO] = None
+        self.exports = 0
+        self.failures = 0
+
+    @property
+    def app(self):
+        if self._app is None:
+            from server import app
+            self._app = app
+        return self._app
+
+    def endpoints_for(self, collections: Optional[Iterable[str]]) -> Dict[str, Tuple[str, ...]]:
+        if collections is None:
+            return dict(PUBLIC_ENDPOINTS)
+        changed = set(collections)
+        return {path: used for path, used in PUBLIC_ENDPOINTS.items() if changed.intersection(used)}
+
+    async def export(self, collections: Optional[Iterable[str]] = None) -> dict:
+        """Re-render the endpoints built from `collections` (all when None) and return the manifest."""
+        async with self._lock:
+            self.out_dir.mkdir(parents=True, exist_ok=True)
+            file_lock = await asyncio.to_thread(_lock_file, self.out_dir / LOCK_NAME)
+            try:
+                return await self._export(collections)
+            finally:
+                file_lock.close()
+
+    async def _export(self, collections: Optional[Iterable[str]]) -> dict:
+        previous = await asyncio.to_thread(_read_manifest, self.out_dir)
+        endpoints = dict(previous.get("endpoints", {}))
+
+        for path, used in self.endpoints_for(collections).items():
+            status, headers, body = await render(self.app, path)
+            if status != 200:
+                # e.g. personal info not created yet; clients fall back to the API
+                logger.warning("Snapshot of %s skipped: HTTP %d", path, status)
+                endpoints.pop(path, None)
+                continue
+            name = file_name(path, body)
+            target = self.out_dir / name
+            if not target.exists():
+                await asyncio.to_thread(_write_atomic, target, body)
+            endpoints[path] = {
+                "file": name,
+                "etag": headers.get("etag"),
+                "bytes": len(body),
+                "collections": list(used),
+            }
+
+        manifest = {
+            "generated_at": datetime.utcnow().isoformat() + "Z",
+            "endpoints": endpoints,
+        }
+        encoded = json.dumps(manifest, indent=2, sort_keys=True).encode()
+        await asyncio.to_thread(_write_atomic, self.out_dir / MANIFEST_NAME, encoded)
+        await asyncio.to_thread(self._prune, previous, manifest)
+        self.exports += 1
+        return manifest
+
+    def _prune(self, previous: dict, current: dict):
+        keep = {entry["file"] for entry in previous.get("endpoints", {}).values()}
+        keep.update(entry["file"] for entry in current["endpoints"].values())
+        for path in self.out_dir.glob("*.json"):
+            if path.name != MANIFEST_NAME and path.name not in keep:
+                path.unlink(missing_ok=True)
+
+    # Incremental export after admin writes
+
+    def claim_boot_export(self) -> bool:
+        """Whether this worker runs the catch-up export on boot.
+
+        Only the first worker to start gets the boot lock, and keeps it until
+        it exits, so the others skip a full export that would only repeat it.
+        """
+        if self._boot_lock is None:
+            self.out_dir.mkdir(parents=True, exist_ok=True)
+            self._boot_lock = _lock_file(self.out_dir / BOOT_LOCK_NAME, blocking=False)
+        return self._boot_lock is not None
+
+    def attach(self, repositories: Iterable):
+        for repository in repositories:
+            if repository.cacheable:
+                repository.add_write_hook(self._on_write)
+
+    async def _on_write(self, repository, event):
+        self.schedule(repository.name)
+
+    def schedule(self, *collections: str):
+        self._pending.update(collections)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def _run(self):
+        await asyncio.sleep(SNAPSHOT_DEBOUNCE_MS / 1000)
+        collections, self._pending = self._pending, set()
+        self._task = None
+        try:
+            await self.export(collections)
+        except Exception:
+            self.failures += 1
+            logger.exception("Snapshot export of %s failed", ", ".join(sorted(collections)))
+
+    async def stop(self):
+        """Wait for a scheduled export so shutdown does not lose the last write."""
+        if self._task is not None:
+            await self._task
+        # An export that already started holds the lock until it is done
+        async with self._lock:
+            pass
+        if self._boot_lock is not None:
+            self._boot_lock.close()
+            self._boot_lock = None
+
+    def stats(self) -> dict:
+        return {
+            "out_dir": str(self.out_dir),
+            "exports": self.exports,
+            "failures": self.failures,
+            "pending": sorted(self._pending),
+        }
+
+
+# Set up by the server when SNAPSHOT_EXPORT_DIR is configured
+snapshot_exporter = SnapshotExporter(SNAPSHOT_EXPORT_DIR) if SNAPSHOT_EXPORT_DIR else None
+
+
+async def export_snapshot(out_dir: str, collections: Optional[Iterable[str]] = None):
+    from server import app, storage
+
+    print(f"📦 Exporting snapshot to {out_dir}...")
+    manifest = await SnapshotExporter(out_dir, app).export(collections)
+    for path, entry in sorted(manifest["endpoints"].items()):
+        print(f"✓ {path} -> {entry['file']} ({entry['bytes']} bytes)")
+    print(f"\n✅ Manifest written to {Path(out_dir) / MANIFEST_NAME}")
+    storage.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--out", default=SNAPSHOT_EXPORT_DIR or "snapshot", help="Output directory")
+    parser.add_argument(
+        "--collections",
+        help="Comma-separated collections that changed; only endpoints built from them are re-exported",
+    )
+    args = parser.parse_args()
+    changed = [name.strip() for name in args.collections.split(",")] if args.collections else None
+    asyncio.run(export_snapshot(args.out, changed))
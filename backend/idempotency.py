@@ -0,0 +1,214 @@
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from typing import List, Optional, Sequence, Tuple
+from pymongo import IndexModel
+from pymongo.errors import DuplicateKeyError, PyMongoError
+
+from models import IdempotencyRecord
+from repository import Repository
+
+logger = logging.getLogger(__name__)
+
+# How long a completed request's response is replayed for
+IDEMPOTENCY_TTL_SECONDS = int(os.getenv('IDEMPOTENCY_TTL_SECONDS', '3600'))
+# A claim still pending after this long belongs to a request that died; it may be taken over
+IDEMPOTENCY_PENDING_TIMEOUT_SECONDS = int(os.getenv('IDEMPOTENCY_PENDING_TIMEOUT_SECONDS', '60'))
+
+MAX_KEY_LENGTH = 255
+
+# Headers recomputed or added by the outer middleware on every response
+_UNSTORED_HEADERS = {b"content-length", b"date", b"server"}
+
+# Paths whose responses must never be replayed to someone else holding the key
+IDEMPOTENCY_EXCLUDED_PATHS = ("/api/auth/login",)
+
+
+repository = Repository(
+    "idempotency_keys",
+    IdempotencyRecord,
+    indexes=[
+        # Lets the storage drop expired keys; expiry is also checked on read, as the reaper runs once a minute
+        IndexModel([("created_at", 1)], name="created_at_ttl", expireAfterSeconds=IDEMPOTENCY_TTL_SECONDS),
+    ],
+    cacheable=False,
+    timestamps=False,
+)
+
+
+class IdempotencyStore:
+    """Claims Idempotency-Keys and keeps the responses of the requests that made them.
+
+    The first request with a key inserts a pending record under the key's
+    `_id`; the unique `_id` makes the claim atomic across workers. On success
+    the response is stored on the record, otherwise the claim is released so
+    the client can retry.
+    """
+
+    def __init__(self, ttl: int = IDEMPOTENCY_TTL_SECONDS, pending_timeout: int = IDEMPOTENCY_PENDING_TIMEOUT_SECONDS):
+        self.ttl = timedelta(seconds=ttl)
+        self.pending_timeout = timedelta(seconds=pending_timeout)
+        self.stored = 0
+        self.replayed = 0
+        self.conflicts = 0
+
+    def _expired(self, record: dict, now: datetime) -> bool:
+        lifetime = self.ttl if record.get("state") == "done" else self.pending_timeout
+        return record["created_at"] <= now - lifetime
+
+    async def claim(self, record_id: str, fingerprint: str) -> Optional[dict]:
+        """Claim `record_id`; returns None when claimed, else the live record holding it."""
+        collection = repository.collection
+        for _ in range(2):
+            now = datetime.utcnow()
+            try:
+                await collection.insert_one({"_id": record_id, "fingerprint": fingerprint, "state": "pending", "created_at": now})
+                return None
+            except DuplicateKeyError:
+                existing = await collection.find_one({"_id": record_id})
+            if existing is not None and not self._expired(existing, now):
+                return existing
+            if existing is not None:
+                # Only remove the record we judged expired, not one claimed meanwhile
+                await collection.delete_one({"_id": record_id, "created_at": existing["created_at"]})
+        return await collection.find_one({"_id": record_id})
+
+    async def complete(self, record_id: str, status: int, headers: List[Tuple[str, str]], body: bytes):
+        await repository.collection.update_one(
+            {"_id": record_id},
+            {"$set": {"state": "done", "status": status, "headers": headers, "body": body, "created_at": datetime.utcnow()}},
+        )
+        self.stored += 1
+
+    async def release(self, record_id: str):
+        await repository.collection.delete_one({"_id": record_id, "state": "pending"})
+
+    def stats(self) -> dict:
+        return {"stored": self.stored, "replayed": self.replayed, "conflicts": self.conflicts}
+
+
+idempotency_store = IdempotencyStore()
+
+
+def _header(scope, name: bytes) -> Optional[bytes]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value
+    return None
+
+
+async def _read_body(receive) -> Tuple[bytes, list]:
+    """Drain the request body, returning it and the messages to hand on to the app."""
+    chunks, messages = [], []
+    while True:
+        message = await receive()
+        messages.append(message)
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks), messages
+
+
+class IdempotencyMiddleware:
+    """Makes POSTs carrying an `Idempotency-Key` header safe to retry.
+
+    A retry with the same key, path and credentials gets the stored response
+    back with `Idempotent-Replayed: true`, and the route does not run
+    again. The same key used with a different body gets 422. A retry that
+    arrives while the first request is still running gets 409. Only 2xx
+    responses are stored; anything else frees the key for the next attempt.
+    If the store is unreachable the request goes through unprotected.
+    """
+
+    def __init__(self, app, methods: Sequence[str] = ("POST",), excluded_paths: Sequence[str] = IDEMPOTENCY_EXCLUDED_PATHS):
+        self.app = app
+        self.methods = set(methods)
+        self.excluded_paths = set(excluded_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] not in self.methods or scope["path"].rstrip("/") in self.excluded_paths:
+            return await self.app(scope, receive, send)
+        key = _header(scope, b"idempotency-key")
+        if key is None:
+            return await self.app(scope, receive, send)
+        key = key.strip()
+        if not key or len(key) > MAX_KEY_LENGTH:
+            return await self._reject(send, 400, f"Idempotency-Key must be 1 to {MAX_KEY_LENGTH} characters")
+
+        body, messages = await _read_body(receive)
+
+        async def replay_receive():
+            return messages.pop(0) if messages else await receive()
+
+        # Keys are scoped to the endpoint and the caller's credentials
+        record_id = hashlib.sha256(b"\n".join(
+            (scope["method"].encode(), scope["path"].encode(), _header(scope, b"authorization") or b"", key)
+        )).hexdigest()
+        fingerprint = hashlib.sha256(scope.get("query_string", b"") + b"\n" + body).hexdigest()
+
+        try:
+            existing = await idempotency_store.claim(record_id, fingerprint)
+        except PyMongoError as exc:
+            logger.warning("Idempotency store unavailable, handling request without it: %s", exc)
+            return await self.app(scope, replay_receive, send)
+
+        if existing is not None:
+            if existing["fingerprint"] != fingerprint:
+                idempotency_store.conflicts += 1
+                return await self._reject(send, 422, "Idempotency-Key was already used for a different request")
+            if existing["state"] != "done":
+                idempotency_store.conflicts += 1
+                return await self._reject(send, 409, "A request with this Idempotency-Key is still being processed", retry_after=1)
+            idempotency_store.replayed += 1
+            return await self._replay(send, existing)
+
+        status, headers, chunks = 500, [], []
+
+        async def capture(message):
+            nonlocal status, headers
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = [
+                    (name.decode("latin-1"), value.decode("latin-1"))
+                    for name, value in message.get("headers", [])
+                    if name.lower() not in _UNSTORED_HEADERS
+                ]
+            elif message["type"] == "http.response.body":
+                chunks.append(message.get("body", b""))
+            await send(message)
+
+        completed = False
+        try:
+            await self.app(scope, replay_receive, capture)
+            completed = True
+        finally:
+            try:
+                if completed and 200 <= status < 300:
+                    await idempotency_store.complete(record_id, status, headers, b"".join(chunks))
+                else:
+                    await idempotency_store.release(record_id)
+            except PyMongoError as exc:
+                # The response was sent; at worst the key stays pending until it times out
+                logger.error("Could not record the outcome of idempotent request: %s", exc)
+
+    async def _replay(self, send, record: dict):
+        body = bytes(record.get("body") or b"")
+        headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in record.get("headers", [])]
+        headers += [(b"content-length", str(len(body)).encode()), (b"idempotent-replayed", b"true")]
+        await send({"type": "http.response.start", "status": record["status"], "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def _reject(self, send, status: int, detail: str, retry_after: Optional[int] = None):
+        body = json.dumps({"detail": detail}).encode()
+        headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+        ]
+        if retry_after is not None:
+            headers.append((b"retry-after", str(retry_after).encode()))
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
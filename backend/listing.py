@@ -0,0 +1,94 @@
+from fastapi import HTTPException
+from pydantic import BaseModel
+from bson import ObjectId
+from typing import Dict, List, Optional, Type
+
+def parse_fields(fields: Optional[str], model: Type[BaseModel]) -> Optional[List[str]]:
+    """Validate a comma-separated `fields=` value against the model's fields."""
+    if not fields:
+        return None
+
+    selected = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in selected if name not in model.model_fields]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return selected
+
+
+def parse_after(after: Optional[str]) -> Optional[ObjectId]:
+    if after is None:
+        return None
+    if not ObjectId.is_valid(after):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return ObjectId(after)
+
+
+def select_fields(documents: list, fields: List[str]) -> list:
+    return [
+        {"_id": doc["_id"], **{name: doc[name] for name in fields if name in doc}}
+        for doc in documents
+    ]
+
+
+def content_filter(technology: Optional[str] = None, featured: Optional[bool] = None) -> Dict[str, object]:
+    """Build the Mongo filter for `technology=` (comma-separated, all must match) and `featured=`.
+
+    Technologies match exactly, as listed by the facet endpoints, so the
+    multikey `technologies` index can serve the query.
+    """
+    query: Dict[str, object] = {}
+    technologies = sorted({name.strip() for name in (technology or "").split(",") if name.strip()})
+    if len(technologies) == 1:
+        query["technologies"] = technologies[0]
+    elif technologies:
+        query["technologies"] = {"$all": technologies}
+    if featured is not None:
+        query["featured"] = featured
+    return query
+
+
+def filter_cache_key(query: Dict[str, object]) -> str:
+    technologies = query.get("technologies")
+    if isinstance(technologies, dict):
+        technologies = ",".join(technologies["$all"])
+    featured = query.get("featured")
+    return f"technology={technologies or ''}&featured={'' if featured is None else str(featured).lower()}"
+
+
+def page_cache_key(
+    prefix: str,
+    fields: Optional[List[str]],
+    limit: Optional[int],
+    after: Optional[ObjectId],
+    query: Optional[Dict[str, object]] = None,
+) -> str:
+    key = f"{prefix}?fields={','.join(fields or [])}&limit={limit or ''}&after={after or ''}"
+    return f"{key}&{filter_cache_key(query)}" if query else key
+
+
+def technology_facet_pipeline(query: Dict[str, object], facets: Optional[Dict[str, list]] = None) -> List[dict]:
+    """One aggregation returning per-technology counts, the total and any extra `facets`.
+
+    The `validators` facet carries each matching document's `_id` and
+    `updated_at` so the response can be given an ETag in the same round trip.
+    """
+    stages = {
+        "technologies": [
+            {"$unwind": "$technologies"},
+            {"$group": {"_id": "$technologies", "count": {"$sum": 1}}},
+            {"$sort": {"count": -1, "_id": 1}},
+        ],
+        "total": [{"$count": "count"}],
+        "validators": [{"$project": {"updated_at": 1}}],
+        **(facets or {}),
+    }
+    return ([{"$match": query}] if query else []) + [{"$facet": stages}]
+
+
+def facet_count(result: dict, name: str) -> int:
+    """Read a `$count` facet, which is empty rather than zero when nothing matched."""
+    return result[name][0]["count"] if result[name] else 0
+
+
+def technology_counts(result: dict) -> List[dict]:
+    return [{"technology": group["_id"], "count": group["count"]} for group in result["technologies"]]
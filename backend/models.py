@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Tuple
 from datetime import datetime
 import uuid
 
@@ -53,6 +53,22 @@ class ProjectResponse(Project):
     class Config:
         populate_by_name = True
 
+class ProjectPartialResponse(BaseModel):
+    """A project restricted to the fields requested with `fields=`."""
+    id: str = Field(alias="_id")
+    title: Optional[str] = None
+    description: Optional[str] = None
+    technologies: Optional[List[str]] = None
+    github: Optional[str] = None
+    demo: Optional[str] = None
+    featured: Optional[bool] = None
+    metrics: Optional[List[ProjectMetric]] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        populate_by_name = True
+
 # Work Experience Models
 class WorkExperience(BaseModel):
     title: str
@@ -76,6 +92,20 @@ class WorkExperienceResponse(WorkExperience):
     class Config:
         populate_by_name = True
 
+class WorkExperiencePartialResponse(BaseModel):
+    """A work experience entry restricted to the fields requested with `fields=`."""
+    id: str = Field(alias="_id")
+    title: Optional[str] = None
+    company: Optional[str] = None
+    period: Optional[str] = None
+    description: Optional[str] = None
+    technologies: Optional[List[str]] = None
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        populate_by_name = True
+
 # Testimonial Models
 class Testimonial(BaseModel):
     name: str
@@ -99,6 +129,20 @@ class TestimonialResponse(Testimonial):
     class Config:
         populate_by_name = True
 
+class TestimonialPartialResponse(BaseModel):
+    """A testimonial restricted to the fields requested with `fields=`."""
+    id: str = Field(alias="_id")
+    name: Optional[str] = None
+    position: Optional[str] = None
+    company: Optional[str] = None
+    content: Optional[str] = None
+    rating: Optional[int] = Field(None, ge=1, le=5)
+    created_at: Optional[datetime] = None
+    updated_at: Optional[datetime] = None
+
+    class Config:
+        populate_by_name = True
+
 # Skills Models
 class Skill(BaseModel):
     name: str
@@ -169,6 +213,15 @@ class ContactMessageResponse(ContactMessage):
     class Config:
         populate_by_name = True
 
+class ContactMessageFilter(BaseModel):
+    read: Optional[bool] = None
+    older_than: Optional[datetime] = None
+    projectType: Optional[str] = None
+
+class ContactBulkRequest(BaseModel):
+    ids: Optional[List[str]] = Field(None, max_length=1000)
+    filter: Optional[ContactMessageFilter] = None
+
 # Auth Models
 class LoginRequest(BaseModel):
     password: str
@@ -179,3 +232,111 @@ class LoginResponse(BaseModel):
 
 class VerifyResponse(BaseModel):
     valid: bool
+
+# Bulk Write Models
+MAX_BULK_ITEMS = 1000
+
+class ProjectUpsert(ProjectCreate):
+    id: Optional[str] = None
+
+class WorkExperienceUpsert(WorkExperienceCreate):
+    id: Optional[str] = None
+
+class TestimonialUpsert(TestimonialCreate):
+    id: Optional[str] = None
+
+class ProjectBulkRequest(BaseModel):
+    upserts: List[ProjectUpsert] = Field(default_factory=list, max_length=MAX_BULK_ITEMS)
+    deletes: List[str] = Field(default_factory=list, max_length=MAX_BULK_ITEMS)
+
+class WorkExperienceBulkRequest(BaseModel):
+    upserts: List[WorkExperienceUpsert] = Field(default_factory=list, max_length=MAX_BULK_ITEMS)
+    deletes: List[str] = Field(default_factory=list, max_length=MAX_BULK_ITEMS)
+
+class TestimonialBulkRequest(BaseModel):
+    upserts: List[TestimonialUpsert] = Field(default_factory=list, max_length=MAX_BULK_ITEMS)
+    deletes: List[str] = Field(default_factory=list, max_length=MAX_BULK_ITEMS)
+
+class BulkItemResult(BaseModel):
+    index: int
+    action: str
+    id: Optional[str] = None
+    ok: bool
+    error: Optional[str] = None
+
+class BulkWriteResponse(BaseModel):
+    inserted: int
+    updated: int
+    deleted: int
+    results: List[BulkItemResult]
+
+# Portfolio Snapshot Models
+class PortfolioSnapshot(BaseModel):
+    personal_info: Optional[PersonalInfoResponse] = None
+    projects: Optional[List[ProjectResponse]] = None
+    work_experience: Optional[List[WorkExperienceResponse]] = None
+    testimonials: Optional[List[TestimonialResponse]] = None
+    skills: Optional[List[Skill]] = None
+    approach: Optional[List[ApproachItem]] = None
+    metrics: Optional[DashboardMetricsDocument] = None
+    certifications: Optional[CertificationsDocument] = None
+
+# Facet Models
+class TechnologyCount(BaseModel):
+    technology: str
+    count: int
+
+class WorkExperienceFacets(BaseModel):
+    total: int
+    technologies: List[TechnologyCount]
+
+class ProjectFacets(WorkExperienceFacets):
+    featured: int
+
+# Analytics Models
+class ContactRollupBucket(BaseModel):
+    key: str
+    count: int
+    unread: int
+
+class ContactAnalytics(BaseModel):
+    total: int
+    unread: int
+    # Newest day first, UTC
+    per_day: List[ContactRollupBucket]
+    by_project_type: List[ContactRollupBucket]
+
+class TestimonialAnalytics(BaseModel):
+    total: int
+    average_rating: Optional[float] = None
+    # Rating ("1".."5") -> number of testimonials
+    rating_histogram: Dict[str, int]
+
+class AnalyticsResponse(BaseModel):
+    contact_messages: ContactAnalytics
+    testimonials: TestimonialAnalytics
+
+# Idempotency Models
+class IdempotencyRecord(BaseModel):
+    """A claimed Idempotency-Key and, once its request succeeded, the response."""
+    fingerprint: str
+    state: str
+    status: Optional[int] = None
+    headers: List[Tuple[str, str]] = []
+    body: Optional[bytes] = None
+    created_at: datetime
+
+# Search Models
+class SearchHit(BaseModel):
+    collection: str
+    id: str
+    title: str
+    score: float
+    # Field path (e.g. "technologies.1") -> [start, end) character offsets
+    highlights: Dict[str, List[Tuple[int, int]]]
+    document: Dict[str, Any]
+
+class SearchResponse(BaseModel):
+    query: str
+    total: int
+    results: List[SearchHit]
@@ -0,0 +1,306 @@
+import time
+import math
+import asyncio
+import threading
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+from pymongo import monitoring
+
+# Seconds; HTTP requests and Mongo commands live on different scales
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+LOOP_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0)
+
+# How often the event loop lag probe wakes up
+LOOP_LAG_INTERVAL = 0.5
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """Base for metrics rendered in the Prometheus text exposition format.
+
+    Motor runs pymongo, and so the command listener, on worker threads, hence the lock.
+    """
+
+    type = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}", *self.samples()]
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: str, amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labels, key)} {_format_value(value)}" for key, value in values]
+
+
+class Gauge(Counter):
+    type = "gauge"
+
+    def dec(self, *labels: str, amount: float = 1):
+        self.inc(*labels, amount=-amount)
+
+
+class CallbackGauge(Metric):
+    """A gauge whose value is read from `source` at scrape time."""
+
+    type = "gauge"
+
+    def __init__(self, name: str, help: str, source: Callable[[], float]):
+        super().__init__(name, help)
+        self.source = source
+
+    def samples(self) -> List[str]:
+        return [f"{self.name} {_format_value(self.source())}"]
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = REQUEST_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+        # label values -> (per-bucket counts, sum)
+        self._series: Dict[Tuple[str, ...], Tuple[List[int], List[float]]] = {}
+
+    def observe(self, value: float, *labels: str):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = ([0] * len(self.buckets), [0.0])
+            counts, total = series
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[index] += 1
+                    break
+            total[0] += value
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            series = [(key, list(counts), total[0]) for key, (counts, total) in self._series.items()]
+        lines = []
+        for key, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets, counts):
+                cumulative += count
+                labels = _format_labels(self.labels, key, f'le="{_format_value(bound)}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+REGISTRY: List[Metric] = []
+
+
+def render_metrics() -> str:
+    lines = []
+    for metric in REGISTRY:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+http_requests = Counter(
+    "http_requests_total", "HTTP requests by method, route template and status", ("method", "route", "status")
+)
+http_in_flight = Gauge("http_requests_in_flight", "HTTP requests currently being handled")
+http_latency = Histogram(
+    "http_request_duration_seconds", "HTTP request latency by method, route template and status",
+    ("method", "route", "status"),
+)
+response_encode_latency = Histogram(
+    "response_encode_duration_seconds", "Time spent validating and encoding cached responses",
+    ("resource",), buckets=MONGO_BUCKETS,
+)
+mongo_latency = Histogram(
+    "mongo_command_duration_seconds", "MongoDB command round-trip time by command and outcome",
+    ("command", "outcome"), buckets=MONGO_BUCKETS,
+)
+loop_lag = Histogram(
+    "event_loop_lag_seconds", "How late the event loop runs a timer that should fire immediately",
+    buckets=LOOP_LAG_BUCKETS,
+)
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    """Tracks connection pool usage across all servers the client talks to."""
+
+    def __init__(self):
+        self.open_connections = 0
+        self.checked_out = 0
+        self.connections_created = 0
+        self.connections_closed = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.pool_clears = 0
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self.pool_clears += 1
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        self.open_connections += 1
+        self.connections_created += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self.open_connections -= 1
+        self.connections_closed += 1
+
+    def connection_check_out_started(self, event):
+        pass
+
+    def connection_check_out_failed(self, event):
+        self.checkout_failures += 1
+
+    def connection_checked_out(self, event):
+        self.checked_out += 1
+        self.checkouts += 1
+
+    def connection_checked_in(self, event):
+        self.checked_out -= 1
+
+    def stats(self) -> dict:
+        return {
+            "open_connections": self.open_connections,
+            "in_use": self.checked_out,
+            "idle": self.open_connections - self.checked_out,
+            "connections_created": self.connections_created,
+            "connections_closed": self.connections_closed,
+            "checkouts": self.checkouts,
+            "checkout_failures": self.checkout_failures,
+            "pool_clears": self.pool_clears,
+        }
+
+
+class CommandMonitor(monitoring.CommandListener):
+    """Records the duration of every command the client sends to MongoDB."""
+
+    def started(self, event):
+        pass
+
+    def succeeded(self, event):
+        mongo_latency.observe(event.duration_micros / 1_000_000, event.command_name, "success")
+
+    def failed(self, event):
+        mongo_latency.observe(event.duration_micros / 1_000_000, event.command_name, "failure")
+
+
+class MetricsMiddleware:
+    """ASGI middleware counting and timing HTTP requests.
+
+    Requests are labelled by route template (e.g. /api/projects/{project_id})
+    rather than raw path, so ids cannot blow up the number of series.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        http_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_in_flight.dec()
+            # The router records the matched route on the shared scope
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            labels = (scope["method"], template, str(status))
+            http_requests.inc(*labels)
+            http_latency.observe(elapsed, *labels)
+
+
+class LoopLagMonitor:
+    """Measures event loop lag by timing how late a periodic sleep wakes up."""
+
+    def __init__(self, interval: float = LOOP_LAG_INTERVAL):
+        self.interval = interval
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            loop_lag.observe(max(0.0, loop.time() - expected))
+
+
+pool_monitor = PoolMonitor()
+command_monitor = CommandMonitor()
+loop_lag_monitor = LoopLagMonitor()
+
+CallbackGauge("mongo_pool_open_connections", "Open connections across all pools", lambda: pool_monitor.open_connections)
+CallbackGauge("mongo_pool_in_use_connections", "Connections currently checked out", lambda: pool_monitor.checked_out)
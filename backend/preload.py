@@ -0,0 +1,137 @@
+import os
+import asyncio
+import logging
+from datetime import datetime
+from types import MappingProxyType
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+from pymongo.errors import PyMongoError
+
+from cache import invalidate_local
+from coherence import coherence
+from storage import aggregate, project, select
+
+logger = logging.getLogger(__name__)
+
+# Keep every public collection in memory and never read it from storage per request
+PRELOAD_CONTENT = os.getenv('PRELOAD_CONTENT', 'false').lower() == 'true'
+# How often to retry collections whose refresh failed
+PRELOAD_RETRY_SECONDS = float(os.getenv('PRELOAD_RETRY_SECONDS', '5'))
+
+
+class ResidentContent:
+    """An in-memory snapshot of the public collections, swapped whole on change.
+
+    The snapshot is a read-only mapping of collection name to a tuple of
+    documents. A refresh builds a new mapping and replaces the reference in
+    one assignment, so a read sees either the old or the new snapshot, never
+    a mix. Reads get shallow copies and must not mutate nested values.
+
+    When a refresh fails the previous documents keep being served and the
+    collection is retried in the background, so reads survive storage outages.
+    """
+
+    def __init__(self, enabled: bool = PRELOAD_CONTENT, retry_interval: float = PRELOAD_RETRY_SECONDS):
+        self.enabled = enabled
+        self.retry_interval = retry_interval
+        self._snapshot: Mapping[str, Tuple[dict, ...]] = MappingProxyType({})
+        self._sources: Dict[str, object] = {}
+        self._stale: Set[str] = set()
+        # Refreshes can overlap; only the most recently started one may swap
+        self._started: Dict[str, int] = {}
+        self._applied: Dict[str, int] = {}
+        self._retry_task: Optional[asyncio.Task] = None
+        self.loaded_at: Optional[datetime] = None
+        self.swaps = 0
+        self.refresh_failures = 0
+
+    def find(
+        self,
+        name: str,
+        query: Optional[dict] = None,
+        sort: Sequence[Tuple[str, int]] = (),
+        limit: int = 0,
+        projection: Optional[dict] = None,
+    ) -> Optional[List[dict]]:
+        """Matching resident documents, or None when `name` is not resident."""
+        documents = self._snapshot.get(name)
+        if documents is None:
+            return None
+        return [project(doc, projection, deep=False) for doc in select(documents, query, sort, 0, limit)]
+
+    def aggregate(self, name: str, pipeline: Sequence[dict]) -> Optional[List[dict]]:
+        """Run `pipeline` over the resident documents, or None when `name` is not resident."""
+        documents = self._snapshot.get(name)
+        if documents is None:
+            return None
+        return aggregate(documents, pipeline)
+
+    async def _fetch(self, name: str) -> Tuple[dict, ...]:
+        return tuple(await self._sources[name].collection.find({}).to_list(None))
+
+    def _swap(self, updates: Dict[str, Tuple[dict, ...]]):
+        self._snapshot = MappingProxyType({**self._snapshot, **updates})
+        self.swaps += 1
+
+    async def load(self, repositories: Iterable):
+        """Load every given repository's collection; called once on boot."""
+        if not self.enabled:
+            return
+        self._sources = {repository.name: repository for repository in repositories}
+        names = list(self._sources)
+        documents = await asyncio.gather(*(self._fetch(name) for name in names))
+        self._swap(dict(zip(names, documents)))
+        self.loaded_at = datetime.utcnow()
+        coherence.add_refresh_hook(self.refresh)
+        logger.info("Preloaded %d documents from %d collections", sum(map(len, documents)), len(names))
+
+    async def refresh(self, name: str):
+        """Re-read one collection and swap it in; must run before its caches are invalidated."""
+        if name not in self._snapshot:
+            return
+        ticket = self._started[name] = self._started.get(name, 0) + 1
+        try:
+            documents = await self._fetch(name)
+        except PyMongoError as exc:
+            self.refresh_failures += 1
+            self._stale.add(name)
+            logger.warning("Refreshing preloaded %s failed, serving previous data: %s", name, exc)
+            if self._retry_task is None:
+                self._retry_task = asyncio.create_task(self._retry())
+            return
+        if ticket < self._applied.get(name, 0):
+            return
+        self._applied[name] = ticket
+        self._stale.discard(name)
+        self._swap({name: documents})
+
+    async def _retry(self):
+        try:
+            while self._stale:
+                await asyncio.sleep(self.retry_interval)
+                for name in list(self._stale):
+                    await self.refresh(name)
+                    if name not in self._stale:
+                        invalidate_local(name)
+        finally:
+            self._retry_task = None
+
+    async def stop(self):
+        if self._retry_task is not None:
+            self._retry_task.cancel()
+            try:
+                await self._retry_task
+            except asyncio.CancelledError:
+                pass
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "loaded_at": self.loaded_at,
+            "collections": {name: len(documents) for name, documents in self._snapshot.items()},
+            "swaps": self.swaps,
+            "refresh_failures": self.refresh_failures,
+            "stale": sorted(self._stale),
+        }
+
+
+resident_content = ResidentContent()
@@ -0,0 +1,207 @@
+import os
+import io
+import json
+import time
+import uuid
+import pstats
+import asyncio
+import cProfile
+import marshal
+from collections import OrderedDict
+from contextvars import ContextVar
+from datetime import datetime
+from typing import List, Optional
+from urllib.parse import parse_qs
+from fastapi import HTTPException
+from fastapi.security import HTTPAuthorizationCredentials
+from auth import verify_token
+
+# Profiles kept in memory for later retrieval, oldest evicted first
+PROFILE_HISTORY = int(os.getenv('PROFILE_HISTORY', '20'))
+# Functions listed in the JSON form of a profile
+PROFILE_TOP_FUNCTIONS = 40
+PROFILE_TOP_CALLEES = 5
+
+# The profile of the request being handled, if it is being profiled
+current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("current_profile", default=None)
+
+
+def _function_name(key) -> str:
+    filename, line, name = key
+    if filename == "~":
+        return name  # built-in
+    return f"{os.path.basename(filename)}:{line}({name})"
+
+
+class RequestProfile:
+    """One profiled request: cProfile stats plus the awaited calls it made.
+
+    cProfile only counts time a coroutine is actually running, so time spent
+    waiting on MongoDB is recorded separately by the repository as `awaited`.
+    """
+
+    def __init__(self, method: str, path: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.created_at = datetime.utcnow()
+        self.status: Optional[int] = None
+        self.wall_ms = 0.0
+        self.cpu_ms = 0.0
+        self.awaited: List[dict] = []
+        self.profiler = cProfile.Profile()
+
+    def record_await(self, name: str, elapsed: float, failed: bool):
+        self.awaited.append({"call": name, "ms": round(elapsed * 1000, 3), "failed": failed})
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "status": self.status,
+            "created_at": self.created_at,
+            "wall_ms": round(self.wall_ms, 3),
+            "cpu_ms": round(self.cpu_ms, 3),
+            "awaited_ms": round(sum(call["ms"] for call in self.awaited), 3),
+        }
+
+    def functions(self, limit: int = PROFILE_TOP_FUNCTIONS) -> List[dict]:
+        stats = pstats.Stats(self.profiler).stats
+        callees = {}
+        for key, (_, _, _, _, callers) in stats.items():
+            for caller, (_, _, _, cumulative) in callers.items():
+                callees.setdefault(caller, []).append((cumulative, key))
+
+        ranked = sorted(stats.items(), key=lambda item: item[1][3], reverse=True)[:limit]
+        functions = []
+        for key, (primitive_calls, calls, total, cumulative, _) in ranked:
+            top_callees = sorted(callees.get(key, []), reverse=True)[:PROFILE_TOP_CALLEES]
+            functions.append({
+                "function": _function_name(key),
+                "calls": calls,
+                "primitive_calls": primitive_calls,
+                "total_ms": round(total * 1000, 3),
+                "cumulative_ms": round(cumulative * 1000, 3),
+                "callees": [
+                    {"function": _function_name(callee), "cumulative_ms": round(ms * 1000, 3)}
+                    for ms, callee in top_callees
+                ],
+            })
+        return functions
+
+    def as_dict(self) -> dict:
+        return {**self.summary(), "awaited": self.awaited, "functions": self.functions()}
+
+    def text(self) -> str:
+        """pstats report sorted by cumulative time, with each function's callees."""
+        output = io.StringIO()
+        stats = pstats.Stats(self.profiler, stream=output).sort_stats("cumulative")
+        stats.print_stats(PROFILE_TOP_FUNCTIONS)
+        stats.print_callees(PROFILE_TOP_FUNCTIONS)
+        return output.getvalue()
+
+    def pstats_dump(self) -> bytes:
+        """The same bytes `Profile.dump_stats` writes, for snakeviz and friends."""
+        self.profiler.create_stats()
+        return marshal.dumps(self.profiler.stats)
+
+
+class ProfileStore:
+    def __init__(self, max_size: int = PROFILE_HISTORY):
+        self.max_size = max_size
+        self._profiles: "OrderedDict[str, RequestProfile]" = OrderedDict()
+
+    def add(self, profile: RequestProfile):
+        self._profiles[profile.id] = profile
+        while len(self._profiles) > self.max_size:
+            self._profiles.popitem(last=False)
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        return self._profiles.get(profile_id)
+
+    def list(self) -> List[dict]:
+        return [profile.summary() for profile in reversed(self._profiles.values())]
+
+
+profile_store = ProfileStore()
+
+
+def _wants_profile(scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == b"x-profile":
+            return value.strip() not in (b"", b"0", b"false")
+    flags = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("profile")
+    return bool(flags) and flags[-1] not in ("", "0", "false")
+
+
+def _bearer_token(scope) -> Optional[str]:
+    for name, value in scope["headers"]:
+        if name == b"authorization":
+            scheme, _, token = value.decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and token:
+                return token.strip()
+    return None
+
+
+class ProfilingMiddleware:
+    """Profiles requests that ask for it with `X-Profile: 1` or `?profile=1`.
+
+    Only admins may profile: the request's bearer token is checked with
+    `verify_token`. The response is returned unchanged apart from an
+    `X-Profile-Id` header naming the stored profile (see /api/profiles).
+    cProfile traces the whole thread, so one request is profiled at a time
+    and work done for concurrent requests meanwhile shows up in it too.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self._lock = asyncio.Lock()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not _wants_profile(scope):
+            return await self.app(scope, receive, send)
+
+        token = _bearer_token(scope)
+        try:
+            if token is None:
+                raise HTTPException(status_code=401, detail="Profiling requires an admin token")
+            await verify_token(HTTPAuthorizationCredentials(scheme="Bearer", credentials=token))
+        except HTTPException as exc:
+            return await self._reject(send, exc)
+
+        profile = RequestProfile(scope["method"], scope["path"])
+
+        async def send_with_profile_id(message):
+            if message["type"] == "http.response.start":
+                profile.status = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((b"x-profile-id", profile.id.encode()))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        async with self._lock:
+            context_token = current_profile.set(profile)
+            wall_started = time.perf_counter()
+            cpu_started = time.process_time()
+            profile.profiler.enable()
+            try:
+                await self.app(scope, receive, send_with_profile_id)
+            finally:
+                profile.profiler.disable()
+                profile.cpu_ms = (time.process_time() - cpu_started) * 1000
+                profile.wall_ms = (time.perf_counter() - wall_started) * 1000
+                current_profile.reset(context_token)
+                profile_store.add(profile)
+
+    async def _reject(self, send, exc: HTTPException):
+        body = json.dumps({"detail": exc.detail}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": exc.status_code,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
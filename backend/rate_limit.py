@@ -0,0 +1,139 @@
+import os
+import math
+import time
+import json
+from typing import Dict, Optional, Tuple
+
+# Only trust X-Forwarded-For when running behind a proxy that sets it
+TRUST_FORWARDED_FOR = os.getenv('TRUST_FORWARDED_FOR', 'false').lower() == 'true'
+RATE_LIMIT_SWEEP_SECONDS = float(os.getenv('RATE_LIMIT_SWEEP_SECONDS', '60'))
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600}
+
+
+def parse_limit(value: str) -> Tuple[float, float]:
+    """Parse "<count>/<second|minute|hour>" into (tokens per second, burst)."""
+    count, _, period = value.partition("/")
+    return int(count) / PERIODS[period.strip()], float(count)
+
+
+class TokenBucket:
+    __slots__ = ("tokens", "updated")
+
+    def __init__(self, tokens: float, now: float):
+        self.tokens = tokens
+        self.updated = now
+
+
+class Limit:
+    """One token bucket per key, refilled lazily on access."""
+
+    def __init__(self, spec: str):
+        self.rate, self.burst = parse_limit(spec)
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    def _refill(self, key: str, now: float) -> TokenBucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(self.burst, now)
+        else:
+            bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * self.rate)
+            bucket.updated = now
+        return bucket
+
+    def wait_time(self, key: str, now: float) -> float:
+        """Seconds until a token is available for `key` (0 if one is available now)."""
+        bucket = self._refill(key, now)
+        if bucket.tokens >= 1:
+            return 0.0
+        return (1 - bucket.tokens) / self.rate
+
+    def consume(self, key: str):
+        self._buckets[key].tokens -= 1
+
+    def evict_idle(self, now: float):
+        # A bucket that has had time to refill completely is indistinguishable
+        # from a new one, so dropping it loses nothing
+        full_after = self.burst / self.rate
+        idle = [key for key, bucket in self._buckets.items() if now - bucket.updated >= full_after]
+        for key in idle:
+            del self._buckets[key]
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class RouteRule:
+    def __init__(self, per_ip: str, global_: str):
+        self.per_ip = Limit(per_ip)
+        self.global_ = Limit(global_)
+
+    def acquire(self, client: str, now: float) -> float:
+        """Take a token from both buckets, or return how long to wait for one."""
+        wait = max(self.per_ip.wait_time(client, now), self.global_.wait_time("*", now))
+        if wait == 0:
+            self.per_ip.consume(client)
+            self.global_.consume("*")
+        return wait
+
+
+def default_rules() -> Dict[Tuple[str, str], RouteRule]:
+    return {
+        ("POST", "/api/contact"): RouteRule(
+            per_ip=os.getenv('RATE_LIMIT_CONTACT_PER_IP', '5/minute'),
+            global_=os.getenv('RATE_LIMIT_CONTACT_GLOBAL', '50/second'),
+        ),
+        ("POST", "/api/auth/login"): RouteRule(
+            per_ip=os.getenv('RATE_LIMIT_LOGIN_PER_IP', '10/minute'),
+            global_=os.getenv('RATE_LIMIT_LOGIN_GLOBAL', '20/second'),
+        ),
+    }
+
+
+class RateLimitMiddleware:
+    """ASGI middleware applying per-IP and global token buckets to selected routes."""
+
+    def __init__(self, app, rules: Optional[Dict[Tuple[str, str], RouteRule]] = None):
+        self.app = app
+        self.rules = default_rules() if rules is None else rules
+        self._last_sweep = time.monotonic()
+        self.rejected = 0
+
+    def _client_ip(self, scope) -> str:
+        if TRUST_FORWARDED_FOR:
+            for name, value in scope["headers"]:
+                if name == b"x-forwarded-for":
+                    return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        rule = self.rules.get((scope["method"], scope["path"].rstrip("/")))
+        if rule is None:
+            return await self.app(scope, receive, send)
+
+        now = time.monotonic()
+        if now - self._last_sweep >= RATE_LIMIT_SWEEP_SECONDS:
+            self._last_sweep = now
+            for each in self.rules.values():
+                each.per_ip.evict_idle(now)
+
+        wait = rule.acquire(self._client_ip(scope), now)
+        if wait == 0:
+            return await self.app(scope, receive, send)
+
+        self.rejected += 1
+        body = json.dumps({"detail": "Too many requests, please slow down"}).encode()
+        await send({
+            "type": "http.response.start",
+            "status": 429,
+            "headers": [
+                (b"content-type", b"application/json"),
+                (b"content-length", str(len(body)).encode()),
+                (b"retry-after", str(math.ceil(wait)).encode()),
+            ],
+        })
+        await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,358 @@
+import time
+import functools
+from datetime import datetime
+from typing import Awaitable, Callable, Dict, Generic, List, NamedTuple, Optional, Sequence, Set, Tuple, Type, TypeVar
+from bson import ObjectId
+from pydantic import BaseModel
+from pymongo import IndexModel, ReturnDocument
+
+from bulk import run_bulk
+from cache import content_cache
+from coherence import invalidate_collections
+from preload import resident_content
+from profiling import current_profile
+
+# Upper bound for a single page; also the old implicit cap of to_list(1000)
+MAX_PAGE_SIZE = 1000
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+def get_db():
+    from server import db
+    return db
+
+
+class WriteEvent(NamedTuple):
+    """Passed to write hooks after a repository write has been applied.
+
+    Single-document writes also carry the document as it was before and
+    after the write (`before` is empty for inserts, `after` for deletes).
+    Bulk and many-document writes carry the ids and images only when the
+    repository captures images (see `capture_images`).
+    """
+    operation: str
+    ids: Tuple[str, ...] = ()
+    before: Tuple[dict, ...] = ()
+    after: Tuple[dict, ...] = ()
+
+
+class OperationStats:
+    __slots__ = ("count", "errors", "total", "max")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, elapsed: float, failed: bool):
+        self.count += 1
+        self.errors += failed
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg_ms": round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            "max_ms": round(self.max * 1000, 3),
+        }
+
+
+def timed(operation: str):
+    """Record the duration of a repository coroutine under `operation`."""
+    def decorator(method):
+        @functools.wraps(method)
+        async def wrapper(self, *args, **kwargs):
+            started = time.perf_counter()
+            failed = True
+            try:
+                result = await method(self, *args, **kwargs)
+                failed = False
+                return result
+            finally:
+                elapsed = time.perf_counter() - started
+                stats = self.timings.get(operation)
+                if stats is None:
+                    stats = self.timings[operation] = OperationStats()
+                stats.record(elapsed, failed)
+                profile = current_profile.get()
+                if profile is not None:
+                    profile.record_await(f"{self.name}.{operation}", elapsed, failed)
+        return wrapper
+    return decorator
+
+
+def _stringify_id(document: Optional[dict]) -> Optional[dict]:
+    if document is not None and "_id" in document:
+        document["_id"] = str(document["_id"])
+    return document
+
+
+WriteHook = Callable[["Repository", WriteEvent], Awaitable[None]]
+
+
+class Repository(Generic[ModelT]):
+    """Async data access for one collection.
+
+    Documents are returned as dicts with a string `_id`. Writes stamp
+    `created_at`/`updated_at` when `timestamps` is set, invalidate the
+    collection's cached state when `cacheable` is set, and then run any
+    registered write hooks.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        model: Type[ModelT],
+        indexes: Sequence[IndexModel] = (),
+        cacheable: bool = True,
+        timestamps: bool = True,
+    ):
+        self.name = name
+        self.model = model
+        self.indexes = list(indexes)
+        self.cacheable = cacheable
+        self.timestamps = timestamps
+        self.timings: Dict[str, OperationStats] = {}
+        self._write_hooks: List[WriteHook] = []
+        # Fields captured before and after many-document writes, for hooks that need deltas
+        self._image_fields: Set[str] = set()
+        REPOSITORIES[name] = self
+
+    @property
+    def db(self):
+        return get_db()
+
+    @property
+    def collection(self):
+        return self.db[self.name]
+
+    def add_write_hook(self, hook: WriteHook):
+        self._write_hooks.append(hook)
+
+    def capture_images(self, fields: Sequence[str]):
+        """Make bulk and many-document writes report before/after images of `fields`.
+
+        The matched documents are read first and the write is pinned to
+        them, so the images describe exactly the documents written.
+        """
+        self._image_fields.update(fields)
+
+    async def _images(self, query: dict) -> List[dict]:
+        projection = {name: 1 for name in self._image_fields}
+        documents = await self.collection.find(query, projection).to_list(None)
+        return [_stringify_id(document) for document in documents]
+
+    def _pinned(self, query: dict, images: List[dict]) -> dict:
+        return {"$and": [query, {"_id": {"$in": [ObjectId(document["_id"]) for document in images]}}]}
+
+    async def _after_write(
+        self,
+        operation: str,
+        ids: Sequence[str] = (),
+        before: Sequence[dict] = (),
+        after: Sequence[dict] = (),
+    ):
+        if self.cacheable:
+            # Swap the resident copy first, so nothing rebuilt after the
+            # invalidation can be built from the old documents
+            await resident_content.refresh(self.name)
+            await invalidate_collections(self.db, self.name)
+        event = WriteEvent(operation, tuple(ids), tuple(before), tuple(after))
+        for hook in self._write_hooks:
+            await hook(self, event)
+
+    async def ensure_indexes(self):
+        if self.indexes:
+            await self.collection.create_indexes(self.indexes)
+
+    # Reads
+
+    @timed("find_one")
+    async def find_one(self, query: Optional[dict] = None) -> Optional[dict]:
+        resident = resident_content.find(self.name, query, limit=1)
+        if resident is not None:
+            return _stringify_id(resident[0]) if resident else None
+        return _stringify_id(await self.collection.find_one(query or {}))
+
+    async def get_singleton(self) -> Optional[dict]:
+        """The collection's only document, served from the content cache."""
+        return await content_cache.get_or_load(self.name, self.find_one)
+
+    @timed("find")
+    async def find_all(
+        self,
+        query: Optional[dict] = None,
+        sort: Optional[list] = None,
+        limit: Optional[int] = MAX_PAGE_SIZE,
+    ) -> List[dict]:
+        """Documents matching `query`; at most `limit` of them unless it is None."""
+        documents = resident_content.find(self.name, query, sort or (), limit or 0)
+        if documents is None:
+            cursor = self.collection.find(query or {})
+            if sort:
+                cursor = cursor.sort(sort)
+            if limit:
+                cursor = cursor.limit(limit)
+            documents = await cursor.to_list(limit)
+        for doc in documents:
+            _stringify_id(doc)
+        return documents
+
+    @timed("find_page")
+    async def find_page(
+        self,
+        fields: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        after: Optional[ObjectId] = None,
+        query: Optional[dict] = None,
+    ) -> Tuple[List[dict], Optional[str]]:
+        """Fetch one `_id`-ordered page of documents matching `query` and the
+        cursor for the next one, if any.
+
+        `updated_at` is always fetched so the page's validators can be computed
+        even when it is not among the requested fields.
+        """
+        limit = limit or MAX_PAGE_SIZE
+        projection = None
+        if fields is not None:
+            projection = {name: 1 for name in fields}
+            projection["updated_at"] = 1
+
+        query = dict(query or {})
+        if after:
+            query["_id"] = {"$gt": after}
+        documents = resident_content.find(self.name, query, [("_id", 1)], limit + 1, projection)
+        if documents is None:
+            documents = await self.collection.find(query, projection).sort("_id", 1).limit(limit + 1).to_list(limit + 1)
+
+        next_cursor = None
+        if len(documents) > limit:
+            documents = documents[:limit]
+            next_cursor = str(documents[-1]["_id"])
+
+        for doc in documents:
+            _stringify_id(doc)
+        return documents, next_cursor
+
+    @timed("aggregate")
+    async def aggregate(self, pipeline: List[dict]) -> List[dict]:
+        resident = resident_content.aggregate(self.name, pipeline)
+        if resident is not None:
+            return resident
+        return await self.collection.aggregate(pipeline).to_list(None)
+
+    # Writes
+
+    @timed("insert")
+    async def insert(self, document: dict) -> dict:
+        document = dict(document)
+        if self.timestamps:
+            document["created_at"] = document["updated_at"] = datetime.utcnow()
+        result = await self.collection.insert_one(document)
+        document["_id"] = str(result.inserted_id)
+        await self._after_write("insert", (document["_id"],), after=(document,))
+        return document
+
+    @timed("update")
+    async def update(self, document_id: str, fields: dict) -> Optional[dict]:
+        """Set `fields` on one document; returns the updated document or None if missing."""
+        fields = dict(fields)
+        if self.timestamps:
+            fields["updated_at"] = datetime.utcnow()
+        before = await self.collection.find_one_and_update(
+            {"_id": ObjectId(document_id)},
+            {"$set": fields},
+            return_document=ReturnDocument.BEFORE
+        )
+        if before is None:
+            return None
+        # $set of top-level fields: the stored result is the old document with them merged in
+        _stringify_id(before)
+        after = {**before, **fields}
+        await self._after_write("update", (document_id,), (before,), (after,))
+        return dict(after)
+
+    @timed("upsert_singleton")
+    async def upsert_singleton(self, fields: dict) -> dict:
+        fields = dict(fields)
+        if self.timestamps:
+            fields["updated_at"] = datetime.utcnow()
+        result = await self.collection.find_one_and_update(
+            {},
+            {"$set": fields},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        _stringify_id(result)
+        await self._after_write("upsert_singleton", (result["_id"],))
+        return result
+
+    @timed("delete")
+    async def delete(self, document_id: str) -> bool:
+        deleted = await self.collection.find_one_and_delete({"_id": ObjectId(document_id)})
+        if deleted is None:
+            return False
+        await self._after_write("delete", (document_id,), before=(_stringify_id(deleted),))
+        return True
+
+    @timed("bulk_write")
+    async def bulk_write(self, upserts: List[BaseModel], deletes: List[str]) -> dict:
+        before: List[dict] = []
+        if self._image_fields:
+            targets = [item.id for item in upserts if item.id] + list(deletes)
+            before = await self._images({"_id": {"$in": [ObjectId(i) for i in targets if ObjectId.is_valid(i)]}})
+        result = await run_bulk(self.collection, upserts, deletes)
+        applied = [item["id"] for item in result["results"] if item["ok"]]
+        if applied:
+            after: List[dict] = []
+            if self._image_fields:
+                written = [item["id"] for item in result["results"] if item["ok"] and item["action"] != "delete"]
+                after = await self._images({"_id": {"$in": [ObjectId(i) for i in written]}})
+                # Only documents the bulk actually touched
+                before = [document for document in before if document["_id"] in applied]
+            await self._after_write("bulk_write", applied, before, after)
+        return result
+
+    @timed("update_many")
+    async def update_many(self, query: dict, fields: dict):
+        before: List[dict] = []
+        if self._image_fields:
+            before = await self._images(query)
+            query = self._pinned(query, before)
+        result = await self.collection.update_many(query, {"$set": fields})
+        if result.modified_count:
+            after = [{**document, **{name: value for name, value in fields.items() if name in self._image_fields}} for document in before]
+            await self._after_write("update_many", [document["_id"] for document in before], before, after)
+        return result
+
+    @timed("delete_many")
+    async def delete_many(self, query: dict):
+        before: List[dict] = []
+        if self._image_fields:
+            before = await self._images(query)
+            query = self._pinned(query, before)
+        result = await self.collection.delete_many(query)
+        if result.deleted_count:
+            await self._after_write("delete_many", [document["_id"] for document in before], before=before)
+        return result
+
+    def stats(self) -> dict:
+        return {operation: stats.as_dict() for operation, stats in self.timings.items()}
+
+
+# Every repository, by collection name
+REPOSITORIES: Dict[str, Repository] = {}
+
+
+async def ensure_all_indexes():
+    for repository in REPOSITORIES.values():
+        await repository.ensure_indexes()
+
+
+def repository_stats() -> dict:
+    return {name: repository.stats() for name, repository in REPOSITORIES.items()}
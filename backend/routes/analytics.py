@@ -0,0 +1,56 @@
+from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, Query
+from models import AnalyticsResponse
+from auth import verify_token
+from analytics import ROLLUPS, rollups
+
+router = APIRouter(prefix="/analytics", tags=["Analytics"])
+
+def contact_bucket_list(buckets: dict) -> list:
+    return [
+        {"key": key, "count": counters.get("count", 0), "unread": counters.get("unread", 0)}
+        for key, counters in buckets.items()
+        if counters.get("count", 0) > 0
+    ]
+
+@router.get("", response_model=AnalyticsResponse)
+async def get_analytics(
+    days: int = Query(30, ge=1, le=366, description="Per-day message counts for this many days up to today (UTC)"),
+    _: dict = Depends(verify_token)
+):
+    """Inbox and testimonial stats, read from the rollups rather than the documents."""
+    cutoff = (datetime.utcnow().date() - timedelta(days=days - 1)).isoformat()
+    contact = await rollups.read("contact_messages", since={"day": cutoff})
+    contact_total = contact.get("total", {}).get("", {})
+    days_in_range = {key: counters for key, counters in contact.get("day", {}).items() if key != "unknown"}
+    per_day = sorted(contact_bucket_list(days_in_range), key=lambda bucket: bucket["key"], reverse=True)
+    by_project_type = sorted(contact_bucket_list(contact.get("projectType", {})), key=lambda bucket: -bucket["count"])
+
+    testimonials = await rollups.read("testimonials")
+    testimonial_total = testimonials.get("total", {}).get("", {})
+    count = testimonial_total.get("count", 0)
+    histogram = {str(rating): 0 for rating in range(1, 6)}
+    for rating, counters in testimonials.get("rating", {}).items():
+        if counters.get("count", 0) > 0:
+            histogram[rating] = counters["count"]
+
+    return {
+        "contact_messages": {
+            "total": contact_total.get("count", 0),
+            "unread": contact_total.get("unread", 0),
+            "per_day": per_day,
+            "by_project_type": by_project_type,
+        },
+        "testimonials": {
+            "total": count,
+            "average_rating": round(testimonial_total["rating_total"] / count, 2) if count else None,
+            "rating_histogram": histogram,
+        },
+    }
+
+@router.post("/rebuild")
+async def rebuild_analytics(_: dict = Depends(verify_token)):
+    """Recount every rollup from its source collection (backfill)."""
+    for source in ROLLUPS:
+        await rollups.rebuild(source)
+    return {"message": "Analytics rebuilt", "sources": list(ROLLUPS)}
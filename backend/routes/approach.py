@@ -1,38 +1,34 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from models import ApproachItem, ApproachDocument
 from auth import verify_token
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from conditional import serve_cached
+from repository import Repository
 from typing import List
-from datetime import datetime
 
 router = APIRouter(prefix="/approach", tags=["Approach"])
 
-async def get_db():
-    from server import db
-    return db
+repository = Repository("approach", ApproachDocument)
 
-@router.get("", response_model=List[ApproachItem])
-async def get_approach(db: AsyncIOMotorDatabase = Depends(get_db)):
-    approach_doc = await db.approach.find_one()
+async def fetch_approach_document():
+    return await repository.get_singleton()
+
+def approach_from_document(approach_doc):
     if not approach_doc or "items" not in approach_doc:
         return []
     return approach_doc["items"]
 
+@router.get("", response_model=List[ApproachItem])
+async def get_approach(request: Request):
+    async def build():
+        approach_doc = await fetch_approach_document()
+        return approach_from_document(approach_doc), (approach_doc,)
+
+    return await serve_cached(request, repository.name, (repository.name,), List[ApproachItem], build)
+
 @router.put("", response_model=List[ApproachItem])
 async def update_approach(
     items: List[ApproachItem],
-    db: AsyncIOMotorDatabase = Depends(get_db),
     _: dict = Depends(verify_token)
 ):
-    approach_dict = {
-        "items": [item.dict() for item in items],
-        "updated_at": datetime.utcnow()
-    }
-    
-    await db.approach.find_one_and_update(
-        {},
-        {"$set": approach_dict},
-        upsert=True
-    )
-    
+    await repository.upsert_singleton({"items": [item.dict() for item in items]})
     return items
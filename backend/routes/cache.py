@@ -0,0 +1,29 @@
+from fastapi import APIRouter, Depends
+from analytics import rollups
+from auth import verify_token, token_cache
+from cache import content_cache, response_cache
+from coherence import coherence
+from dedup import recent_contacts
+from idempotency import idempotency_store
+from preload import resident_content
+from export_snapshot import snapshot_exporter
+from repository import repository_stats
+from search import search_index
+
+router = APIRouter(prefix="/cache", tags=["Cache"])
+
+@router.get("/stats")
+async def get_cache_stats(_: dict = Depends(verify_token)):
+    return {
+        "content": content_cache.stats(),
+        "responses": response_cache.stats(),
+        "coherence": coherence.stats(),
+        "tokens": token_cache.stats(),
+        "repositories": repository_stats(),
+        "preload": resident_content.stats(),
+        "search": search_index.stats(),
+        "analytics": rollups.stats(),
+        "idempotency": idempotency_store.stats(),
+        "contact_dedup": recent_contacts.stats(),
+        "snapshot": snapshot_exporter.stats() if snapshot_exporter is not None else None,
+    }
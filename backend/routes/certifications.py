@@ -1,31 +1,28 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from models import CertificationsDocument, Certification
 from typing import List
 from auth import verify_token
-from datetime import datetime
+from conditional import serve_cached
+from repository import Repository
 
 router = APIRouter()
 
-async def get_db():
-    from server import db
-    return db
+repository = Repository("certifications", CertificationsDocument)
 
-@router.get("/certifications", response_model=CertificationsDocument)
-async def get_certifications(db = Depends(get_db)):
-    doc = await db.certifications.find_one({})
+async def fetch_certifications():
+    doc = await repository.get_singleton()
     if not doc:
-        return {"certifications": [], "updated_at": datetime.utcnow()}
+        return {"certifications": []}
     return doc
 
+@router.get("/certifications", response_model=CertificationsDocument)
+async def get_certifications(request: Request):
+    async def build():
+        doc = await fetch_certifications()
+        return doc, (doc,)
+
+    return await serve_cached(request, repository.name, (repository.name,), CertificationsDocument, build)
+
 @router.put("/certifications", response_model=CertificationsDocument)
-async def update_certifications(cert_data: CertificationsDocument, db = Depends(get_db), current_user: str = Depends(verify_token)):
-    data = cert_data.dict()
-    data["updated_at"] = datetime.utcnow()
-    
-    await db.certifications.update_one(
-        {}, 
-        {"$set": data}, 
-        upsert=True
-    )
-    
-    return data
+async def update_certifications(cert_data: CertificationsDocument, current_user: str = Depends(verify_token)):
+    return await repository.upsert_singleton(cert_data.dict())
@@ -1,54 +1,169 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
-from models import ContactMessage, ContactMessageCreate, ContactMessageResponse
+from fastapi import APIRouter, HTTPException, Depends, Query, Response
+from typing import List, Optional
+from models import ContactMessage, ContactMessageCreate, ContactMessageResponse, ContactBulkRequest
 from auth import verify_token
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from batch_writer import contact_writer
+from dedup import contact_content, content_hash, recent_contacts
+from repository import Repository
+from pymongo import IndexModel
+from pymongo.errors import DuplicateKeyError, PyMongoError
 from bson import ObjectId
+from bson.errors import InvalidId
 from datetime import datetime
+import base64
 
 router = APIRouter(prefix="/contact", tags=["Contact"])
 
-async def get_db():
-    from server import db
-    return db
+# Messages are never served from the content caches, and only carry created_at
+repository = Repository(
+    "contact_messages",
+    ContactMessage,
+    indexes=[
+        # Inbox listing (newest first) and the unread-only filter, both keyset paginated
+        IndexModel([("created_at", -1), ("_id", -1)], name="created_at_desc"),
+        IndexModel([("read", 1), ("created_at", -1), ("_id", -1)], name="read_created_at_desc"),
+        # One message per content and dedup window, across workers; older messages have no hash
+        IndexModel(
+            [("content_hash", 1)],
+            name="content_hash_unique",
+            unique=True,
+            partialFilterExpression={"content_hash": {"$exists": True}},
+        ),
+    ],
+    cacheable=False,
+    timestamps=False,
+)
+
+def encode_cursor(created_at: datetime, message_id: ObjectId) -> str:
+    raw = f"{created_at.isoformat()}|{message_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def decode_cursor(cursor: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, message_id = raw.split("|")
+        return datetime.fromisoformat(created_at), ObjectId(message_id)
+    except (ValueError, InvalidId):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+CONTACT_ACCEPTED = {"message": "Your message has been sent successfully!"}
+
+async def forget_dropped(documents: List[dict]):
+    """Let the senders of messages the writer gave up on send them again."""
+    for document in documents:
+        recent_contacts.discard(contact_content(document["name"], document["email"], document["message"]))
+
+contact_writer.add_drop_hook(forget_dropped)
 
 @router.post("")
-async def submit_contact_message(
-    message: ContactMessageCreate,
-    db: AsyncIOMotorDatabase = Depends(get_db)
-):
+async def submit_contact_message(message: ContactMessageCreate):
     message_dict = message.dict()
     message_dict["read"] = False
     message_dict["created_at"] = datetime.utcnow()
     
-    await db.contact_messages.insert_one(message_dict)
+    # Double-clicks and retries get the same answer without storing the message twice
+    content = contact_content(message.name, message.email, message.message)
+    if recent_contacts.check_and_add(content):
+        return CONTACT_ACCEPTED
+    message_dict["content_hash"] = content_hash(content, message_dict["created_at"])
     
-    return {"message": "Your message has been sent successfully!"}
+    if not contact_writer.running:
+        try:
+            await repository.insert(message_dict)
+        except DuplicateKeyError:
+            pass  # Another worker stored it within the window
+        except PyMongoError:
+            # Not stored, so a retry must not be taken for a duplicate
+            recent_contacts.discard(content)
+            raise
+    elif not contact_writer.submit(message_dict):
+        recent_contacts.discard(content)
+        raise HTTPException(
+            status_code=503,
+            detail="Too many messages right now, please try again shortly",
+            headers={"Retry-After": "5"}
+        )
+    
+    return CONTACT_ACCEPTED
 
 @router.get("", response_model=List[ContactMessageResponse])
 async def get_contact_messages(
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    response: Response,
+    limit: int = Query(100, ge=1, le=500),
+    before: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    unread_only: bool = False,
     _: dict = Depends(verify_token)
 ):
-    messages = await db.contact_messages.find().sort("created_at", -1).to_list(1000)
-    for msg in messages:
-        msg["_id"] = str(msg["_id"])
+    query = {}
+    if unread_only:
+        query["read"] = False
+    if before:
+        created_at, message_id = decode_cursor(before)
+        query["$or"] = [
+            {"created_at": {"$lt": created_at}},
+            {"created_at": created_at, "_id": {"$lt": message_id}},
+        ]
+    
+    # Newest first; fetch one extra document to know whether another page exists
+    messages = await repository.find_all(
+        query, sort=[("created_at", -1), ("_id", -1)], limit=limit + 1
+    )
+    
+    if len(messages) > limit:
+        messages = messages[:limit]
+        last = messages[-1]
+        response.headers["X-Next-Cursor"] = encode_cursor(last["created_at"], last["_id"])
+    
     return messages
 
+def build_bulk_query(selection: ContactBulkRequest) -> dict:
+    query = {}
+    if selection.ids is not None:
+        if not all(ObjectId.is_valid(message_id) for message_id in selection.ids):
+            raise HTTPException(status_code=400, detail="Invalid message ID")
+        query["_id"] = {"$in": [ObjectId(message_id) for message_id in selection.ids]}
+    
+    criteria = selection.filter
+    if criteria is not None:
+        if criteria.read is not None:
+            query["read"] = criteria.read
+        if criteria.older_than is not None:
+            query["created_at"] = {"$lt": criteria.older_than}
+        if criteria.projectType is not None:
+            query["projectType"] = criteria.projectType
+    
+    # Refuse to touch the whole inbox because of an empty or missing selection
+    if not query:
+        raise HTTPException(status_code=400, detail="Provide message IDs or a filter")
+    return query
+
+@router.post("/bulk/read")
+async def bulk_mark_as_read(
+    selection: ContactBulkRequest,
+    _: dict = Depends(verify_token)
+):
+    query = build_bulk_query(selection)
+    result = await repository.update_many(query, {"read": True})
+    return {"matched": result.matched_count, "modified": result.modified_count}
+
+@router.post("/bulk/delete")
+async def bulk_delete_contact_messages(
+    selection: ContactBulkRequest,
+    _: dict = Depends(verify_token)
+):
+    query = build_bulk_query(selection)
+    result = await repository.delete_many(query)
+    return {"deleted": result.deleted_count}
+
 @router.put("/{message_id}/read")
 async def mark_message_as_read(
     message_id: str,
-    db: AsyncIOMotorDatabase = Depends(get_db),
     _: dict = Depends(verify_token)
 ):
     if not ObjectId.is_valid(message_id):
         raise HTTPException(status_code=400, detail="Invalid message ID")
     
-    result = await db.contact_messages.find_one_and_update(
-        {"_id": ObjectId(message_id)},
-        {"$set": {"read": True}},
-        return_document=True
-    )
+    result = await repository.update(message_id, {"read": True})
     
     if not result:
         raise HTTPException(status_code=404, detail="Message not found")
@@ -58,15 +173,12 @@ async def mark_message_as_read(
 @router.delete("/{message_id}")
 async def delete_contact_message(
     message_id: str,
-    db: AsyncIOMotorDatabase = Depends(get_db),
     _: dict = Depends(verify_token)
 ):
     if not ObjectId.is_valid(message_id):
         raise HTTPException(status_code=400, detail="Invalid message ID")
     
-    result = await db.contact_messages.delete_one({"_id": ObjectId(message_id)})
-    
-    if result.deleted_count == 0:
+    if not await repository.delete(message_id):
         raise HTTPException(status_code=404, detail="Message not found")
     
     return {"message": "Contact message deleted successfully"}
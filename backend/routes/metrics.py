@@ -1,34 +1,30 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from models import DashboardMetricsDocument, DashboardMetric
 from typing import List
 from auth import verify_token
-from datetime import datetime
+from conditional import serve_cached
+from repository import Repository
 
 router = APIRouter()
 
-async def get_db():
-    from server import db
-    return db
+repository = Repository("dashboard_metrics", DashboardMetricsDocument)
 
-@router.get("/metrics", response_model=DashboardMetricsDocument)
-async def get_metrics(db = Depends(get_db)):
-    doc = await db.dashboard_metrics.find_one({})
+async def fetch_metrics():
+    doc = await repository.get_singleton()
     if not doc:
         # Return default structure if not found
-        return {"metrics": [], "updated_at": datetime.utcnow()}
+        return {"metrics": []}
     return doc
 
+@router.get("/metrics", response_model=DashboardMetricsDocument)
+async def get_metrics(request: Request):
+    async def build():
+        doc = await fetch_metrics()
+        return doc, (doc,)
+
+    return await serve_cached(request, repository.name, (repository.name,), DashboardMetricsDocument, build)
+
 @router.put("/metrics", response_model=DashboardMetricsDocument)
-async def update_metrics(metrics_data: DashboardMetricsDocument, db = Depends(get_db), current_user: str = Depends(verify_token)):
-    # Clean data
-    data = metrics_data.dict()
-    data["updated_at"] = datetime.utcnow()
-    
+async def update_metrics(metrics_data: DashboardMetricsDocument, current_user: str = Depends(verify_token)):
     # Update or insert
-    await db.dashboard_metrics.update_one(
-        {}, 
-        {"$set": data}, 
-        upsert=True
-    )
-    
-    return data
+    return await repository.upsert_singleton(metrics_data.dict())
@@ -1,39 +1,29 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from models import PersonalInfo, PersonalInfoResponse
 from auth import verify_token
-from motor.motor_asyncio import AsyncIOMotorDatabase
-from datetime import datetime
+from conditional import serve_cached
+from repository import Repository
 
 router = APIRouter(prefix="/personal-info", tags=["Personal Info"])
 
-async def get_db():
-    from server import db
-    return db
+repository = Repository("personal_info", PersonalInfo)
+
+async def fetch_personal_info():
+    return await repository.get_singleton()
 
 @router.get("", response_model=PersonalInfoResponse)
-async def get_personal_info(db: AsyncIOMotorDatabase = Depends(get_db)):
-    personal_info = await db.personal_info.find_one()
-    if not personal_info:
-        raise HTTPException(status_code=404, detail="Personal info not found")
-    
-    personal_info["_id"] = str(personal_info["_id"])
-    return personal_info
+async def get_personal_info(request: Request):
+    async def build():
+        personal_info = await fetch_personal_info()
+        if not personal_info:
+            raise HTTPException(status_code=404, detail="Personal info not found")
+        return personal_info, (personal_info,)
+
+    return await serve_cached(request, repository.name, (repository.name,), PersonalInfoResponse, build)
 
 @router.put("", response_model=PersonalInfoResponse)
 async def update_personal_info(
     info: PersonalInfo,
-    db: AsyncIOMotorDatabase = Depends(get_db),
     _: dict = Depends(verify_token)
 ):
-    info_dict = info.dict()
-    info_dict["updated_at"] = datetime.utcnow()
-    
-    result = await db.personal_info.find_one_and_update(
-        {},
-        {"$set": info_dict},
-        upsert=True,
-        return_document=True
-    )
-    
-    result["_id"] = str(result["_id"])
-    return result
+    return await repository.upsert_singleton(info.dict())
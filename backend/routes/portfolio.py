@@ -0,0 +1,66 @@
+from fastapi import APIRouter, HTTPException, Query, Request
+from models import PortfolioSnapshot
+from conditional import serve_cached
+from typing import Optional
+import asyncio
+
+from routes.personal_info import fetch_personal_info
+from routes.projects import fetch_projects
+from routes.work_experience import fetch_work_experience
+from routes.testimonials import fetch_testimonials
+from routes.skills import fetch_skills_document, skills_from_document
+from routes.approach import fetch_approach_document, approach_from_document
+from routes.metrics import fetch_metrics
+from routes.certifications import fetch_certifications
+
+router = APIRouter(prefix="/portfolio", tags=["Portfolio"])
+
+# Section name -> (document loader, document -> payload), in the order the
+# landing page renders them. Loaders return stored documents so that the
+# snapshot's validators can be derived from their timestamps.
+SECTION_LOADERS = {
+    "personal_info": (fetch_personal_info, None),
+    "projects": (fetch_projects, None),
+    "work_experience": (fetch_work_experience, None),
+    "testimonials": (fetch_testimonials, None),
+    "skills": (fetch_skills_document, skills_from_document),
+    "approach": (fetch_approach_document, approach_from_document),
+    "metrics": (fetch_metrics, None),
+    "certifications": (fetch_certifications, None),
+}
+
+# Sections whose backing collection is named differently
+SECTION_COLLECTIONS = {
+    "metrics": "dashboard_metrics",
+}
+
+def parse_sections(sections: Optional[str]):
+    if not sections:
+        return list(SECTION_LOADERS)
+
+    requested = [name.strip() for name in sections.split(",") if name.strip()]
+    unknown = [name for name in requested if name not in SECTION_LOADERS]
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown sections: {', '.join(unknown)}"
+        )
+    return requested
+
+@router.get("", response_model=PortfolioSnapshot)
+async def get_portfolio(
+    request: Request,
+    sections: Optional[str] = Query(None, description="Comma-separated list of sections to include")
+):
+    names = parse_sections(sections)
+
+    async def build():
+        documents = await asyncio.gather(*(SECTION_LOADERS[name][0]() for name in names))
+        snapshot = {}
+        for name, document in zip(names, documents):
+            to_payload = SECTION_LOADERS[name][1]
+            snapshot[name] = to_payload(document) if to_payload else document
+        return snapshot, documents
+
+    collections = tuple(SECTION_COLLECTIONS.get(name, name) for name in names)
+    return await serve_cached(request, "portfolio:" + ",".join(names), collections, PortfolioSnapshot, build)
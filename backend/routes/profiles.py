@@ -0,0 +1,30 @@
+from fastapi import APIRouter, HTTPException, Depends, Query
+from fastapi.responses import PlainTextResponse, Response
+from auth import verify_token
+from profiling import profile_store
+
+router = APIRouter(prefix="/profiles", tags=["Profiling"])
+
+@router.get("")
+async def list_profiles(_: dict = Depends(verify_token)):
+    return profile_store.list()
+
+@router.get("/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    format: str = Query("json", pattern="^(json|text|pstats)$"),
+    _: dict = Depends(verify_token)
+):
+    profile = profile_store.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+
+    if format == "text":
+        return PlainTextResponse(profile.text())
+    if format == "pstats":
+        return Response(
+            content=profile.pstats_dump(),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": f'attachment; filename="{profile.id}.prof"'}
+        )
+    return profile.as_dict()
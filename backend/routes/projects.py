@@ -1,75 +1,119 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
-from models import Project, ProjectCreate, ProjectResponse
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from typing import List, Optional
+from models import Project, ProjectCreate, ProjectResponse, ProjectPartialResponse, ProjectBulkRequest, ProjectFacets, BulkWriteResponse
 from auth import verify_token
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from conditional import serve_cached
+from listing import (
+    content_filter, facet_count, filter_cache_key, page_cache_key, parse_after, parse_fields,
+    select_fields, technology_counts, technology_facet_pipeline,
+)
+from repository import MAX_PAGE_SIZE, Repository
+from pymongo import IndexModel
 from bson import ObjectId
-from datetime import datetime
 
 router = APIRouter(prefix="/projects", tags=["Projects"])
 
-async def get_db():
-    from server import db
-    return db
+repository = Repository(
+    "projects",
+    Project,
+    indexes=[
+        # Multikey: one entry per technology, in page order for keyset pagination
+        IndexModel([("technologies", 1), ("_id", 1)], name="technologies_id"),
+        # Partial: serves featured=true listings without indexing the other projects
+        IndexModel([("_id", 1)], name="featured_id", partialFilterExpression={"featured": True}),
+    ],
+)
+
+async def fetch_projects():
+    return await repository.find_all()
 
 @router.get("", response_model=List[ProjectResponse])
-async def get_projects(db: AsyncIOMotorDatabase = Depends(get_db)):
-    projects = await db.projects.find().to_list(1000)
-    for project in projects:
-        project["_id"] = str(project["_id"])
-    return projects
+async def get_projects(
+    request: Request,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    technology: Optional[str] = Query(None, description="Comma-separated technologies that must all be used"),
+    featured: Optional[bool] = Query(None),
+):
+    selected = parse_fields(fields, repository.model)
+    after_id = parse_after(after)
+    query = content_filter(technology, featured)
+
+    async def build():
+        projects, next_cursor = await repository.find_page(selected, limit, after_id, query)
+        payload = select_fields(projects, selected) if selected else projects
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+        return payload, (projects,), headers
+
+    if selected:
+        response_type = List[ProjectPartialResponse]
+    else:
+        response_type = List[ProjectResponse]
+    key = page_cache_key(repository.name, selected, limit, after_id, query)
+    return await serve_cached(request, key, (repository.name,), response_type, build, exclude_unset=bool(selected))
+
+@router.get("/facets", response_model=ProjectFacets)
+async def get_project_facets(
+    request: Request,
+    technology: Optional[str] = Query(None, description="Comma-separated technologies that must all be used"),
+    featured: Optional[bool] = Query(None)
+):
+    """Per-technology project counts, narrowed by the same filters as the listing."""
+    query = content_filter(technology, featured)
+
+    async def build():
+        pipeline = technology_facet_pipeline(query, {"featured": [{"$match": {"featured": True}}, {"$count": "count"}]})
+        result = (await repository.aggregate(pipeline))[0]
+        facets = {
+            "total": facet_count(result, "total"),
+            "featured": facet_count(result, "featured"),
+            "technologies": technology_counts(result),
+        }
+        return facets, (result["validators"],)
+
+    key = f"{repository.name}:facets?{filter_cache_key(query)}"
+    return await serve_cached(request, key, (repository.name,), ProjectFacets, build)
 
 @router.post("", response_model=ProjectResponse)
 async def create_project(
     project: ProjectCreate,
-    db: AsyncIOMotorDatabase = Depends(get_db),
     _: dict = Depends(verify_token)
 ):
-    project_dict = project.dict()
-    project_dict["created_at"] = datetime.utcnow()
-    project_dict["updated_at"] = datetime.utcnow()
-    
-    result = await db.projects.insert_one(project_dict)
-    project_dict["_id"] = str(result.inserted_id)
-    return project_dict
+    return await repository.insert(project.dict())
+
+@router.post("/bulk", response_model=BulkWriteResponse)
+async def bulk_write_projects(
+    payload: ProjectBulkRequest,
+    _: dict = Depends(verify_token)
+):
+    return await repository.bulk_write(payload.upserts, payload.deletes)
 
 @router.put("/{project_id}", response_model=ProjectResponse)
 async def update_project(
     project_id: str,
     project: ProjectCreate,
-    db: AsyncIOMotorDatabase = Depends(get_db),
     _: dict = Depends(verify_token)
 ):
     if not ObjectId.is_valid(project_id):
         raise HTTPException(status_code=400, detail="Invalid project ID")
     
-    project_dict = project.dict()
-    project_dict["updated_at"] = datetime.utcnow()
-    
-    result = await db.projects.find_one_and_update(
-        {"_id": ObjectId(project_id)},
-        {"$set": project_dict},
-        return_document=True
-    )
+    result = await repository.update(project_id, project.dict())
     
     if not result:
         raise HTTPException(status_code=404, detail="Project not found")
     
-    result["_id"] = str(result["_id"])
     return result
 
 @router.delete("/{project_id}")
 async def delete_project(
     project_id: str,
-    db: AsyncIOMotorDatabase = Depends(get_db),
     _: dict = Depends(verify_token)
 ):
     if not ObjectId.is_valid(project_id):
         raise HTTPException(status_code=400, detail="Invalid project ID")
     
-    result = await db.projects.delete_one({"_id": ObjectId(project_id)})
-    
-    if result.deleted_count == 0:
+    if not await repository.delete(project_id):
         raise HTTPException(status_code=404, detail="Project not found")
     
     return {"message": "Project deleted successfully"}
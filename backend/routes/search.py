@@ -0,0 +1,25 @@
+from fastapi import APIRouter, HTTPException, Query
+from models import SearchResponse
+from search import SEARCH_FIELDS, search_index
+from typing import Optional
+
+router = APIRouter(prefix="/search", tags=["Search"])
+
+@router.get("", response_model=SearchResponse)
+async def search_content(
+    q: str = Query(..., min_length=1, max_length=200),
+    collections: Optional[str] = Query(None, description="Comma-separated collections to search"),
+    limit: int = Query(20, ge=1, le=100)
+):
+    selected = None
+    if collections:
+        selected = [name.strip() for name in collections.split(",") if name.strip()]
+        unknown = [name for name in selected if name not in SEARCH_FIELDS]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown collections: {', '.join(unknown)}"
+            )
+
+    total, results = search_index.search(q, selected, limit)
+    return {"query": q, "total": total, "results": results}
@@ -1,38 +1,34 @@
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request
 from models import Skill, SkillsDocument
 from auth import verify_token
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from conditional import serve_cached
+from repository import Repository
 from typing import List
-from datetime import datetime
 
 router = APIRouter(prefix="/skills", tags=["Skills"])
 
-async def get_db():
-    from server import db
-    return db
+repository = Repository("skills", SkillsDocument)
 
-@router.get("", response_model=List[Skill])
-async def get_skills(db: AsyncIOMotorDatabase = Depends(get_db)):
-    skills_doc = await db.skills.find_one()
+async def fetch_skills_document():
+    return await repository.get_singleton()
+
+def skills_from_document(skills_doc):
     if not skills_doc or "skills" not in skills_doc:
         return []
     return skills_doc["skills"]
 
+@router.get("", response_model=List[Skill])
+async def get_skills(request: Request):
+    async def build():
+        skills_doc = await fetch_skills_document()
+        return skills_from_document(skills_doc), (skills_doc,)
+
+    return await serve_cached(request, repository.name, (repository.name,), List[Skill], build)
+
 @router.put("", response_model=List[Skill])
 async def update_skills(
     skills: List[Skill],
-    db: AsyncIOMotorDatabase = Depends(get_db),
     _: dict = Depends(verify_token)
 ):
-    skills_dict = {
-        "skills": [skill.dict() for skill in skills],
-        "updated_at": datetime.utcnow()
-    }
-    
-    await db.skills.find_one_and_update(
-        {},
-        {"$set": skills_dict},
-        upsert=True
-    )
-    
+    await repository.upsert_singleton({"skills": [skill.dict() for skill in skills]})
     return skills
@@ -1,75 +1,81 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
-from models import Testimonial, TestimonialCreate, TestimonialResponse
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from typing import List, Optional
+from models import Testimonial, TestimonialCreate, TestimonialResponse, TestimonialPartialResponse, TestimonialBulkRequest, BulkWriteResponse
 from auth import verify_token
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from conditional import serve_cached
+from listing import page_cache_key, parse_after, parse_fields, select_fields
+from repository import MAX_PAGE_SIZE, Repository
 from bson import ObjectId
-from datetime import datetime
 
 router = APIRouter(prefix="/testimonials", tags=["Testimonials"])
 
-async def get_db():
-    from server import db
-    return db
+repository = Repository("testimonials", Testimonial)
+
+async def fetch_testimonials():
+    return await repository.find_all()
 
 @router.get("", response_model=List[TestimonialResponse])
-async def get_testimonials(db: AsyncIOMotorDatabase = Depends(get_db)):
-    testimonials = await db.testimonials.find().to_list(1000)
-    for testimonial in testimonials:
-        testimonial["_id"] = str(testimonial["_id"])
-    return testimonials
+async def get_testimonials(
+    request: Request,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page")
+):
+    selected = parse_fields(fields, repository.model)
+    after_id = parse_after(after)
+
+    async def build():
+        testimonials, next_cursor = await repository.find_page(selected, limit, after_id)
+        payload = select_fields(testimonials, selected) if selected else testimonials
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+        return payload, (testimonials,), headers
+
+    if selected:
+        response_type = List[TestimonialPartialResponse]
+    else:
+        response_type = List[TestimonialResponse]
+    key = page_cache_key(repository.name, selected, limit, after_id)
+    return await serve_cached(request, key, (repository.name,), response_type, build, exclude_unset=bool(selected))
 
 @router.post("", response_model=TestimonialResponse)
 async def create_testimonial(
     testimonial: TestimonialCreate,
-    db: AsyncIOMotorDatabase = Depends(get_db),
     _: dict = Depends(verify_token)
 ):
-    testimonial_dict = testimonial.dict()
-    testimonial_dict["created_at"] = datetime.utcnow()
-    testimonial_dict["updated_at"] = datetime.utcnow()
-    
-    result = await db.testimonials.insert_one(testimonial_dict)
-    testimonial_dict["_id"] = str(result.inserted_id)
-    return testimonial_dict
+    return await repository.insert(testimonial.dict())
+
+@router.post("/bulk", response_model=BulkWriteResponse)
+async def bulk_write_testimonials(
+    payload: TestimonialBulkRequest,
+    _: dict = Depends(verify_token)
+):
+    return await repository.bulk_write(payload.upserts, payload.deletes)
 
 @router.put("/{testimonial_id}", response_model=TestimonialResponse)
 async def update_testimonial(
     testimonial_id: str,
     testimonial: TestimonialCreate,
-    db: AsyncIOMotorDatabase = Depends(get_db),
     _: dict = Depends(verify_token)
 ):
     if not ObjectId.is_valid(testimonial_id):
         raise HTTPException(status_code=400, detail="Invalid testimonial ID")
     
-    testimonial_dict = testimonial.dict()
-    testimonial_dict["updated_at"] = datetime.utcnow()
-    
-    result = await db.testimonials.find_one_and_update(
-        {"_id": ObjectId(testimonial_id)},
-        {"$set": testimonial_dict},
-        return_document=True
-    )
+    result = await repository.update(testimonial_id, testimonial.dict())
     
     if not result:
         raise HTTPException(status_code=404, detail="Testimonial not found")
     
-    result["_id"] = str(result["_id"])
     return result
 
 @router.delete("/{testimonial_id}")
 async def delete_testimonial(
     testimonial_id: str,
-    db: AsyncIOMotorDatabase = Depends(get_db),
     _: dict = Depends(verify_token)
 ):
     if not ObjectId.is_valid(testimonial_id):
         raise HTTPException(status_code=400, detail="Invalid testimonial ID")
     
-    result = await db.testimonials.delete_one({"_id": ObjectId(testimonial_id)})
-    
-    if result.deleted_count == 0:
+    if not await repository.delete(testimonial_id):
         raise HTTPException(status_code=404, detail="Testimonial not found")
     
     return {"message": "Testimonial deleted successfully"}
@@ -1,75 +1,110 @@
-from fastapi import APIRouter, HTTPException, Depends
-from typing import List
-from models import WorkExperience, WorkExperienceCreate, WorkExperienceResponse
+from fastapi import APIRouter, HTTPException, Depends, Query, Request
+from typing import List, Optional
+from models import WorkExperience, WorkExperienceCreate, WorkExperienceResponse, WorkExperiencePartialResponse, WorkExperienceBulkRequest, WorkExperienceFacets, BulkWriteResponse
 from auth import verify_token
-from motor.motor_asyncio import AsyncIOMotorDatabase
+from conditional import serve_cached
+from listing import (
+    content_filter, facet_count, filter_cache_key, page_cache_key, parse_after, parse_fields,
+    select_fields, technology_counts, technology_facet_pipeline,
+)
+from repository import MAX_PAGE_SIZE, Repository
+from pymongo import IndexModel
 from bson import ObjectId
-from datetime import datetime
 
 router = APIRouter(prefix="/work-experience", tags=["Work Experience"])
 
-async def get_db():
-    from server import db
-    return db
+repository = Repository(
+    "work_experience",
+    WorkExperience,
+    indexes=[
+        # Multikey: one entry per technology, in page order for keyset pagination
+        IndexModel([("technologies", 1), ("_id", 1)], name="technologies_id"),
+    ],
+)
+
+async def fetch_work_experience():
+    return await repository.find_all()
 
 @router.get("", response_model=List[WorkExperienceResponse])
-async def get_work_experience(db: AsyncIOMotorDatabase = Depends(get_db)):
-    experiences = await db.work_experience.find().to_list(1000)
-    for exp in experiences:
-        exp["_id"] = str(exp["_id"])
-    return experiences
+async def get_work_experience(
+    request: Request,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return"),
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    after: Optional[str] = Query(None, description="Cursor from the X-Next-Cursor header of the previous page"),
+    technology: Optional[str] = Query(None, description="Comma-separated technologies that must all be used"),
+):
+    selected = parse_fields(fields, repository.model)
+    after_id = parse_after(after)
+    query = content_filter(technology)
+
+    async def build():
+        experiences, next_cursor = await repository.find_page(selected, limit, after_id, query)
+        payload = select_fields(experiences, selected) if selected else experiences
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else {}
+        return payload, (experiences,), headers
+
+    if selected:
+        response_type = List[WorkExperiencePartialResponse]
+    else:
+        response_type = List[WorkExperienceResponse]
+    key = page_cache_key(repository.name, selected, limit, after_id, query)
+    return await serve_cached(request, key, (repository.name,), response_type, build, exclude_unset=bool(selected))
+
+@router.get("/facets", response_model=WorkExperienceFacets)
+async def get_work_experience_facets(
+    request: Request,
+    technology: Optional[str] = Query(None, description="Comma-separated technologies that must all be used")
+):
+    """Per-technology work experience counts, narrowed by the same filter as the listing."""
+    query = content_filter(technology)
+
+    async def build():
+        result = (await repository.aggregate(technology_facet_pipeline(query)))[0]
+        facets = {"total": facet_count(result, "total"), "technologies": technology_counts(result)}
+        return facets, (result["validators"],)
+
+    key = f"{repository.name}:facets?{filter_cache_key(query)}"
+    return await serve_cached(request, key, (repository.name,), WorkExperienceFacets, build)
 
 @router.post("", response_model=WorkExperienceResponse)
 async def create_work_experience(
     experience: WorkExperienceCreate,
-    db: AsyncIOMotorDatabase = Depends(get_db),
     _: dict = Depends(verify_token)
 ):
-    exp_dict = experience.dict()
-    exp_dict["created_at"] = datetime.utcnow()
-    exp_dict["updated_at"] = datetime.utcnow()
-    
-    result = await db.work_experience.insert_one(exp_dict)
-    exp_dict["_id"] = str(result.inserted_id)
-    return exp_dict
+    return await repository.insert(experience.dict())
+
+@router.post("/bulk", response_model=BulkWriteResponse)
+async def bulk_write_work_experience(
+    payload: WorkExperienceBulkRequest,
+    _: dict = Depends(verify_token)
+):
+    return await repository.bulk_write(payload.upserts, payload.deletes)
 
 @router.put("/{experience_id}", response_model=WorkExperienceResponse)
 async def update_work_experience(
     experience_id: str,
     experience: WorkExperienceCreate,
-    db: AsyncIOMotorDatabase = Depends(get_db),
     _: dict = Depends(verify_token)
 ):
     if not ObjectId.is_valid(experience_id):
         raise HTTPException(status_code=400, detail="Invalid experience ID")
     
-    exp_dict = experience.dict()
-    exp_dict["updated_at"] = datetime.utcnow()
-    
-    result = await db.work_experience.find_one_and_update(
-        {"_id": ObjectId(experience_id)},
-        {"$set": exp_dict},
-        return_document=True
-    )
+    result = await repository.update(experience_id, experience.dict())
     
     if not result:
         raise HTTPException(status_code=404, detail="Work experience not found")
     
-    result["_id"] = str(result["_id"])
     return result
 
 @router.delete("/{experience_id}")
 async def delete_work_experience(
     experience_id: str,
-    db: AsyncIOMotorDatabase = Depends(get_db),
     _: dict = Depends(verify_token)
 ):
     if not ObjectId.is_valid(experience_id):
         raise HTTPException(status_code=400, detail="Invalid experience ID")
     
-    result = await db.work_experience.delete_one({"_id": ObjectId(experience_id)})
-    
-    if result.deleted_count == 0:
+    if not await repository.delete(experience_id):
         raise HTTPException(status_code=404, detail="Work experience not found")
     
     return {"message": "Work experience deleted successfully"}
@@ -0,0 +1,278 @@
+import os
+import re
+import math
+import asyncio
+import bisect
+import logging
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from bson import ObjectId
+from pymongo.errors import PyMongoError
+
+from coherence import coherence
+
+logger = logging.getLogger(__name__)
+
+# How often to retry rebuilding collections whose index update failed
+SEARCH_RETRY_SECONDS = float(os.getenv('SEARCH_RETRY_SECONDS', '5'))
+
+# Collection -> searchable field -> weight
+SEARCH_FIELDS: Dict[str, Dict[str, float]] = {
+    "projects": {"title": 3.0, "technologies": 2.0, "description": 1.0},
+    "work_experience": {"title": 3.0, "company": 2.0, "technologies": 2.0, "description": 1.0},
+    "testimonials": {"name": 2.0, "company": 2.0, "content": 1.0},
+}
+
+# The last query term also matches longer terms starting with it, once it is this long
+MIN_PREFIX_LENGTH = 2
+# Prefix expansions count for less than exact matches
+PREFIX_WEIGHT = 0.5
+
+TOKEN_PATTERN = re.compile(r"[^\W_]+")
+
+DocKey = Tuple[str, str]
+# (field path, start, end); list fields are addressed as "technologies.0"
+Occurrence = Tuple[str, int, int]
+
+
+def tokenize(text: str) -> List[Tuple[str, int, int]]:
+    return [(match.group().lower(), match.start(), match.end()) for match in TOKEN_PATTERN.finditer(text)]
+
+
+def _field_texts(document: dict, fields: Iterable[str]) -> Iterable[Tuple[str, str, str]]:
+    """Yield (field, field path, text) for every searchable string in the document."""
+    for field in fields:
+        value = document.get(field)
+        if isinstance(value, str):
+            yield field, field, value
+        elif isinstance(value, list):
+            for position, item in enumerate(value):
+                if isinstance(item, str):
+                    yield field, f"{field}.{position}", item
+
+
+def display_title(collection: str, document: dict) -> str:
+    if collection == "work_experience":
+        return f"{document.get('title', '')} at {document.get('company', '')}"
+    if collection == "testimonials":
+        return document.get("name", "")
+    return document.get("title", "")
+
+
+class SearchIndex:
+    """Inverted index over the searchable collections.
+
+    Postings map each term to the documents containing it and where, so a
+    query costs a few dictionary lookups rather than a scan. Documents are
+    re-indexed after every write through repository hooks; changes made by
+    other workers rebuild the affected collection.
+
+    A failed read never reaches the write that triggered it: the collection
+    is marked dirty and rebuilt in the background until it succeeds.
+    """
+
+    def __init__(self, fields: Dict[str, Dict[str, float]] = SEARCH_FIELDS, retry_interval: float = SEARCH_RETRY_SECONDS):
+        self.fields = fields
+        self.retry_interval = retry_interval
+        self._documents: Dict[DocKey, dict] = {}
+        self._postings: Dict[str, Dict[DocKey, List[Occurrence]]] = {}
+        self._terms: Dict[DocKey, Set[str]] = {}
+        self._vocabulary: List[str] = []
+        self._vocabulary_dirty = False
+        self._repositories: Dict[str, object] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._dirty: Set[str] = set()
+        self._retry_task: Optional[asyncio.Task] = None
+        self.queries = 0
+        self.failures = 0
+
+    # Maintenance
+
+    def _remove(self, key: DocKey):
+        self._documents.pop(key, None)
+        for term in self._terms.pop(key, ()):
+            postings = self._postings[term]
+            postings.pop(key, None)
+            if not postings:
+                del self._postings[term]
+                self._vocabulary_dirty = True
+
+    def _add(self, collection: str, document: dict):
+        key = (collection, str(document["_id"]))
+        self._remove(key)
+        occurrences: Dict[str, List[Occurrence]] = {}
+        for _, path, text in _field_texts(document, self.fields[collection]):
+            for term, start, end in tokenize(text):
+                occurrences.setdefault(term, []).append((path, start, end))
+        for term, found in occurrences.items():
+            if term not in self._postings:
+                self._postings[term] = {}
+                self._vocabulary_dirty = True
+            self._postings[term][key] = found
+        self._terms[key] = set(occurrences)
+        self._documents[key] = document
+
+    def _replace_collection(self, collection: str, documents: Sequence[dict]):
+        for key in [key for key in self._documents if key[0] == collection]:
+            self._remove(key)
+        for document in documents:
+            self._add(collection, document)
+
+    def _lock(self, collection: str) -> asyncio.Lock:
+        lock = self._locks.get(collection)
+        if lock is None:
+            lock = self._locks[collection] = asyncio.Lock()
+        return lock
+
+    def _mark_dirty(self, collection: str, exc: Exception):
+        self.failures += 1
+        self._dirty.add(collection)
+        logger.warning("Updating the search index for %s failed, rebuilding it later: %s", collection, exc)
+        if self._retry_task is None:
+            self._retry_task = asyncio.create_task(self._retry())
+
+    async def _retry(self):
+        try:
+            while self._dirty:
+                await asyncio.sleep(self.retry_interval)
+                for collection in list(self._dirty):
+                    await self.rebuild(collection)
+        finally:
+            self._retry_task = None
+
+    async def rebuild(self, collection: str):
+        repository = self._repositories.get(collection)
+        if repository is None:
+            return
+        async with self._lock(collection):
+            try:
+                # Every document; find_all stops at a page by default
+                documents = await repository.find_all(limit=None)
+            except PyMongoError as exc:
+                return self._mark_dirty(collection, exc)
+            self._replace_collection(collection, documents)
+            self._dirty.discard(collection)
+
+    async def build(self, repositories: Iterable):
+        """Index every searchable collection and keep it current; called on boot."""
+        for repository in repositories:
+            if repository.name in self.fields:
+                self._repositories[repository.name] = repository
+                repository.add_write_hook(self._on_write)
+        for collection in self._repositories:
+            await self.rebuild(collection)
+        coherence.add_refresh_hook(self.rebuild)
+
+    async def _on_write(self, repository, event):
+        if not event.ids or repository.name in self._dirty:
+            # No ids to go by, or earlier changes are missing from the index anyway
+            return await self.rebuild(repository.name)
+        async with self._lock(repository.name):
+            object_ids = [ObjectId(document_id) for document_id in event.ids if ObjectId.is_valid(document_id)]
+            try:
+                found = await repository.find_all({"_id": {"$in": object_ids}}, limit=None)
+            except PyMongoError as exc:
+                # The write is committed; its response and the other hooks must not fail with it
+                return self._mark_dirty(repository.name, exc)
+            for document in found:
+                self._add(repository.name, document)
+            present = {document["_id"] for document in found}
+            for document_id in event.ids:
+                if document_id not in present:
+                    self._remove((repository.name, document_id))
+
+    async def stop(self):
+        if self._retry_task is not None:
+            self._retry_task.cancel()
+            try:
+                await self._retry_task
+            except asyncio.CancelledError:
+                pass
+
+    # Queries
+
+    def _terms_with_prefix(self, prefix: str) -> List[str]:
+        if self._vocabulary_dirty:
+            self._vocabulary = sorted(self._postings)
+            self._vocabulary_dirty = False
+        start = bisect.bisect_left(self._vocabulary, prefix)
+        matches = []
+        for term in self._vocabulary[start:]:
+            if not term.startswith(prefix):
+                break
+            matches.append(term)
+        return matches
+
+    def search(self, query: str, collections: Optional[Sequence[str]] = None, limit: int = 20) -> Tuple[int, List[dict]]:
+        """Rank documents containing every query term; the last term may be a prefix.
+
+        Returns the number of matching documents and the top `limit` hits.
+        """
+        self.queries += 1
+        terms = [term for term, _, _ in tokenize(query)]
+        if not terms:
+            return 0, []
+        allowed = set(collections) if collections else None
+        total_documents = max(1, len(self._documents))
+
+        scores: Optional[Dict[DocKey, float]] = None
+        highlights: Dict[DocKey, Dict[str, Set[Tuple[int, int]]]] = {}
+        for position, term in enumerate(terms):
+            expansions = [term]
+            if position == len(terms) - 1 and len(term) >= MIN_PREFIX_LENGTH:
+                expansions = self._terms_with_prefix(term)
+
+            term_scores: Dict[DocKey, float] = {}
+            for expansion in expansions:
+                postings = self._postings.get(expansion)
+                if not postings:
+                    continue
+                idf = math.log(1 + total_documents / len(postings))
+                boost = 1.0 if expansion == term else PREFIX_WEIGHT
+                for key, occurrences in postings.items():
+                    if allowed is not None and key[0] not in allowed:
+                        continue
+                    if scores is not None and key not in scores:
+                        continue
+                    weights = self.fields[key[0]]
+                    weight = sum(weights[path.split(".", 1)[0]] for path, _, _ in occurrences)
+                    term_scores[key] = term_scores.get(key, 0.0) + idf * boost * weight
+                    marks = highlights.setdefault(key, {})
+                    for path, start, end in occurrences:
+                        marks.setdefault(path, set()).add((start, end))
+
+            if scores is None:
+                scores = term_scores
+            else:
+                scores = {key: scores[key] + score for key, score in term_scores.items()}
+            if not scores:
+                return 0, []
+
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))
+        hits = []
+        for key, score in ranked[:limit]:
+            collection, document_id = key
+            document = self._documents[key]
+            hits.append({
+                "collection": collection,
+                "id": document_id,
+                "title": display_title(collection, document),
+                "score": round(score, 4),
+                "highlights": {path: sorted(spans) for path, spans in sorted(highlights[key].items())},
+                "document": document,
+            })
+        return len(ranked), hits
+
+    def stats(self) -> dict:
+        counts: Dict[str, int] = {}
+        for collection, _ in self._documents:
+            counts[collection] = counts.get(collection, 0) + 1
+        return {
+            "documents": counts,
+            "terms": len(self._postings),
+            "queries": self.queries,
+            "failures": self.failures,
+            "dirty": sorted(self._dirty),
+        }
+
+
+search_index = SearchIndex()
@@ -1,25 +1,106 @@
 from fastapi import FastAPI, APIRouter
+from fastapi.responses import JSONResponse, PlainTextResponse
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
-from motor.motor_asyncio import AsyncIOMotorClient
+from starlette.middleware.gzip import GZipMiddleware
+from pymongo.errors import PyMongoError
+from contextlib import asynccontextmanager
 import os
+import time
+import asyncio
 import logging
 from pathlib import Path
 
-# Import route modules
-# Import route modules
-from routes import personal_info, projects, work_experience, testimonials, skills, approach, contact, metrics, certifications, auth as auth_routes
-
+# Load .env before importing modules that read their settings at import time
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
-mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
-db = client[os.environ['DB_NAME']]
+# Import route modules
+from analytics import ROLLUPS, rollups
+from batch_writer import contact_writer
+from coherence import coherence
+from conditional import COMPRESSION_MIN_SIZE
+from export_snapshot import PUBLIC_ENDPOINTS, snapshot_exporter
+from idempotency import IdempotencyMiddleware
+from monitoring import MetricsMiddleware, command_monitor, loop_lag_monitor, pool_monitor, render_metrics
+from profiling import ProfilingMiddleware
+from rate_limit import RateLimitMiddleware
+from preload import resident_content
+from repository import REPOSITORIES, ensure_all_indexes
+from search import search_index
+from seed_data import seed_database
+from storage import STORAGE_BACKEND, create_storage
+from routes import personal_info, projects, work_experience, testimonials, skills, approach, contact, metrics, certifications, portfolio, profiles, analytics as analytics_routes, search as search_routes, cache as cache_routes, auth as auth_routes
+
+# MongoDB connection pool settings
+MONGO_POOL_SETTINGS = {
+    "maxPoolSize": int(os.getenv('MONGO_MAX_POOL_SIZE', '100')),
+    "minPoolSize": int(os.getenv('MONGO_MIN_POOL_SIZE', '10')),
+    "maxIdleTimeMS": int(os.getenv('MONGO_MAX_IDLE_TIME_MS', '300000')),
+    "connectTimeoutMS": int(os.getenv('MONGO_CONNECT_TIMEOUT_MS', '5000')),
+    "serverSelectionTimeoutMS": int(os.getenv('MONGO_SERVER_SELECTION_TIMEOUT_MS', '5000')),
+    "waitQueueTimeoutMS": int(os.getenv('MONGO_WAIT_QUEUE_TIMEOUT_MS', '2000')),
+}
+
+# Storage: MongoDB, or STORAGE_BACKEND=memory for CI, benchmarks and single-node runs
+storage = create_storage(STORAGE_BACKEND, event_listeners=[pool_monitor, command_monitor], **MONGO_POOL_SETTINGS)
+db = storage.db
+
+async def ping_storage() -> float:
+    """Round-trip a ping to the storage backend and return the latency in milliseconds."""
+    started = time.perf_counter()
+    await storage.ping()
+    return (time.perf_counter() - started) * 1000
+
+async def warm_up_pool():
+    # Concurrent pings force the pool to open minPoolSize connections up front
+    # instead of during the first burst of traffic
+    await asyncio.gather(*(ping_storage() for _ in range(max(1, MONGO_POOL_SETTINGS["minPoolSize"]))))
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    latency = await ping_storage()
+    if storage.shared:
+        await warm_up_pool()
+    else:
+        # In-memory storage starts empty on every boot
+        await seed_database(db)
+        for source in ROLLUPS:
+            await rollups.rebuild(source)
+    # Index creation is idempotent, so every worker can run it on boot
+    await ensure_all_indexes()
+    # Public content only; contact messages are never served to the public
+    await resident_content.load(repository for repository in REPOSITORIES.values() if repository.cacheable)
+    await search_index.build(REPOSITORIES.values())
+    # Only needed when other workers can write to the same data
+    if storage.shared:
+        await coherence.start(db)
+    loop_lag_monitor.start()
+    rollups.attach(REPOSITORIES, contact_writer)
+    contact_writer.start(contact.repository.collection)
+    if snapshot_exporter is not None:
+        snapshot_exporter.attach(REPOSITORIES.values())
+        # Catch up with anything written while no exporter was running; one worker is enough
+        if snapshot_exporter.claim_boot_export():
+            snapshot_exporter.schedule(*{name for used in PUBLIC_ENDPOINTS.values() for name in used})
+    app.state.ready = True
+    logger.info("Storage %s ready (ping %.1fms, %d connections open)", STORAGE_BACKEND, latency, pool_monitor.open_connections)
+
+    yield
+
+    app.state.ready = False
+    if snapshot_exporter is not None:
+        await snapshot_exporter.stop()
+    await contact_writer.stop()
+    await coherence.stop()
+    await resident_content.stop()
+    await search_index.stop()
+    await loop_lag_monitor.stop()
+    storage.close()
 
 # Create the main app without a prefix
-app = FastAPI(title="Portfolio API", version="1.0.0")
+app = FastAPI(title="Portfolio API", version="1.0.0", lifespan=lifespan)
+app.state.ready = False
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -29,6 +110,29 @@ api_router = APIRouter(prefix="/api")
 async def root():
     return {"message": "Portfolio API is running", "status": "healthy"}
 
+# Readiness endpoint for load balancers and deploy checks
+@api_router.get("/ready")
+async def ready():
+    try:
+        latency = await ping_storage()
+    except PyMongoError as exc:
+        logger.warning("Readiness ping failed: %s", exc)
+        return JSONResponse(status_code=503, content={"ready": False, "detail": "MongoDB unreachable"})
+
+    body = {
+        "ready": app.state.ready,
+        "storage": STORAGE_BACKEND,
+        "mongo_ping_ms": round(latency, 2),
+        "pool": {**pool_monitor.stats(), "max_size": MONGO_POOL_SETTINGS["maxPoolSize"], "min_size": MONGO_POOL_SETTINGS["minPoolSize"]},
+        "contact_writer": contact_writer.stats(),
+    }
+    return JSONResponse(status_code=200 if app.state.ready else 503, content=body)
+
+# Prometheus scrape endpoint, at the root so it does not clash with the dashboard's /api/metrics
+@app.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 # Include all routers
 api_router.include_router(auth_routes.router)
 api_router.include_router(personal_info.router)
@@ -40,25 +144,43 @@ api_router.include_router(approach.router)
 api_router.include_router(contact.router)
 api_router.include_router(metrics.router)
 api_router.include_router(certifications.router)
+api_router.include_router(portfolio.router)
+api_router.include_router(search_routes.router)
+api_router.include_router(analytics_routes.router)
+api_router.include_router(cache_routes.router)
+api_router.include_router(profiles.router)
 
 # Include the router in the main app
 app.include_router(api_router)
 
+# Innermost, so a profile covers the route itself rather than the middleware
+app.add_middleware(ProfilingMiddleware)
+
+# Inside the rate limiter, so throttled requests never reach the idempotency store
+app.add_middleware(IdempotencyMiddleware)
+
+# Added before CORS so that 429 responses still carry CORS headers
+app.add_middleware(RateLimitMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_credentials=True,
     allow_origins=["*"],
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Profile-Id", "Idempotent-Replayed"],
 )
 
+# Compresses everything serve_cached has not already encoded; responses that
+# carry a Content-Encoding are passed through untouched
+app.add_middleware(GZipMiddleware, minimum_size=COMPRESSION_MIN_SIZE, compresslevel=6)
+
+# Outermost, so latencies include every other middleware
+app.add_middleware(MetricsMiddleware)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 )
 logger = logging.getLogger(__name__)
-
-@app.on_event("shutdown")
-async def shutdown_db_client():
-    client.close()
\ No newline at end of file
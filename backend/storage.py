@@ -0,0 +1,561 @@
+import os
+import time
+import copy
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import DeleteOne, InsertOne, ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, OperationFailure
+from pymongo.results import BulkWriteResult, DeleteResult, InsertManyResult, InsertOneResult, UpdateResult
+
+# "mongo" (default) or "memory"
+STORAGE_BACKEND = os.getenv('STORAGE_BACKEND', 'mongo')
+
+# How often expired documents are removed from collections with a TTL index, as MongoDB's reaper does
+TTL_MONITOR_SECONDS = 60
+
+
+class MongoStorage:
+    """MongoDB through Motor; the backend every multi-worker deployment uses."""
+
+    # Other processes see our writes, so cross-worker cache coherence applies
+    shared = True
+
+    def __init__(self, url: str, db_name: str, **client_options):
+        self.client = AsyncIOMotorClient(url, **client_options)
+        self.db = self.client[db_name]
+
+    async def ping(self):
+        await self.client.admin.command("ping")
+
+    def close(self):
+        self.client.close()
+
+
+class MemoryStorage:
+    """Process-local storage with the subset of the Motor API the app uses.
+
+    Data lives only as long as the process, so it suits benchmarks, CI
+    without MongoDB and single-node instances (seed it on boot).
+    """
+
+    shared = False
+
+    def __init__(self):
+        self.db = MemoryDatabase()
+
+    async def ping(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def create_storage(backend: str = STORAGE_BACKEND, **mongo_options):
+    if backend == "memory":
+        return MemoryStorage()
+    if backend == "mongo":
+        return MongoStorage(os.environ['MONGO_URL'], os.environ['DB_NAME'], **mongo_options)
+    raise ValueError(f"Unknown STORAGE_BACKEND: {backend}")
+
+
+# Query matching
+
+_MISSING = object()
+
+
+def _get_path(document: dict, path: str):
+    value = document
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _compare(value, operand, test) -> bool:
+    try:
+        return value is not _MISSING and value is not None and test(value, operand)
+    except TypeError:
+        return False
+
+
+def _equals(value, operand) -> bool:
+    # Like Mongo, a scalar matches an array that contains it
+    if isinstance(value, list) and not isinstance(operand, list):
+        return operand in value
+    if value is _MISSING:
+        return operand is None
+    return value == operand
+
+
+OPERATORS = {
+    "$eq": _equals,
+    "$ne": lambda value, operand: not _equals(value, operand),
+    "$gt": lambda value, operand: _compare(value, operand, lambda a, b: a > b),
+    "$gte": lambda value, operand: _compare(value, operand, lambda a, b: a >= b),
+    "$lt": lambda value, operand: _compare(value, operand, lambda a, b: a < b),
+    "$lte": lambda value, operand: _compare(value, operand, lambda a, b: a <= b),
+    "$in": lambda value, operand: any(_equals(value, item) for item in operand),
+    "$nin": lambda value, operand: not any(_equals(value, item) for item in operand),
+    "$exists": lambda value, operand: (value is not _MISSING) == bool(operand),
+    "$all": lambda value, operand: isinstance(value, list) and all(item in value for item in operand),
+    "$size": lambda value, operand: isinstance(value, list) and len(value) == operand,
+}
+
+
+def matches(document: dict, query: Optional[dict]) -> bool:
+    for key, condition in (query or {}).items():
+        if key == "$or":
+            if not any(matches(document, branch) for branch in condition):
+                return False
+        elif key == "$and":
+            if not all(matches(document, branch) for branch in condition):
+                return False
+        elif key == "$nor":
+            if any(matches(document, branch) for branch in condition):
+                return False
+        else:
+            value = _get_path(document, key)
+            if isinstance(condition, dict) and condition and all(op.startswith("$") for op in condition):
+                for op, operand in condition.items():
+                    if op not in OPERATORS:
+                        raise OperationFailure(f"Unsupported query operator: {op}")
+                    if not OPERATORS[op](value, operand):
+                        return False
+            elif not _equals(value, condition):
+                return False
+    return True
+
+
+def project(document: dict, projection: Optional[dict], deep: bool = True) -> dict:
+    """Apply a find() projection; `deep=False` shares nested values with `document`."""
+    if not projection:
+        result = dict(document)
+    else:
+        included = {key for key, flag in projection.items() if flag}
+        if included:
+            result = {key: document[key] for key in included if key in document}
+            if projection.get("_id", 1) and "_id" in document:
+                result["_id"] = document["_id"]
+        else:
+            result = {key: value for key, value in document.items() if key not in projection}
+    return copy.deepcopy(result) if deep else result
+
+
+def _sort_key(value):
+    # Missing and null sort before everything else, as in Mongo
+    present = value is not _MISSING and value is not None
+    return (present, value) if present else (False, 0)
+
+
+def select(
+    documents: Iterable[dict],
+    query: Optional[dict] = None,
+    sort: Sequence[Tuple[str, int]] = (),
+    skip: int = 0,
+    limit: int = 0,
+) -> List[dict]:
+    """Filter, sort and slice documents the way a find() cursor would."""
+    selected = [doc for doc in documents if matches(doc, query)]
+    # Stable sorts applied from the least to the most significant key
+    for key, direction in reversed(sort):
+        selected.sort(key=lambda doc: _sort_key(_get_path(doc, key)), reverse=direction < 0)
+    selected = selected[skip:]
+    return selected[:limit] if limit else selected
+
+
+def _apply_update(document: dict, update: dict, inserting: bool) -> bool:
+    """Apply update operators in place; returns whether anything changed."""
+    before = copy.deepcopy(document)
+    for op, fields in update.items():
+        if op == "$set" or (op == "$setOnInsert" and inserting):
+            for key, value in fields.items():
+                document[key] = copy.deepcopy(value)
+        elif op == "$setOnInsert":
+            continue
+        elif op == "$unset":
+            for key in fields:
+                document.pop(key, None)
+        elif op == "$inc":
+            for key, amount in fields.items():
+                document[key] = document.get(key, 0) + amount
+        else:
+            raise OperationFailure(f"Unsupported update operator: {op}")
+    return document != before
+
+
+def _upsert_base(query: dict) -> dict:
+    """The equality parts of a filter, which seed an upserted document."""
+    return {
+        key: copy.deepcopy(value)
+        for key, value in query.items()
+        if not key.startswith("$") and not (isinstance(value, dict) and any(op.startswith("$") for op in value))
+    }
+
+
+def _evaluate(document: dict, expression):
+    """Value of an aggregation expression: "$field" paths or constants."""
+    if isinstance(expression, str) and expression.startswith("$"):
+        value = _get_path(document, expression[1:])
+        return None if value is _MISSING else value
+    return expression
+
+
+def _group(documents: List[dict], spec: dict) -> List[dict]:
+    groups: Dict[Any, dict] = {}
+    for document in documents:
+        key = _evaluate(document, spec["_id"])
+        group = groups.get(key)
+        if group is None:
+            group = groups[key] = {"_id": key, **{name: [] for name in spec if name != "_id"}}
+        for name, accumulator in spec.items():
+            if name == "_id":
+                continue
+            (op, expression), = accumulator.items()
+            group[name].append(_evaluate(document, expression))
+
+    results = []
+    for group in groups.values():
+        result = {"_id": group["_id"]}
+        for name, accumulator in spec.items():
+            if name == "_id":
+                continue
+            op = next(iter(accumulator))
+            values = [value for value in group[name] if isinstance(value, (int, float)) and not isinstance(value, bool)]
+            if op == "$sum":
+                result[name] = sum(values)
+            elif op == "$avg":
+                result[name] = sum(values) / len(values) if values else None
+            elif op == "$min":
+                result[name] = min(values) if values else None
+            elif op == "$max":
+                result[name] = max(values) if values else None
+            else:
+                raise OperationFailure(f"Unsupported accumulator: {op}")
+        results.append(result)
+    return results
+
+
+def aggregate(documents: Iterable[dict], pipeline: Sequence[dict]) -> List[dict]:
+    """Run the aggregation stages the app uses over in-memory documents.
+
+    Supports $match, $project, $unwind (top-level fields), $group ($sum,
+    $avg, $min, $max), $sort, $skip, $limit, $count and $facet.
+    """
+    results = [dict(document) for document in documents]
+    for stage in pipeline:
+        (op, spec), = stage.items()
+        if op == "$match":
+            results = [doc for doc in results if matches(doc, spec)]
+        elif op == "$project":
+            results = [project(doc, spec, deep=False) for doc in results]
+        elif op == "$unwind":
+            field = (spec if isinstance(spec, str) else spec["path"])[1:]
+            unwound = []
+            for doc in results:
+                value = doc.get(field)
+                if isinstance(value, list):
+                    unwound.extend({**doc, field: item} for item in value)
+                elif value is not None:
+                    unwound.append(doc)
+            results = unwound
+        elif op == "$group":
+            results = _group(results, spec)
+        elif op == "$sort":
+            results = select(results, sort=list(spec.items()))
+        elif op == "$skip":
+            results = results[spec:]
+        elif op == "$limit":
+            results = results[:spec]
+        elif op == "$count":
+            results = [{spec: len(results)}] if results else []
+        elif op == "$facet":
+            results = [{name: aggregate(results, stages) for name, stages in spec.items()}]
+        else:
+            raise OperationFailure(f"Unsupported aggregation stage: {op}")
+    return results
+
+
+class ListCursor:
+    """An already computed result list behind the cursor interface Motor returns."""
+
+    def __init__(self, results: List[dict]):
+        self._results = results
+
+    async def to_list(self, length: Optional[int] = None) -> List[dict]:
+        return self._results[:length] if length else list(self._results)
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self._results:
+            yield document
+
+
+class MemoryCursor:
+    def __init__(self, collection: "MemoryCollection", query: Optional[dict], projection: Optional[dict]):
+        self._collection = collection
+        self._query = query
+        self._projection = projection
+        self._sort: List[Tuple[str, int]] = []
+        self._skip = 0
+        self._limit = 0
+
+    def sort(self, key_or_list, direction: int = 1):
+        if isinstance(key_or_list, str):
+            self._sort = [(key_or_list, direction)]
+        else:
+            self._sort = list(key_or_list)
+        return self
+
+    def skip(self, count: int):
+        self._skip = count
+        return self
+
+    def limit(self, count: int):
+        self._limit = count
+        return self
+
+    def _results(self) -> List[dict]:
+        documents = select(self._collection._live(), self._query, self._sort, self._skip, self._limit)
+        return [project(doc, self._projection) for doc in documents]
+
+    async def to_list(self, length: Optional[int] = None) -> List[dict]:
+        results = self._results()
+        return results[:length] if length else results
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        for document in self._results():
+            yield document
+
+
+class MemoryCollection:
+    def __init__(self, name: str):
+        self.name = name
+        self._documents: Dict[Any, dict] = {}
+        # Unique indexes: field names and the filter documents must match to be indexed
+        self._unique: List[Tuple[Tuple[str, ...], Optional[dict]]] = []
+        # TTL indexes: (date field, seconds after which a document expires)
+        self._ttl: List[Tuple[str, int]] = []
+        self._reaped_at = 0.0
+
+    # Indexes
+
+    async def create_indexes(self, indexes: Sequence) -> List[str]:
+        names = []
+        for index in indexes:
+            spec = index.document
+            keys = tuple(spec["key"].keys())
+            partial = spec.get("partialFilterExpression")
+            if partial is None and spec.get("sparse"):
+                partial = {"$or": [{key: {"$exists": True}} for key in keys]}
+            if spec.get("unique") and (keys, partial) not in self._unique:
+                self._unique.append((keys, partial))
+            if "expireAfterSeconds" in spec and (keys[0], spec["expireAfterSeconds"]) not in self._ttl:
+                self._ttl.append((keys[0], spec["expireAfterSeconds"]))
+            names.append(spec.get("name", "_".join(keys)))
+        return names
+
+    def _check_unique(self, document: dict, ignore_id=None):
+        for keys, partial in self._unique:
+            if partial is not None and not matches(document, partial):
+                continue
+            values = tuple(_get_path(document, key) for key in keys)
+            for other in self._documents.values():
+                if other["_id"] == ignore_id or (partial is not None and not matches(other, partial)):
+                    continue
+                if tuple(_get_path(other, key) for key in keys) == values:
+                    raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: {keys}")
+
+    def _reap(self):
+        """Drop documents whose TTL index says they have expired."""
+        if not self._ttl or time.monotonic() - self._reaped_at < TTL_MONITOR_SECONDS:
+            return
+        self._reaped_at = time.monotonic()
+        now = datetime.utcnow()
+        for field, seconds in self._ttl:
+            cutoff = now - timedelta(seconds=seconds)
+            expired = [
+                document_id for document_id, document in self._documents.items()
+                if isinstance(document.get(field), datetime) and document[field] <= cutoff
+            ]
+            for document_id in expired:
+                del self._documents[document_id]
+
+    def _live(self) -> Iterable[dict]:
+        self._reap()
+        return self._documents.values()
+
+    def _store(self, document: dict, ignore_id=None):
+        self._reap()
+        if document["_id"] in self._documents and document["_id"] != ignore_id:
+            raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: _id_")
+        self._check_unique(document, ignore_id)
+        self._documents[document["_id"]] = document
+
+    # Reads
+
+    def find(self, query: Optional[dict] = None, projection: Optional[dict] = None) -> MemoryCursor:
+        return MemoryCursor(self, query, projection)
+
+    async def find_one(self, query: Optional[dict] = None, projection: Optional[dict] = None) -> Optional[dict]:
+        results = await self.find(query, projection).limit(1).to_list(1)
+        return results[0] if results else None
+
+    def aggregate(self, pipeline: Sequence[dict]) -> ListCursor:
+        return ListCursor(copy.deepcopy(aggregate(self._live(), pipeline)))
+
+    async def count_documents(self, query: Optional[dict] = None) -> int:
+        return sum(1 for doc in self._live() if matches(doc, query))
+
+    def _matching(self, query: Optional[dict]) -> List[dict]:
+        return [doc for doc in self._live() if matches(doc, query)]
+
+    # Writes
+
+    def _insert(self, document: dict) -> Any:
+        # Like pymongo, the caller's document receives the generated _id
+        document.setdefault("_id", ObjectId())
+        self._store(copy.deepcopy(document))
+        return document["_id"]
+
+    async def insert_one(self, document: dict) -> InsertOneResult:
+        return InsertOneResult(self._insert(document), True)
+
+    async def insert_many(self, documents: Iterable[dict], ordered: bool = True) -> InsertManyResult:
+        documents = list(documents)
+        inserted, errors = [], []
+        for index, document in enumerate(documents):
+            try:
+                inserted.append(self._insert(document))
+            except DuplicateKeyError as exc:
+                errors.append({"index": index, "code": 11000, "errmsg": str(exc)})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(inserted)})
+        return InsertManyResult(inserted, True)
+
+    def _update(self, query: dict, update: dict, upsert: bool, many: bool) -> Tuple[int, int, Any]:
+        """Returns (matched, modified, upserted _id)."""
+        targets = self._matching(query)
+        if not many:
+            targets = targets[:1]
+        if not targets:
+            if not upsert:
+                return 0, 0, None
+            document = _upsert_base(query)
+            _apply_update(document, update, inserting=True)
+            return 0, 0, self._insert(document)
+
+        modified = 0
+        for target in targets:
+            updated = copy.deepcopy(target)
+            if _apply_update(updated, update, inserting=False):
+                self._store(updated, ignore_id=target["_id"])
+                modified += 1
+        return len(targets), modified, None
+
+    def _update_result(self, query: dict, update: dict, upsert: bool, many: bool) -> UpdateResult:
+        matched, modified, upserted = self._update(query, update, upsert, many)
+        raw = {"n": matched + (upserted is not None), "nModified": modified}
+        if upserted is not None:
+            raw["upserted"] = upserted
+        return UpdateResult(raw, True)
+
+    async def update_one(self, query: dict, update: dict, upsert: bool = False) -> UpdateResult:
+        return self._update_result(query, update, upsert, many=False)
+
+    async def update_many(self, query: dict, update: dict, upsert: bool = False) -> UpdateResult:
+        return self._update_result(query, update, upsert, many=True)
+
+    async def find_one_and_update(
+        self,
+        query: dict,
+        update: dict,
+        upsert: bool = False,
+        return_document: bool = ReturnDocument.BEFORE,
+        projection: Optional[dict] = None,
+    ) -> Optional[dict]:
+        existing = self._matching(query)[:1]
+        before = copy.deepcopy(existing[0]) if existing else None
+        _, _, upserted = self._update(query, update, upsert, many=False)
+        if return_document == ReturnDocument.AFTER:
+            document_id = upserted if upserted is not None else (before["_id"] if before else None)
+            after = self._documents.get(document_id)
+            return project(after, projection) if after is not None else None
+        return project(before, projection) if before is not None else None
+
+    async def find_one_and_delete(self, query: dict, projection: Optional[dict] = None) -> Optional[dict]:
+        targets = self._matching(query)[:1]
+        for target in targets:
+            del self._documents[target["_id"]]
+        return project(targets[0], projection) if targets else None
+
+    async def delete_one(self, query: dict) -> DeleteResult:
+        targets = self._matching(query)[:1]
+        for target in targets:
+            del self._documents[target["_id"]]
+        return DeleteResult({"n": len(targets)}, True)
+
+    async def delete_many(self, query: dict) -> DeleteResult:
+        targets = self._matching(query)
+        for target in targets:
+            del self._documents[target["_id"]]
+        return DeleteResult({"n": len(targets)}, True)
+
+    async def bulk_write(self, operations: Sequence, ordered: bool = True) -> BulkWriteResult:
+        result = {"nInserted": 0, "nMatched": 0, "nModified": 0, "nUpserted": 0, "nRemoved": 0, "upserted": [], "writeErrors": []}
+        for index, operation in enumerate(operations):
+            try:
+                if isinstance(operation, InsertOne):
+                    self._insert(operation._doc)
+                    result["nInserted"] += 1
+                elif isinstance(operation, UpdateOne):
+                    matched, modified, upserted = self._update(
+                        operation._filter, operation._doc, bool(operation._upsert), many=False
+                    )
+                    result["nMatched"] += matched
+                    result["nModified"] += modified
+                    if upserted is not None:
+                        result["nUpserted"] += 1
+                        result["upserted"].append({"index": index, "_id": upserted})
+                elif isinstance(operation, DeleteOne):
+                    result["nRemoved"] += (await self.delete_one(operation._filter)).deleted_count
+                else:
+                    raise OperationFailure(f"Unsupported bulk operation: {type(operation).__name__}")
+            except DuplicateKeyError as exc:
+                result["writeErrors"].append({"index": index, "code": 11000, "errmsg": str(exc)})
+                if ordered:
+                    break
+        if result["writeErrors"]:
+            raise BulkWriteError(result)
+        return BulkWriteResult(result, True)
+
+    def watch(self, *args, **kwargs):
+        raise OperationFailure("Change streams are not supported by the in-memory backend")
+
+
+class MemoryDatabase:
+    def __init__(self):
+        self._collections: Dict[str, MemoryCollection] = {}
+
+    def __getitem__(self, name: str) -> MemoryCollection:
+        collection = self._collections.get(name)
+        if collection is None:
+            collection = self._collections[name] = MemoryCollection(name)
+        return collection
+
+    def __getattr__(self, name: str) -> MemoryCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    async def list_collection_names(self) -> List[str]:
+        return list(self._collections)
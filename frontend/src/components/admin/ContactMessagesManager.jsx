@@ -7,16 +7,36 @@ import api from '../../services/api';
 
 const ContactMessagesManager = () => {
   const [messages, setMessages] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [totals, setTotals] = useState({ total: 0, unread: 0 });
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
 
   useEffect(() => {
     fetchMessages();
   }, []);
 
+  const fetchTotals = async () => {
+    try {
+      const response = await api.analytics.get(1);
+      const { total, unread } = response.data.contact_messages;
+      setTotals({ total, unread });
+    } catch (error) {
+      console.error('Error fetching message totals:', error);
+    }
+  };
+
+  // The inbox is paginated; each page says where the next one starts
+  const fetchPage = async (before) => {
+    const response = await api.contact.getPage(before);
+    setNextCursor(response.headers['x-next-cursor'] || null);
+    return response.data;
+  };
+
   const fetchMessages = async () => {
     try {
-      const response = await api.contact.getAll();
-      setMessages(response.data);
+      const [firstPage] = await Promise.all([fetchPage(), fetchTotals()]);
+      setMessages(firstPage);
       setLoading(false);
     } catch (error) {
       toast({
@@ -28,6 +48,21 @@ const ContactMessagesManager = () => {
     }
   };
 
+  const handleLoadMore = async () => {
+    setLoadingMore(true);
+    try {
+      const page = await fetchPage(nextCursor);
+      setMessages((current) => [...current, ...page]);
+    } catch (error) {
+      toast({
+        title: "Error",
+        description: "Failed to load more messages",
+        variant: "destructive"
+      });
+    }
+    setLoadingMore(false);
+  };
+
   const handleMarkAsRead = async (id) => {
     try {
       await api.contact.markAsRead(id);
@@ -35,7 +70,9 @@ const ContactMessagesManager = () => {
         title: "Success",
         description: "Message marked as read!"
       });
-      fetchMessages();
+      // Update in place so pages loaded with "Load more" are kept
+      setMessages((current) => current.map((m) => ((m.id || m._id) === id ? { ...m, read: true } : m)));
+      fetchTotals();
     } catch (error) {
       toast({
         title: "Error",
@@ -54,7 +91,8 @@ const ContactMessagesManager = () => {
         title: "Success",
         description: "Message deleted successfully!"
       });
-      fetchMessages();
+      setMessages((current) => current.filter((m) => (m.id || m._id) !== id));
+      fetchTotals();
     } catch (error) {
       toast({
         title: "Error",
@@ -83,7 +121,7 @@ const ContactMessagesManager = () => {
       <div className="flex flex-col sm:flex-row justify-between items-start sm:items-center mb-6 gap-4">
         <h2 className="text-2xl md:text-3xl font-bold text-white">Contact Messages</h2>
         <div className="text-cyan-400 text-sm">
-          Total Messages: {messages.length} | Unread: {messages.filter(m => !m.read).length}
+          Total Messages: {totals.total} | Unread: {totals.unread}
         </div>
       </div>
 
@@ -156,6 +194,19 @@ const ContactMessagesManager = () => {
           ))
         )}
       </div>
+
+      {nextCursor && (
+        <div className="flex justify-center mt-6">
+          <Button
+            onClick={handleLoadMore}
+            disabled={loadingMore}
+            className="bg-pink-500 hover:bg-pink-600 text-white"
+          >
+            {loadingMore && <Loader2 className="w-4 h-4 mr-2 animate-spin" />}
+            Load more ({messages.length} of {totals.total} shown)
+          </Button>
+        </div>
+      )}
     </div>
   );
 };
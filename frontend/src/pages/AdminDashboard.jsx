@@ -46,18 +46,17 @@ const AdminDashboard = () => {
 
   const fetchStats = async () => {
     try {
-      const [projects, workExp, testimonials, messages] = await Promise.all([
+      const [projects, workExp, analytics] = await Promise.all([
         api.projects.getAll(),
         api.workExperience.getAll(),
-        api.testimonials.getAll(),
-        api.contact.getAll()
+        api.analytics.get()
       ]);
 
       setStats({
         projects: projects.data.length,
         workExperience: workExp.data.length,
-        testimonials: testimonials.data.length,
-        messages: messages.data.length
+        testimonials: analytics.data.testimonials.total,
+        messages: analytics.data.contact_messages.total
       });
     } catch (error) {
       console.error('Error fetching stats:', error);
@@ -74,11 +74,18 @@ export const api = {
   // Contact
   contact: {
     send: (data) => apiClient.post('/contact', data),
-    getAll: () => apiClient.get('/contact'),
+    // One page, newest first; pass the previous page's X-Next-Cursor as `before`
+    getPage: (before) => apiClient.get('/contact', { params: before ? { before } : {} }),
     markAsRead: (id) => apiClient.put(`/contact/${id}/read`),
     delete: (id) => apiClient.delete(`/contact/${id}`),
   },
 
+  // Admin analytics rollups
+  analytics: {
+    get: (days = 30) => apiClient.get('/analytics', { params: { days } }),
+    rebuild: () => apiClient.post('/analytics/rebuild'),
+  },
+
   // Dashboard Metrics
   metrics: {
     get: () => apiClient.get('/metrics'),
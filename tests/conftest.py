@@ -0,0 +1,76 @@
+import os
+import sys
+import itertools
+from datetime import datetime
+from pathlib import Path
+
+import pytest
+
+# The app reads its settings at import time; run everything against the in-memory backend
+os.environ.setdefault("STORAGE_BACKEND", "memory")
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "portfolio_test")
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "backend"))
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def db(monkeypatch):
+    """A fresh, empty in-memory database behind every repository, with no cached state."""
+    import server
+    from cache import invalidate_local
+    from repository import REPOSITORIES
+    from storage import MemoryDatabase
+
+    database = MemoryDatabase()
+    monkeypatch.setattr(server, "db", database)
+    invalidate_local(*REPOSITORIES)
+    yield database
+    invalidate_local(*REPOSITORIES)
+
+
+_client_numbers = itertools.count(1)
+
+
+@pytest.fixture
+async def client(db):
+    import httpx
+    import server
+
+    # A client address of its own, so the rate limits do not carry over between tests
+    number = next(_client_numbers)
+    address = f"10.0.{number // 256}.{number % 256}"
+    transport = httpx.ASGITransport(app=server.app, client=(address, 50000))
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+        yield http
+
+
+@pytest.fixture
+def admin_headers():
+    from auth import create_access_token
+    return {"Authorization": f"Bearer {create_access_token({'admin': True})}"}
+
+
+@pytest.fixture
+def make_project():
+    """Builds a stored-shape project document; `index` varies its title and technologies."""
+    from bson import ObjectId
+
+    def make(index: int) -> dict:
+        now = datetime.utcnow()
+        return {
+            "_id": ObjectId(),
+            "title": f"Project {index}",
+            "description": "An IoT dashboard",
+            "technologies": ["Python"] if index % 2 else ["IoT"],
+            "github": "https://github.com/example/project",
+            "featured": index == 0,
+            "metrics": [],
+            "created_at": now,
+            "updated_at": now,
+        }
+    return make
@@ -0,0 +1,123 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from analytics import ROLLUPS, bucket_range_query, rollups
+from storage import select
+
+pytestmark = pytest.mark.anyio
+
+TESTIMONIAL = {"name": "Grace", "position": "CTO", "company": "Acme", "content": "Great work"}
+
+
+@pytest.fixture
+def attached(db, monkeypatch):
+    """The analytics rollups as the only write hook of their source repositories."""
+    from dedup import RecentContent
+    from repository import REPOSITORIES
+
+    # Messages repeated across tests must not be taken for duplicates
+    monkeypatch.setattr("routes.contact.recent_contacts", RecentContent())
+    for source in ROLLUPS:
+        monkeypatch.setattr(REPOSITORIES[source], "_write_hooks", [])
+        monkeypatch.setattr(REPOSITORIES[source], "_image_fields", set())
+    rollups.attach(REPOSITORIES)
+
+
+async def assert_matches_recount():
+    """The incrementally maintained buckets equal a recount from the documents."""
+    maintained = {source: await rollups.read(source) for source in ROLLUPS}
+    for source in ROLLUPS:
+        await rollups.rebuild(source)
+    recounted = {source: await rollups.read(source) for source in ROLLUPS}
+
+    def nonzero(buckets):
+        return {
+            dimension: {key: counters for key, counters in keys.items() if any(counters.values())}
+            for dimension, keys in buckets.items()
+        }
+
+    assert {source: nonzero(buckets) for source, buckets in maintained.items()} == \
+        {source: nonzero(buckets) for source, buckets in recounted.items()}
+    return maintained
+
+
+async def test_single_writes_apply_deltas(attached, client, admin_headers):
+    for number, project_type in enumerate(["web", "ai", "web"]):
+        response = await client.post("/api/contact", json={
+            "name": "Ada", "email": "ada@example.com", "message": f"Hello {number}", "projectType": project_type,
+        })
+        assert response.status_code == 200
+    messages = (await client.get("/api/contact", headers=admin_headers)).json()
+    await client.put(f"/api/contact/{messages[0]['_id']}/read", headers=admin_headers)
+    await client.delete(f"/api/contact/{messages[1]['_id']}", headers=admin_headers)
+
+    created = (await client.post("/api/testimonials", json={**TESTIMONIAL, "rating": 5}, headers=admin_headers)).json()
+    await client.post("/api/testimonials", json={**TESTIMONIAL, "rating": 3}, headers=admin_headers)
+    await client.put(f"/api/testimonials/{created['_id']}", json={**TESTIMONIAL, "rating": 4}, headers=admin_headers)
+
+    buckets = await assert_matches_recount()
+    assert buckets["contact_messages"]["total"][""] == {"count": 2, "unread": 1}
+    assert buckets["testimonials"]["total"][""] == {"count": 2, "rating_total": 7}
+    assert buckets["testimonials"]["rating"]["4"] == {"count": 1}
+    assert rollups.stats()["failures"] == 0
+
+
+async def test_bulk_writes_apply_deltas(attached, db, client, admin_headers):
+    rebuilds = rollups.rebuilds
+    for number, project_type in enumerate(["web", "ai", "web", "ai"]):
+        await client.post("/api/contact", json={
+            "name": "Ada", "email": "ada@example.com", "message": f"Hello {number}", "projectType": project_type,
+        })
+    response = await client.post("/api/contact/bulk/read", json={"filter": {"projectType": "web"}}, headers=admin_headers)
+    assert response.status_code == 200
+    response = await client.post("/api/contact/bulk/delete", json={"filter": {"projectType": "ai"}}, headers=admin_headers)
+    assert response.status_code == 200
+
+    first = (await client.post("/api/testimonials", json={**TESTIMONIAL, "rating": 5}, headers=admin_headers)).json()
+    second = (await client.post("/api/testimonials", json={**TESTIMONIAL, "rating": 1}, headers=admin_headers)).json()
+    response = await client.post("/api/testimonials/bulk", json={
+        "upserts": [{**TESTIMONIAL, "id": first["_id"], "rating": 2}, {**TESTIMONIAL, "rating": 4}],
+        "deletes": [second["_id"]],
+    }, headers=admin_headers)
+    assert response.status_code == 200
+    # Bulk writes were applied as deltas, not by recounting
+    assert rollups.rebuilds == rebuilds
+
+    buckets = await assert_matches_recount()
+    assert buckets["contact_messages"]["projectType"]["web"] == {"count": 2, "unread": 0}
+    assert buckets["contact_messages"]["projectType"]["ai"] == {"count": 0, "unread": 0}
+    assert buckets["testimonials"]["total"][""] == {"count": 2, "rating_total": 6}
+
+
+async def test_analytics_reads_only_the_requested_days(attached, db, client, admin_headers):
+    today = datetime.utcnow().replace(hour=12)
+    await db.contact_messages.insert_many([
+        {"name": "Ada", "email": "a@example.com", "message": str(age), "read": False, "created_at": today - timedelta(days=age)}
+        for age in (0, 1, 1, 5, 40)
+    ])
+    for source in ROLLUPS:
+        await rollups.rebuild(source)
+
+    response = await client.get("/api/analytics", params={"days": 2}, headers=admin_headers)
+    stats = response.json()["contact_messages"]
+    assert stats["total"] == 5
+    assert [(bucket["key"], bucket["count"]) for bucket in stats["per_day"]] == [
+        (today.date().isoformat(), 1),
+        ((today - timedelta(days=1)).date().isoformat(), 2),
+    ]
+
+
+def test_bucket_range_query_skips_old_keys_of_the_bounded_dimension():
+    buckets = [
+        {"_id": "total"},
+        {"_id": "day:2024-01-01"},
+        {"_id": "day:2024-03-01"},
+        {"_id": "projectType:web"},
+        {"_id": "projectType:"},
+    ]
+    query = bucket_range_query({"day": "2024-02-01"})
+    assert [bucket["_id"] for bucket in select(buckets, query)] == [
+        "total", "day:2024-03-01", "projectType:web", "projectType:",
+    ]
+    assert bucket_range_query({}) == {}
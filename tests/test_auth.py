@@ -0,0 +1,59 @@
+import time
+
+import jwt
+import pytest
+
+from auth import VerifiedTokenCache
+
+
+def test_cached_token_is_returned_until_it_expires(monkeypatch):
+    cache = VerifiedTokenCache()
+    now = 1_000_000.0
+    monkeypatch.setattr(time, "time", lambda: now)
+
+    key, payload = cache.get("token")
+    assert payload is None
+    cache.put(key, {"admin": True, "exp": now + 60})
+    assert cache.get("token") == (key, {"admin": True, "exp": now + 60})
+
+    now += 60
+    with pytest.raises(jwt.ExpiredSignatureError):
+        cache.get("token")
+    # The expired entry is dropped rather than kept around
+    assert cache.get("token") == (key, None)
+    assert cache.stats()["entries"] == 0
+
+
+def test_cache_evicts_least_recently_used():
+    cache = VerifiedTokenCache(max_size=2)
+    for token in ("a", "b"):
+        key, _ = cache.get(token)
+        cache.put(key, {"sub": token})
+    cache.get("a")
+    key, _ = cache.get("c")
+    cache.put(key, {"sub": "c"})
+    assert cache.get("a")[1] == {"sub": "a"}
+    assert cache.get("b")[1] is None
+
+
+@pytest.mark.anyio
+async def test_verify_token_caches_valid_tokens_and_rejects_bad_ones(monkeypatch):
+    from fastapi import HTTPException
+    from fastapi.security import HTTPAuthorizationCredentials
+
+    import auth
+
+    monkeypatch.setattr(auth, "token_cache", VerifiedTokenCache())
+    token = auth.create_access_token({"admin": True})
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+
+    assert (await auth.verify_token(credentials))["admin"] is True
+    assert (await auth.verify_token(credentials))["admin"] is True
+    assert auth.token_cache.stats()["hits"] == 1
+
+    forged = jwt.encode({"admin": True}, "not-the-secret", algorithm=auth.ALGORITHM)
+    with pytest.raises(HTTPException) as rejected:
+        await auth.verify_token(HTTPAuthorizationCredentials(scheme="Bearer", credentials=forged))
+    assert rejected.value.status_code == 401
+    # Invalid tokens are never cached
+    assert auth.token_cache.stats()["entries"] == 1
@@ -0,0 +1,129 @@
+import asyncio
+
+import pytest
+from pymongo.errors import AutoReconnect
+
+import batch_writer
+from batch_writer import BatchWriter
+from storage import MemoryDatabase
+
+pytestmark = pytest.mark.anyio
+
+
+class FlakyCollection:
+    """Fails the first `failures` insert_many calls, then writes to a memory collection."""
+
+    def __init__(self, failures: int = 0, error: Exception = AutoReconnect("primary stepped down")):
+        self.inner = MemoryDatabase()["contact_messages"]
+        self.failures = failures
+        self.error = error
+        self.calls = []
+
+    async def insert_many(self, documents, ordered=True):
+        self.calls.append(len(documents))
+        if self.failures:
+            self.failures -= 1
+            raise self.error
+        return await self.inner.insert_many(documents, ordered=ordered)
+
+
+# Captured before the backoff is patched out below
+sleep = asyncio.sleep
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(asyncio, "sleep", lambda seconds: sleep(0))
+
+
+async def test_flushes_full_batches_and_the_rest_on_stop():
+    collection = FlakyCollection()
+    flushed = []
+
+    async def hook(documents):
+        flushed.append(len(documents))
+
+    writer = BatchWriter(batch_size=3, flush_interval=10)
+    writer.add_flush_hook(hook)
+    writer.start(collection)
+    for number in range(7):
+        assert writer.submit({"n": number})
+    await writer.stop()
+
+    assert await collection.inner.count_documents({}) == 7
+    assert collection.calls[:2] == [3, 3]
+    assert sum(flushed) == 7
+    assert writer.stats()["written"] == 7
+    assert not writer.running
+
+
+async def test_flushes_a_partial_batch_after_the_interval():
+    collection = FlakyCollection()
+    writer = BatchWriter(batch_size=100, flush_interval=0.01)
+    writer.start(collection)
+    writer.submit({"n": 1})
+    for _ in range(100):
+        if collection.calls:
+            break
+        await sleep(0.005)
+    assert collection.calls == [1]
+    await writer.stop()
+
+
+async def test_rejects_when_the_queue_is_full():
+    writer = BatchWriter(max_queue=2)
+    assert writer.submit({"n": 1})
+    assert writer.submit({"n": 2})
+    assert not writer.submit({"n": 3})
+    assert writer.stats()["rejected"] == 1
+
+
+async def test_retries_transient_failures():
+    collection = FlakyCollection(failures=2)
+    writer = BatchWriter(batch_size=10, flush_interval=0)
+    writer.start(collection)
+    writer.submit({"n": 1})
+    await writer.stop()
+    assert collection.calls == [1, 1, 1]
+    assert await collection.inner.count_documents({}) == 1
+    assert writer.stats()["failed"] == 0
+
+
+async def test_gives_up_after_max_attempts():
+    collection = FlakyCollection(failures=batch_writer.MAX_FLUSH_ATTEMPTS)
+    writer = BatchWriter(batch_size=10, flush_interval=0)
+    writer.start(collection)
+    writer.submit({"n": 1})
+    await writer.stop()
+    assert len(collection.calls) == batch_writer.MAX_FLUSH_ATTEMPTS
+    assert writer.stats()["failed"] == 1
+
+
+async def test_unexpected_errors_do_not_stop_the_writer():
+    collection = FlakyCollection(failures=1, error=TypeError("cannot encode object"))
+    writer = BatchWriter(batch_size=1, flush_interval=0)
+    writer.start(collection)
+    writer.submit({"n": 1})
+    writer.submit({"n": 2})
+    for _ in range(100):
+        if len(collection.calls) == 2:
+            break
+        await sleep(0.005)
+    assert writer.running
+    await writer.stop()
+    assert writer.stats()["failed"] == 1
+    assert await collection.inner.count_documents({}) == 1
+
+
+async def test_a_crashed_loop_stops_reporting_running(monkeypatch):
+    writer = BatchWriter()
+
+    async def crash():
+        raise RuntimeError("bug")
+
+    monkeypatch.setattr(writer, "_run", crash)
+    writer.start(FlakyCollection())
+    for _ in range(10):
+        await sleep(0)
+    assert not writer.running
+    assert writer.stats()["running"] is False
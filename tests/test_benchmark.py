@@ -0,0 +1,21 @@
+import pytest
+
+from benchmark import percentile
+
+
+@pytest.mark.parametrize("count, fraction, expected", [
+    (20, 0.95, 19),
+    (100, 0.99, 99),
+    (100, 0.07, 7),
+    (10, 0.5, 5),
+    (11, 0.5, 6),
+    (10, 1.0, 10),
+    (10, 0.0, 1),
+    (3, 0.99, 3),
+])
+def test_nearest_rank_percentile(count, fraction, expected):
+    assert percentile([float(value) for value in range(1, count + 1)], fraction) == expected
+
+
+def test_percentile_of_no_samples():
+    assert percentile([], 0.5) == 0.0
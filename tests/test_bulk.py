@@ -0,0 +1,47 @@
+import pytest
+from bson import ObjectId
+
+pytestmark = pytest.mark.anyio
+
+PROJECT = {"description": "d", "technologies": ["Python"], "github": "g"}
+
+
+async def test_bulk_reports_each_item_in_request_order(db, client, admin_headers, make_project):
+    existing = [make_project(index) for index in range(2)]
+    await db.projects.insert_many(existing)
+    missing, created = str(ObjectId()), str(ObjectId())
+
+    response = await client.post("/api/projects/bulk", json={
+        "upserts": [
+            {"title": "New", **PROJECT},
+            {"id": str(existing[0]["_id"]), "title": "Renamed", **PROJECT},
+            {"id": created, "title": "Upserted", **PROJECT},
+            {"id": "not-an-id", "title": "Bad", **PROJECT},
+        ],
+        "deletes": [str(existing[1]["_id"]), missing, "nope"],
+    }, headers=admin_headers)
+    assert response.status_code == 200
+    body = response.json()
+    assert [(item["index"], item["action"], item["ok"], item["error"]) for item in body["results"]] == [
+        (0, "insert", True, None),
+        (1, "update", True, None),
+        (2, "insert", True, None),
+        (3, "update", False, "Invalid ID"),
+        (4, "delete", True, None),
+        (5, "delete", False, "Not found"),
+        (6, "delete", False, "Invalid ID"),
+    ]
+    assert body["results"][2]["id"] == created
+    assert (body["inserted"], body["updated"], body["deleted"]) == (2, 1, 1)
+
+    titles = sorted(item["title"] for item in (await client.get("/api/projects")).json())
+    assert titles == ["New", "Renamed", "Upserted"]
+
+
+async def test_bulk_validates_and_requires_admin(db, client, admin_headers):
+    response = await client.post("/api/testimonials/bulk", json={"upserts": [{"name": "x"}]}, headers=admin_headers)
+    assert response.status_code == 422
+    response = await client.post("/api/work-experience/bulk", json={})
+    assert response.status_code in (401, 403)
+    response = await client.post("/api/work-experience/bulk", json={}, headers=admin_headers)
+    assert response.json() == {"inserted": 0, "updated": 0, "deleted": 0, "results": []}
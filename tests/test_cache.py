@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from cache import TTLCache
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_concurrent_misses_share_one_load():
+    cache = TTLCache(ttl=60)
+    loads = []
+
+    async def loader():
+        loads.append(1)
+        await asyncio.sleep(0.01)
+        return {"value": len(loads)}
+
+    results = await asyncio.gather(*(cache.get_or_load("skills", loader) for _ in range(5)))
+    assert results == [{"value": 1}] * 5
+    assert len(loads) == 1
+    assert await cache.get_or_load("skills", loader) == {"value": 1}
+
+
+async def test_failed_load_is_not_cached():
+    cache = TTLCache(ttl=60)
+
+    async def failing():
+        raise RuntimeError("down")
+
+    async def loader():
+        return "ok"
+
+    with pytest.raises(RuntimeError):
+        await cache.get_or_load("skills", failing)
+    assert await cache.get_or_load("skills", loader) == "ok"
+
+
+async def test_cancelled_load_releases_waiters():
+    cache = TTLCache(ttl=60)
+    started = asyncio.Event()
+
+    async def slow():
+        started.set()
+        await asyncio.sleep(10)
+
+    async def loader():
+        return "fresh"
+
+    first = asyncio.create_task(cache.get_or_load("skills", slow))
+    await started.wait()
+    waiter = asyncio.create_task(cache.get_or_load("skills", loader))
+    await asyncio.sleep(0)
+    first.cancel()
+
+    assert await asyncio.wait_for(waiter, 1) == "fresh"
+    with pytest.raises(asyncio.CancelledError):
+        await first
+    # Later callers are not stuck behind the cancelled load either
+    assert await asyncio.wait_for(cache.get_or_load("skills", loader), 1) == "fresh"
+
+
+async def test_invalidation_during_load_keeps_the_result_out():
+    cache = TTLCache(ttl=60)
+
+    async def loader():
+        cache.invalidate("skills")
+        return "stale"
+
+    assert await cache.get_or_load("skills", loader) == "stale"
+    assert cache.get("skills") == (False, None)
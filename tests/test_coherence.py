@@ -0,0 +1,74 @@
+import pytest
+
+from coherence import CacheCoherence
+from storage import MemoryDatabase
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_publish_leaves_other_workers_writes_to_sync():
+    db = MemoryDatabase()
+    refreshed = []
+
+    async def hook(name):
+        refreshed.append(name)
+
+    coherence = CacheCoherence(mode="poll")
+    coherence.add_refresh_hook(hook)
+    await coherence.sync(db, initial=True)
+
+    await coherence.publish(db, "projects")
+    assert coherence.stats()["versions"] == {"projects": 1}
+
+    # Another worker writes between our invalidation and our increment
+    await db.cache_versions.update_one({"_id": "projects"}, {"$inc": {"version": 1}})
+    await coherence.publish(db, "projects")
+    assert coherence.stats()["versions"] == {"projects": 1}
+    assert refreshed == []
+
+    await coherence.sync(db)
+    assert coherence.stats()["versions"] == {"projects": 3}
+    assert refreshed == ["projects"]
+
+
+async def test_failing_refresh_hook_still_invalidates(monkeypatch):
+    import coherence as module
+
+    db = MemoryDatabase()
+    invalidated, refreshed = [], []
+
+    async def failing(name):
+        raise RuntimeError("rebuild failed")
+
+    async def hook(name):
+        refreshed.append(name)
+
+    monkeypatch.setattr(module, "invalidate_local", lambda *names: invalidated.extend(names))
+    coherence = CacheCoherence(mode="poll")
+    coherence.add_refresh_hook(failing)
+    coherence.add_refresh_hook(hook)
+    await coherence.sync(db, initial=True)
+
+    await db.cache_versions.update_one({"_id": "projects"}, {"$inc": {"version": 1}}, upsert=True)
+    await coherence.sync(db)
+    assert refreshed == ["projects"]
+    assert invalidated == ["projects"]
+    assert coherence.stats()["versions"] == {"projects": 1}
+
+
+async def test_remote_version_bump_drops_cached_responses(db, client, make_project, monkeypatch):
+    from coherence import coherence
+
+    monkeypatch.setattr(coherence, "_seen", {})
+    monkeypatch.setattr(coherence, "_refresh_hooks", [])
+    await db.projects.insert_one(make_project(0))
+    await coherence.sync(db, initial=True)
+    assert len((await client.get("/api/projects")).json()) == 1
+
+    # Another worker writes and publishes; this worker still has the old response cached
+    await db.projects.insert_one(make_project(1))
+    await db.cache_versions.update_one({"_id": "projects"}, {"$inc": {"version": 1}}, upsert=True)
+    assert len((await client.get("/api/projects")).json()) == 1
+
+    await coherence.sync(db)
+    assert len((await client.get("/api/projects")).json()) == 2
@@ -0,0 +1,108 @@
+from datetime import datetime
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_etag_revalidation_and_invalidation(db, client, admin_headers, make_project):
+    await db.projects.insert_one(make_project(0))
+
+    response = await client.get("/api/projects")
+    etag = response.headers["etag"]
+    # Built from a list of documents, so there is no honest Last-Modified
+    assert "last-modified" not in response.headers
+
+    response = await client.get("/api/projects", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+    response = await client.post("/api/projects", json={
+        "title": "Another", "description": "d", "technologies": ["Go"], "github": "g",
+    }, headers=admin_headers)
+    assert response.status_code == 200
+
+    response = await client.get("/api/projects", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert len(response.json()) == 2
+
+
+async def test_last_modified_revalidation_for_single_documents(db, client):
+    updated_at = datetime(2024, 5, 1, 8, 30)
+    await db.personal_info.insert_one({
+        "name": "Ada", "title": "Engineer", "description": "d", "email": "ada@example.com",
+        "phone": "1", "location": "London", "github": "g", "linkedin": "l", "twitter": "t",
+        "updated_at": updated_at,
+    })
+
+    response = await client.get("/api/personal-info")
+    last_modified = response.headers["last-modified"]
+    assert last_modified == "Wed, 01 May 2024 08:30:00 GMT"
+
+    response = await client.get("/api/personal-info", headers={"If-Modified-Since": last_modified})
+    assert response.status_code == 304
+    response = await client.get("/api/personal-info", headers={"If-Modified-Since": "Tue, 30 Apr 2024 08:30:00 GMT"})
+    assert response.status_code == 200
+
+
+def test_validators_change_with_any_document_and_skip_last_modified_for_lists():
+    from conditional import compute_validators
+
+    first = {"_id": "1", "updated_at": datetime(2024, 1, 1)}
+    second = {"_id": "2", "updated_at": datetime(2024, 2, 1)}
+    etag, last_modified = compute_validators([first, second])
+    assert last_modified is None
+    assert compute_validators([first])[0] != etag
+    assert compute_validators([first, {**second, "updated_at": datetime(2024, 2, 2)}])[0] != etag
+    assert compute_validators(second) == (compute_validators(second)[0], datetime(2024, 2, 1))
+
+
+def test_if_none_match_accepts_lists_weak_tags_and_coded_variants():
+    from conditional import _etag_matches, variant_etag
+
+    etag = '"abc"'
+    assert _etag_matches('"zzz", W/"abc"', etag)
+    assert _etag_matches(variant_etag(etag, "gzip"), etag)
+    assert _etag_matches("*", etag)
+    assert not _etag_matches('"abcd"', etag)
+
+
+async def test_concurrent_requests_share_one_compression(db, client, monkeypatch, make_project):
+    import asyncio
+    import conditional
+
+    await db.projects.insert_many([make_project(index) for index in range(20)])
+    calls = []
+    compress = conditional._compress
+
+    def counting(body, encoding):
+        calls.append(encoding)
+        return compress(body, encoding)
+
+    monkeypatch.setattr(conditional, "_compress", counting)
+    responses = await asyncio.gather(*(
+        client.get("/api/projects", headers={"Accept-Encoding": "gzip"}) for _ in range(5)
+    ))
+    assert {response.headers["content-encoding"] for response in responses} == {"gzip"}
+    assert len({response.content for response in responses}) == 1
+    assert calls == ["gzip"]
+
+
+async def test_small_bodies_are_sent_uncompressed(db, client, make_project):
+    await db.projects.insert_one(make_project(0))
+    response = await client.get("/api/projects", headers={"Accept-Encoding": "gzip"})
+    assert "content-encoding" not in response.headers
+    assert "vary" not in response.headers
+
+
+async def test_each_coding_has_its_own_etag(db, client, make_project):
+    await db.projects.insert_many([make_project(index) for index in range(20)])
+    plain = await client.get("/api/projects", headers={"Accept-Encoding": "identity"})
+    gzipped = await client.get("/api/projects", headers={"Accept-Encoding": "gzip"})
+    assert gzipped.headers["vary"] == "Accept-Encoding"
+    assert gzipped.headers["etag"] == plain.headers["etag"][:-1] + '-gzip"'
+    # httpx decodes the body, which must be the same representation
+    assert gzipped.json() == plain.json()
+
@@ -0,0 +1,86 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_contact_inbox_keyset_pagination(db, client, admin_headers):
+    start = datetime(2024, 1, 1)
+    # Two messages share a timestamp, so the _id tie-break matters
+    stamps = [start, start + timedelta(minutes=1), start + timedelta(minutes=1), start + timedelta(minutes=2)]
+    await db.contact_messages.insert_many([
+        {"name": f"Sender {index}", "email": "a@example.com", "message": "Hi", "read": False, "created_at": stamp}
+        for index, stamp in enumerate(stamps)
+    ])
+
+    names, cursor = [], None
+    while True:
+        params = {"limit": 1, **({"before": cursor} if cursor else {})}
+        response = await client.get("/api/contact", params=params, headers=admin_headers)
+        assert response.status_code == 200
+        names += [item["name"] for item in response.json()]
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+    assert names == ["Sender 3", "Sender 2", "Sender 1", "Sender 0"]
+
+
+async def test_contact_inbox_filters_unread_and_rejects_bad_cursors(db, client, admin_headers):
+    await db.contact_messages.insert_many([
+        {"name": f"Sender {index}", "email": "a@example.com", "message": "Hi", "read": index % 2 == 0, "created_at": datetime(2024, 1, 1 + index)}
+        for index in range(4)
+    ])
+    response = await client.get("/api/contact", params={"unread_only": True}, headers=admin_headers)
+    assert [item["name"] for item in response.json()] == ["Sender 3", "Sender 1"]
+    assert "x-next-cursor" not in response.headers
+
+    response = await client.get("/api/contact", params={"before": "bm90IGEgY3Vyc29y"}, headers=admin_headers)
+    assert response.status_code == 400
+
+
+async def test_contact_inbox_requires_admin(db, client):
+    response = await client.get("/api/contact")
+    assert response.status_code in (401, 403)
+
+
+async def seed_inbox(db):
+    messages = [
+        {"name": f"Sender {index}", "email": "a@example.com", "message": "Hi", "projectType": "web" if index % 2 else "ai",
+         "read": index == 0, "created_at": datetime(2024, 1, 1) + timedelta(days=index)}
+        for index in range(6)
+    ]
+    await db.contact_messages.insert_many(messages)
+    return messages
+
+
+async def test_bulk_mark_read_by_ids_and_filter(db, client, admin_headers):
+    messages = await seed_inbox(db)
+    ids = [str(message["_id"]) for message in messages[:2]]
+    response = await client.post("/api/contact/bulk/read", json={"ids": ids}, headers=admin_headers)
+    assert response.json() == {"matched": 2, "modified": 1}
+
+    response = await client.post("/api/contact/bulk/read", json={
+        "filter": {"projectType": "web", "older_than": "2024-01-05T00:00:00"},
+    }, headers=admin_headers)
+    # Sender 1 (already read by id) and Sender 3
+    assert response.json() == {"matched": 2, "modified": 1}
+    unread = sorted(message["name"] for message in await db.contact_messages.find({"read": False}).to_list(None))
+    assert unread == ["Sender 2", "Sender 4", "Sender 5"]
+
+
+async def test_bulk_delete_by_filter(db, client, admin_headers):
+    await seed_inbox(db)
+    response = await client.post("/api/contact/bulk/delete", json={"filter": {"read": False, "projectType": "ai"}}, headers=admin_headers)
+    assert response.json() == {"deleted": 2}
+    assert await db.contact_messages.count_documents({}) == 4
+
+
+async def test_bulk_refuses_empty_selections_and_bad_ids(db, client, admin_headers):
+    await seed_inbox(db)
+    for body in ({}, {"filter": {}}, {"ids": None}):
+        response = await client.post("/api/contact/bulk/delete", json=body, headers=admin_headers)
+        assert response.status_code == 400
+    response = await client.post("/api/contact/bulk/read", json={"ids": ["nope"]}, headers=admin_headers)
+    assert response.status_code == 400
+    assert await db.contact_messages.count_documents({}) == 6
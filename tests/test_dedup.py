@@ -0,0 +1,88 @@
+from datetime import datetime
+
+import pytest
+
+from dedup import RecentContent, contact_content, content_hash
+
+
+def test_content_is_normalized():
+    assert contact_content("Ada  Lovelace", "ADA@example.com", "Hello\n there") == \
+        contact_content("ada lovelace", "ada@example.com ", "hello there")
+    assert contact_content("Ada", "ada@example.com", "Hello") != contact_content("Ada", "ada@example.com", "Bye")
+
+
+def test_content_hash_is_stable_within_a_window():
+    content = contact_content("Ada", "ada@example.com", "Hello")
+    start = datetime(2024, 1, 1, 12, 0, 0)
+    assert content_hash(content, start, window=600) == content_hash(content, datetime(2024, 1, 1, 12, 9, 59), window=600)
+    assert content_hash(content, start, window=600) != content_hash(content, datetime(2024, 1, 1, 12, 10, 0), window=600)
+
+
+def test_recent_content_flags_repeats_within_the_window():
+    recent = RecentContent(window=600)
+    content = contact_content("Ada", "ada@example.com", "Hello")
+    assert not recent.check_and_add(content, now=0.0)
+    assert recent.check_and_add(content, now=599.0)
+    assert not recent.check_and_add(content, now=600.0)
+    assert recent.stats()["duplicates"] == 1
+
+
+def test_recent_content_discard_and_bound():
+    recent = RecentContent(window=600, max_entries=2)
+    first, second, third = (contact_content("Ada", "ada@example.com", text) for text in "abc")
+    recent.check_and_add(first, now=0.0)
+    recent.discard(first)
+    assert not recent.check_and_add(first, now=1.0)
+    recent.check_and_add(second, now=2.0)
+    recent.check_and_add(third, now=3.0)
+    # The oldest fingerprint is dropped to stay within max_entries
+    assert not recent.check_and_add(first, now=4.0)
+
+
+@pytest.mark.anyio
+async def test_messages_dropped_by_the_writer_can_be_sent_again(db, client, monkeypatch):
+    from pymongo.errors import AutoReconnect
+
+    import batch_writer
+    from batch_writer import contact_writer
+
+    class Unavailable:
+        async def insert_many(self, documents, ordered=True):
+            raise AutoReconnect("no primary")
+
+    monkeypatch.setattr("routes.contact.recent_contacts", RecentContent())
+    monkeypatch.setattr(batch_writer, "MAX_FLUSH_ATTEMPTS", 1)
+    message = {"name": "Ada", "email": "ada@example.com", "message": "Hello there"}
+
+    contact_writer.start(Unavailable())
+    try:
+        response = await client.post("/api/contact", json=message)
+        assert response.status_code == 200
+    finally:
+        await contact_writer.stop()
+    assert await db.contact_messages.count_documents({}) == 0
+
+    # The retry is stored rather than taken for a duplicate of the lost message
+    response = await client.post("/api/contact", json=message)
+    assert response.status_code == 200
+    assert await db.contact_messages.count_documents({}) == 1
+
+
+@pytest.mark.anyio
+async def test_duplicate_contact_messages_are_stored_once(db, client, monkeypatch):
+    from repository import ensure_all_indexes
+
+    await ensure_all_indexes()
+    monkeypatch.setattr("routes.contact.recent_contacts", RecentContent())
+    message = {"name": "Ada", "email": "ada@example.com", "message": "Hello there"}
+
+    for body in (message, {**message, "message": "  hello   THERE "}):
+        response = await client.post("/api/contact", json=body)
+        assert response.status_code == 200
+    assert await db.contact_messages.count_documents({}) == 1
+
+    # Another worker has not seen it; the unique content hash stops it there
+    monkeypatch.setattr("routes.contact.recent_contacts", RecentContent())
+    response = await client.post("/api/contact", json=message)
+    assert response.status_code == 200
+    assert await db.contact_messages.count_documents({}) == 1
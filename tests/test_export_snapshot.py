@@ -0,0 +1,81 @@
+import json
+
+import pytest
+
+from cache import invalidate_local
+from export_snapshot import MANIFEST_NAME, PUBLIC_ENDPOINTS, SnapshotExporter
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def exporter(db, tmp_path):
+    import server
+
+    return SnapshotExporter(str(tmp_path), server.app)
+
+
+def read_manifest(directory):
+    return json.loads((directory / MANIFEST_NAME).read_text())
+
+
+async def test_export_writes_hashed_files_and_a_manifest(exporter, db, client, tmp_path, make_project):
+    await db.projects.insert_one(make_project(0))
+    manifest = await exporter.export()
+
+    assert manifest == read_manifest(tmp_path)
+    # No personal info yet, so that endpoint is left to the API
+    assert "/api/personal-info" not in manifest["endpoints"]
+    entry = manifest["endpoints"]["/api/projects"]
+    assert entry["file"].startswith("projects.") and entry["collections"] == ["projects"]
+    exported = (tmp_path / entry["file"]).read_bytes()
+    assert json.loads(exported) == (await client.get("/api/projects")).json()
+    assert entry["bytes"] == len(exported)
+    assert not list(tmp_path.glob("*.tmp"))
+
+
+async def test_incremental_export_and_prune(exporter, db, tmp_path, make_project):
+    await db.projects.insert_one(make_project(0))
+    first = (await exporter.export())["endpoints"]
+    skills_file = first["/api/skills"]["file"]
+
+    await db.projects.insert_one(make_project(1))
+    invalidate_local("projects")
+    second = (await exporter.export(["projects"]))["endpoints"]
+    changed = {path for path in second if second[path]["file"] != first[path]["file"]}
+    assert changed == {path for path, used in PUBLIC_ENDPOINTS.items() if "projects" in used and path in second}
+    # Files of the previous manifest are kept for readers still holding it
+    assert (tmp_path / first["/api/projects"]["file"]).exists()
+
+    await db.projects.insert_one(make_project(2))
+    invalidate_local("projects")
+    third = (await exporter.export(["projects"]))["endpoints"]
+    assert not (tmp_path / first["/api/projects"]["file"]).exists()
+    assert (tmp_path / second["/api/projects"]["file"]).exists()
+    assert (tmp_path / third["/api/projects"]["file"]).exists()
+    assert third["/api/skills"]["file"] == skills_file
+    assert (tmp_path / skills_file).exists()
+
+
+async def test_only_one_exporter_claims_the_boot_export(db, tmp_path):
+    first, second = SnapshotExporter(str(tmp_path)), SnapshotExporter(str(tmp_path))
+    assert first.claim_boot_export()
+    assert not second.claim_boot_export()
+    await first.stop()
+    assert second.claim_boot_export()
+    await second.stop()
+
+
+async def test_writes_are_exported_after_the_debounce(exporter, db, monkeypatch, make_project, tmp_path):
+    import asyncio
+
+    import export_snapshot
+
+    monkeypatch.setattr(export_snapshot, "SNAPSHOT_DEBOUNCE_MS", 1)
+    await db.projects.insert_one(make_project(0))
+    exporter.schedule("projects")
+    exporter.schedule("skills")
+    await asyncio.sleep(0.05)
+    await exporter.stop()
+    assert exporter.stats()["exports"] == 1
+    assert {"/api/projects", "/api/skills", "/api/portfolio"} <= set(read_manifest(tmp_path)["endpoints"])
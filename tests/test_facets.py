@@ -0,0 +1,76 @@
+import pytest
+
+from listing import content_filter, filter_cache_key
+
+pytestmark = pytest.mark.anyio
+
+
+def test_content_filter_normalises_technologies():
+    assert content_filter() == {}
+    assert content_filter(" Python ,") == {"technologies": "Python"}
+    query = content_filter("Python,IoT,Python", featured=False)
+    assert query == {"technologies": {"$all": ["IoT", "Python"]}, "featured": False}
+    assert filter_cache_key(query) == filter_cache_key(content_filter("IoT,Python", False))
+
+
+async def test_project_facet_counts_follow_the_filters(db, client, make_project):
+    documents = [make_project(index) for index in range(5)]
+    documents[4]["technologies"] = ["IoT", "Python"]
+    await db.projects.insert_many(documents)
+
+    response = await client.get("/api/projects/facets")
+    assert response.status_code == 200
+    assert response.json() == {
+        "total": 5,
+        "featured": 1,
+        "technologies": [{"technology": "IoT", "count": 3}, {"technology": "Python", "count": 3}],
+    }
+
+    response = await client.get("/api/projects/facets", params={"technology": "Python"})
+    assert response.json() == {
+        "total": 3,
+        "featured": 0,
+        "technologies": [{"technology": "Python", "count": 3}, {"technology": "IoT", "count": 1}],
+    }
+
+    response = await client.get("/api/projects/facets", params={"technology": "Rust"})
+    assert response.json() == {"total": 0, "featured": 0, "technologies": []}
+
+
+async def test_listing_filters_match_the_facets(db, client, make_project):
+    await db.projects.insert_many([make_project(index) for index in range(4)])
+
+    response = await client.get("/api/projects", params={"technology": "IoT"})
+    assert [item["title"] for item in response.json()] == ["Project 0", "Project 2"]
+    response = await client.get("/api/projects", params={"technology": "IoT", "featured": "false"})
+    assert [item["title"] for item in response.json()] == ["Project 2"]
+    response = await client.get("/api/projects", params={"technology": "IoT,Python"})
+    assert response.json() == []
+
+
+async def test_facets_are_refreshed_after_an_admin_write(db, client, admin_headers, make_project):
+    await db.projects.insert_many([make_project(index) for index in range(2)])
+    first = await client.get("/api/projects/facets")
+    assert first.json()["total"] == 2
+
+    payload = {"title": "New", "description": "d", "technologies": ["Rust"], "github": "https://github.com/example/new", "featured": True}
+    response = await client.post("/api/projects", json=payload, headers=admin_headers)
+    assert response.status_code == 200
+    second = await client.get("/api/projects/facets")
+    assert second.json()["total"] == 3
+    assert second.json()["featured"] == 2
+    assert {"technology": "Rust", "count": 1} in second.json()["technologies"]
+    assert second.headers.get("etag") != first.headers.get("etag")
+
+
+async def test_work_experience_facets(db, client):
+    await db.work_experience.insert_many([
+        {"title": "A", "company": "c", "period": "2020", "description": "d", "technologies": ["Go"]},
+        {"title": "B", "company": "c", "period": "2021", "description": "d", "technologies": ["Go", "SQL"]},
+    ])
+    response = await client.get("/api/work-experience/facets", params={"technology": "SQL"})
+    assert response.status_code == 200
+    assert response.json() == {
+        "total": 1,
+        "technologies": [{"technology": "Go", "count": 1}, {"technology": "SQL", "count": 1}],
+    }
@@ -0,0 +1,46 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_projects_keyset_pagination(db, client, make_project):
+    documents = [make_project(index) for index in range(5)]
+    await db.projects.insert_many(documents)
+
+    titles, cursor = [], None
+    for _ in range(5):
+        params = {"limit": 2, **({"after": cursor} if cursor else {})}
+        response = await client.get("/api/projects", params=params)
+        assert response.status_code == 200
+        titles += [item["title"] for item in response.json()]
+        cursor = response.headers.get("x-next-cursor")
+        if cursor is None:
+            break
+    assert titles == [document["title"] for document in documents]
+
+    response = await client.get("/api/projects", params={"after": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+async def test_fields_projection_returns_only_the_requested_fields(db, client, make_project):
+    await db.projects.insert_many([make_project(index) for index in range(2)])
+    response = await client.get("/api/projects", params={"fields": "title,featured"})
+    assert response.status_code == 200
+    assert [sorted(item) for item in response.json()] == [["_id", "featured", "title"]] * 2
+
+    response = await client.get("/api/projects", params={"fields": "title,secret"})
+    assert response.status_code == 400
+
+
+async def test_pages_of_testimonials_and_work_experience(db, client):
+    await db.testimonials.insert_many([
+        {"name": f"T{index}", "position": "p", "company": "c", "content": "x", "rating": 5} for index in range(3)
+    ])
+    await db.work_experience.insert_many([
+        {"title": f"W{index}", "company": "c", "period": "2020", "description": "d", "technologies": []} for index in range(3)
+    ])
+    for path, key, prefix in (("/api/testimonials", "name", "T"), ("/api/work-experience", "title", "W")):
+        first = await client.get(path, params={"limit": 2, "fields": key})
+        second = await client.get(path, params={"limit": 2, "after": first.headers["x-next-cursor"], "fields": key})
+        assert [item[key] for item in first.json() + second.json()] == [f"{prefix}{index}" for index in range(3)]
+        assert "x-next-cursor" not in second.headers
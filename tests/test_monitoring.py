@@ -0,0 +1,58 @@
+import math
+
+import pytest
+
+from monitoring import Counter, Histogram, REGISTRY
+
+
+@pytest.fixture
+def metrics():
+    """Metrics created by a test, removed from the shared registry afterwards."""
+    created = []
+    yield created
+    for metric in created:
+        REGISTRY.remove(metric)
+
+
+def test_counter_renders_labelled_series(metrics):
+    counter = Counter("test_events_total", "Events", ("kind",))
+    metrics.append(counter)
+    counter.inc("a")
+    counter.inc("a", amount=2)
+    counter.inc('quote"d')
+    assert counter.render() == [
+        "# HELP test_events_total Events",
+        "# TYPE test_events_total counter",
+        'test_events_total{kind="a"} 3',
+        'test_events_total{kind="quote\\"d"} 1',
+    ]
+
+
+def test_histogram_buckets_are_cumulative(metrics):
+    histogram = Histogram("test_duration_seconds", "Durations", buckets=(0.1, 1))
+    metrics.append(histogram)
+    for value in (0.05, 0.5, 0.5, 5):
+        histogram.observe(value)
+    samples = histogram.samples()
+    assert samples == [
+        'test_duration_seconds_bucket{le="0.1"} 1',
+        'test_duration_seconds_bucket{le="1"} 3',
+        'test_duration_seconds_bucket{le="+Inf"} 4',
+        "test_duration_seconds_sum 6.05",
+        "test_duration_seconds_count 4",
+    ]
+    assert histogram.buckets[-1] == math.inf
+
+
+@pytest.mark.anyio
+async def test_requests_are_counted_by_route_template(db, client, admin_headers, make_project):
+    project = make_project(0)
+    await db.projects.insert_one(project)
+    await client.delete(f"/api/projects/{project['_id']}", headers=admin_headers)
+    await client.get("/api/does-not-exist")
+
+    text = (await client.get("/metrics")).text
+    assert 'http_requests_total{method="DELETE",route="/api/projects/{project_id}",status="200"}' in text
+    assert 'route="unmatched",status="404"' in text
+    assert str(project["_id"]) not in text
+    assert "# TYPE http_request_duration_seconds histogram" in text
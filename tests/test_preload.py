@@ -0,0 +1,114 @@
+import asyncio
+
+import pytest
+from pymongo.errors import AutoReconnect
+
+from preload import ResidentContent
+
+pytestmark = pytest.mark.anyio
+
+
+class Source:
+    """A repository stand-in whose reads return `documents`, or wait for `gates`."""
+
+    def __init__(self, name: str, documents):
+        self.name = name
+        self.documents = list(documents)
+        self.gates = []
+        self.error = None
+        self.collection = self
+
+    def find(self, query):
+        return self
+
+    async def to_list(self, length):
+        if self.gates:
+            gate, documents = self.gates.pop(0)
+            await gate.wait()
+            return documents
+        if self.error is not None:
+            raise self.error
+        return [dict(document) for document in self.documents]
+
+
+@pytest.fixture(autouse=True)
+def isolated_coherence(monkeypatch):
+    from coherence import coherence
+
+    monkeypatch.setattr(coherence, "_refresh_hooks", [])
+
+
+async def test_refresh_swaps_the_snapshot_whole():
+    source = Source("projects", [{"_id": 1, "title": "A"}])
+    resident = ResidentContent(enabled=True)
+    await resident.load([source])
+    before = resident._snapshot
+
+    source.documents.append({"_id": 2, "title": "B"})
+    await resident.refresh("projects")
+    # Readers holding the old snapshot keep a consistent view
+    assert [document["_id"] for document in before["projects"]] == [1]
+    assert [document["_id"] for document in resident.find("projects")] == [1, 2]
+    assert resident.find("skills") is None
+    with pytest.raises(TypeError):
+        resident._snapshot["projects"] = ()
+
+
+async def test_an_older_refresh_finishing_last_does_not_win():
+    source = Source("projects", [{"_id": 1}])
+    resident = ResidentContent(enabled=True)
+    await resident.load([source])
+
+    slow, fast = asyncio.Event(), asyncio.Event()
+    source.gates = [(slow, [{"_id": "old"}]), (fast, [{"_id": "new"}])]
+    first = asyncio.create_task(resident.refresh("projects"))
+    second = asyncio.create_task(resident.refresh("projects"))
+    await asyncio.sleep(0)
+    fast.set()
+    await second
+    slow.set()
+    await first
+    assert [document["_id"] for document in resident.find("projects")] == ["new"]
+
+
+async def test_failed_refresh_serves_previous_data_and_retries(monkeypatch):
+    import preload
+
+    invalidated = []
+    monkeypatch.setattr(preload, "invalidate_local", lambda *names: invalidated.extend(names))
+    source = Source("projects", [{"_id": 1}])
+    resident = ResidentContent(enabled=True, retry_interval=0.01)
+    await resident.load([source])
+
+    source.documents = [{"_id": 2}]
+    source.error = AutoReconnect("no primary")
+    await resident.refresh("projects")
+    assert [document["_id"] for document in resident.find("projects")] == [1]
+    assert resident.stats()["stale"] == ["projects"]
+
+    source.error = None
+    for _ in range(100):
+        if not resident.stats()["stale"]:
+            break
+        await asyncio.sleep(0.01)
+    assert [document["_id"] for document in resident.find("projects")] == [2]
+    assert invalidated == ["projects"]
+    await resident.stop()
+
+
+async def test_queries_run_against_resident_documents():
+    source = Source("projects", [
+        {"_id": 1, "title": "A", "technologies": ["Python"]},
+        {"_id": 2, "title": "B", "technologies": ["IoT"]},
+        {"_id": 3, "title": "C", "technologies": ["Python", "IoT"]},
+    ])
+    resident = ResidentContent(enabled=True)
+    await resident.load([source])
+    found = resident.find("projects", {"technologies": "Python"}, [("_id", -1)], 1, {"title": 1})
+    assert found == [{"_id": 3, "title": "C"}]
+    counts = resident.aggregate("projects", [
+        {"$unwind": "$technologies"},
+        {"$group": {"_id": "$technologies", "count": {"$sum": 1}}},
+        {"$sort": {"_id": 1}},
+    ])
+    assert counts == [{"_id": "IoT", "count": 2}, {"_id": "Python", "count": 2}]
@@ -0,0 +1,41 @@
+import pytest
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_admins_can_profile_a_request(db, client, admin_headers, make_project):
+    await db.projects.insert_one(make_project(0))
+    plain = await client.get("/api/projects")
+    response = await client.get("/api/projects", params={"profile": 1}, headers=admin_headers)
+    assert response.status_code == 200
+    assert response.json() == plain.json()
+    profile_id = response.headers["x-profile-id"]
+
+    listed = (await client.get("/api/profiles", headers=admin_headers)).json()
+    assert profile_id in [profile["id"] for profile in listed]
+
+    profile = (await client.get(f"/api/profiles/{profile_id}", headers=admin_headers)).json()
+    assert profile["path"] == "/api/projects"
+    assert profile["status"] == 200
+    assert profile["functions"]
+
+    text = await client.get(f"/api/profiles/{profile_id}", params={"format": "text"}, headers=admin_headers)
+    assert text.headers["content-type"].startswith("text/plain")
+    dump = await client.get(f"/api/profiles/{profile_id}", params={"format": "pstats"}, headers=admin_headers)
+    assert dump.headers["content-disposition"] == f'attachment; filename="{profile_id}.prof"'
+
+
+async def test_profiling_requires_an_admin_token(db, client):
+    response = await client.get("/api/projects", headers={"X-Profile": "1"})
+    assert response.status_code == 401
+    response = await client.get("/api/projects", headers={"X-Profile": "1", "Authorization": "Bearer forged"})
+    assert response.status_code == 401
+    # Not asking for a profile leaves the request alone
+    response = await client.get("/api/projects", headers={"X-Profile": "0"})
+    assert response.status_code == 200
+    assert "x-profile-id" not in response.headers
+
+
+async def test_unknown_profiles_are_404(db, client, admin_headers):
+    response = await client.get("/api/profiles/missing", headers=admin_headers)
+    assert response.status_code == 404
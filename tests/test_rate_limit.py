@@ -0,0 +1,65 @@
+import pytest
+
+from rate_limit import Limit, RouteRule, parse_limit
+
+
+def test_parse_limit():
+    assert parse_limit("5/minute") == (5 / 60, 5.0)
+    assert parse_limit("50/second") == (50.0, 50.0)
+
+
+def test_bucket_allows_burst_then_waits_for_refill():
+    limit = Limit("3/minute")
+    for _ in range(3):
+        assert limit.wait_time("a", 0.0) == 0
+        limit.consume("a")
+    assert limit.wait_time("a", 0.0) == pytest.approx(20.0)
+    # Another key has its own bucket
+    assert limit.wait_time("b", 0.0) == 0
+    assert limit.wait_time("a", 20.0) == 0
+
+
+def test_bucket_refill_is_capped_at_burst():
+    limit = Limit("2/second")
+    limit.wait_time("a", 0.0)
+    limit.consume("a")
+    limit.wait_time("a", 100.0)
+    for _ in range(2):
+        limit.consume("a")
+    assert limit.wait_time("a", 100.0) > 0
+
+
+def test_idle_buckets_are_evicted_once_full():
+    limit = Limit("6/minute")
+    limit.wait_time("a", 0.0)
+    limit.consume("a")
+    limit.evict_idle(59.0)
+    assert len(limit) == 1
+    limit.evict_idle(60.0)
+    assert len(limit) == 0
+
+
+def test_route_rule_takes_from_both_buckets_only_when_both_allow():
+    rule = RouteRule(per_ip="2/minute", global_="3/minute")
+    assert rule.acquire("10.0.0.1", 0.0) == 0
+    assert rule.acquire("10.0.0.1", 0.0) == 0
+    assert rule.acquire("10.0.0.1", 0.0) == pytest.approx(30.0)
+    # The rejected request did not spend the global token
+    assert rule.acquire("10.0.0.2", 0.0) == 0
+    assert rule.acquire("10.0.0.3", 0.0) == pytest.approx(20.0)
+
+
+@pytest.mark.anyio
+async def test_contact_posts_beyond_the_per_ip_limit_get_429(db, client):
+    import rate_limit
+
+    burst = rate_limit.default_rules()[("POST", "/api/contact")].per_ip.burst
+    statuses = []
+    for number in range(int(burst) + 1):
+        response = await client.post("/api/contact", json={
+            "name": "Ada", "email": "ada@example.com", "message": f"Rate limit test {number}",
+        })
+        statuses.append(response.status_code)
+    assert statuses == [200] * int(burst) + [429]
+    assert int(response.headers["retry-after"]) >= 1
+    assert await db.contact_messages.count_documents({}) == int(burst)
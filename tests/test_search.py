@@ -0,0 +1,89 @@
+import pytest
+from pymongo.errors import PyMongoError
+
+from search import SearchIndex
+
+pytestmark = pytest.mark.anyio
+
+PROJECT = {"description": "d", "github": "g"}
+
+
+@pytest.fixture
+def projects(db, monkeypatch):
+    """The projects repository with a private search index as its only write hook."""
+    from coherence import coherence
+    from routes.projects import repository
+
+    monkeypatch.setattr(repository, "_write_hooks", [])
+    monkeypatch.setattr(coherence, "_refresh_hooks", [])
+    index = SearchIndex(retry_interval=0.01)
+    return repository, index
+
+
+def titles(index: SearchIndex, query: str):
+    return [hit["title"] for hit in index.search(query)[1]]
+
+
+async def test_writes_update_the_index_incrementally(projects, client, admin_headers):
+    repository, index = projects
+    await repository.insert({"title": "Vision pipeline", "technologies": ["Python"], **PROJECT})
+    await index.build([repository])
+    assert titles(index, "vision") == ["Vision pipeline"]
+
+    response = await client.post("/api/projects", json={"title": "Sensor mesh", "technologies": ["IoT"], **PROJECT}, headers=admin_headers)
+    created = response.json()["_id"]
+    assert titles(index, "sens") == ["Sensor mesh"]
+
+    await client.put(f"/api/projects/{created}", json={"title": "Radio mesh", "technologies": ["IoT"], **PROJECT}, headers=admin_headers)
+    assert titles(index, "sensor") == []
+    assert titles(index, "radio mesh") == ["Radio mesh"]
+
+    await client.delete(f"/api/projects/{created}", headers=admin_headers)
+    assert titles(index, "mesh") == []
+    assert index.stats()["documents"] == {"projects": 1}
+
+
+async def test_failed_index_read_does_not_fail_the_write(projects, client, admin_headers, monkeypatch):
+    import asyncio
+
+    repository, index = projects
+    await index.build([repository])
+    later_hook = []
+
+    async def record(repository, event):
+        later_hook.append(event.operation)
+
+    repository.add_write_hook(record)
+    find_all = repository.find_all
+    failures = [PyMongoError("connection reset")]
+
+    async def flaky(*args, **kwargs):
+        if failures:
+            raise failures.pop()
+        return await find_all(*args, **kwargs)
+
+    monkeypatch.setattr(repository, "find_all", flaky)
+    response = await client.post("/api/projects", json={"title": "Sensor mesh", "technologies": ["IoT"], **PROJECT}, headers=admin_headers)
+    assert response.status_code == 200
+    # Hooks registered after the index still ran
+    assert later_hook == ["insert"]
+    assert index.stats()["dirty"] == ["projects"]
+
+    # The background retry rebuilds the collection
+    for _ in range(100):
+        if not index.stats()["dirty"]:
+            break
+        await asyncio.sleep(0.01)
+    assert titles(index, "sensor") == ["Sensor mesh"]
+    await index.stop()
+
+
+async def test_build_indexes_collections_larger_than_a_page(projects, db):
+    from repository import MAX_PAGE_SIZE
+
+    repository, index = projects
+    count = MAX_PAGE_SIZE + 5
+    await db.projects.insert_many([{"title": f"Project {number}", "technologies": [], **PROJECT} for number in range(count)])
+    await index.build([repository])
+    assert index.stats()["documents"] == {"projects": count}
+    assert index.search("project")[0] == count
@@ -0,0 +1,59 @@
+from storage import aggregate, matches, select
+
+PROJECTS = [
+    {"_id": 1, "title": "Vision", "technologies": ["Python", "AI"], "featured": True, "stars": 12},
+    {"_id": 2, "title": "Sensors", "technologies": ["IoT", "C"], "featured": False, "stars": 3},
+    {"_id": 3, "title": "Dashboard", "technologies": ["Python", "React"], "stars": None},
+]
+
+
+def test_matches_equality_and_arrays():
+    assert matches(PROJECTS[0], {"technologies": "AI"})
+    assert matches(PROJECTS[0], {"technologies": {"$all": ["AI", "Python"]}})
+    assert not matches(PROJECTS[1], {"technologies": {"$in": ["Python", "React"]}})
+    assert matches(PROJECTS[2], {"featured": None})
+    assert matches(PROJECTS[2], {"featured": {"$exists": False}})
+
+
+def test_matches_comparisons_skip_missing_and_null():
+    assert matches(PROJECTS[0], {"stars": {"$gt": 10}})
+    assert not matches(PROJECTS[2], {"stars": {"$lt": 100}})
+    assert matches(PROJECTS[1], {"$or": [{"featured": True}, {"stars": {"$gte": 3}}]})
+    assert not matches(PROJECTS[1], {"$nor": [{"title": "Sensors"}]})
+
+
+def test_select_sorts_filters_and_slices():
+    ordered = select(PROJECTS, sort=[("stars", -1)])
+    assert [doc["_id"] for doc in ordered] == [1, 2, 3]
+    ordered = select(PROJECTS, sort=[("stars", 1)])
+    assert [doc["_id"] for doc in ordered] == [3, 2, 1]
+    page = select(PROJECTS, {"technologies": "Python"}, sort=[("_id", 1)], skip=1, limit=1)
+    assert [doc["_id"] for doc in page] == [3]
+
+
+def test_aggregate_unwind_group_sort():
+    result = aggregate(PROJECTS, [
+        {"$unwind": "$technologies"},
+        {"$group": {"_id": "$technologies", "count": {"$sum": 1}}},
+        {"$sort": {"count": -1, "_id": 1}},
+        {"$limit": 2},
+    ])
+    assert result == [{"_id": "Python", "count": 2}, {"_id": "AI", "count": 1}]
+
+
+def test_aggregate_facet_runs_each_branch_over_the_same_input():
+    result = aggregate(PROJECTS, [
+        {"$match": {"technologies": "Python"}},
+        {"$facet": {
+            "total": [{"$count": "n"}],
+            "stars": [{"$group": {"_id": None, "sum": {"$sum": "$stars"}, "max": {"$max": "$stars"}}}],
+            "empty": [{"$match": {"featured": False}}, {"$count": "n"}],
+        }},
+    ])
+    assert result == [{
+        "total": [{"n": 2}],
+        "stars": [{"_id": None, "sum": 12, "max": 12}],
+        "empty": [],
+    }]
+    # The input documents are left untouched
+    assert PROJECTS[0]["technologies"] == ["Python", "AI"]